@@ -0,0 +1,26 @@
+"""Operational commands that are kept out of worker startup.
+
+    python -m app.cli init-db    # create the database, tables and missing columns
+"""
+import argparse
+import logging
+import sys
+
+def init_db_command(args) -> int:
+    from app.core.database import init_db
+    init_db()
+    return 0
+
+COMMANDS = {
+    "init-db": init_db_command
+}
+
+def main(argv=None) -> int:
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=sorted(COMMANDS))
+    args = parser.parse_args(argv)
+    return COMMANDS[args.command](args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+from datetime import datetime
+from typing import Dict, Any, Optional
+from sqlalchemy import case, update
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.user import User
+import asyncio
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+class ActivityTracker:
+    """Write-behind tracker for users' last_active timestamps.
+
+    Requests only record a timestamp in memory; repeated hits by the same
+    user coalesce into one pending value. A background task writes all
+    pending values with a single UPDATE every ``flush_interval`` seconds
+    and once more on shutdown.
+    """
+
+    def __init__(self, flush_interval: float = settings.ACTIVITY_FLUSH_INTERVAL):
+        self.flush_interval = flush_interval
+        self._pending: Dict[int, datetime] = {}
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._stats = {
+            "touches": 0,
+            "flushes": 0,
+            "rows_written": 0,
+            "flush_errors": 0
+        }
+
+    def touch(self, user_id: int) -> None:
+        """Record that a user was just active"""
+        with self._lock:
+            self._pending[user_id] = datetime.utcnow()
+            self._stats["touches"] += 1
+
+    def flush(self) -> int:
+        """Write every pending timestamp in one statement (blocking)"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        db = SessionLocal()
+        try:
+            db.execute(
+                update(User)
+                .where(User.id.in_(list(pending)))
+                # Keep updated_at as is; activity is not a profile change
+                .values(last_active=case(pending, value=User.id), updated_at=User.updated_at)
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            with self._lock:
+                # Keep the values for the next attempt unless a newer one arrived
+                for user_id, timestamp in pending.items():
+                    self._pending.setdefault(user_id, timestamp)
+                self._stats["flush_errors"] += 1
+            logger.error(f"Failed to flush user activity: {str(e)}")
+            return 0
+        finally:
+            db.close()
+
+        with self._lock:
+            self._stats["flushes"] += 1
+            self._stats["rows_written"] += len(pending)
+        return len(pending)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await loop.run_in_executor(None, self.flush)
+
+    def start(self) -> None:
+        """Start the periodic flush task on the running event loop"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the periodic task and write whatever is still pending"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await asyncio.get_running_loop().run_in_executor(None, self.flush)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, "pending": len(self._pending), "flush_interval": self.flush_interval}
+
+activity_tracker = ActivityTracker()
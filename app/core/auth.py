@@ -3,45 +3,31 @@ from fastapi.responses import RedirectResponse
 from sqlalchemy.orm import Session
 from app.core.database import get_db
 from app.services.auth import AuthService
+from app.core.user_cache import user_cache
+from app.core.activity import activity_tracker
+from app.core.rate_limit import login_rate_limiter
 from app.core.config import settings
 from datetime import datetime
 import jwt
-import time
 from typing import Optional
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
 
-# Rate limiting
-from collections import defaultdict
-from datetime import datetime, timedelta
+async def _run_rate_limiter(method, *args):
+    if login_rate_limiter.backend.blocking:
+        return await asyncio.get_running_loop().run_in_executor(None, method, *args)
+    return method(*args)
 
-# Store login attempts: {ip: [(timestamp, success), ...]}
-login_attempts = defaultdict(list)
-MAX_ATTEMPTS = 5  # Maximum failed attempts
-ATTEMPT_WINDOW = 300  # 5 minutes window for attempts
-LOCKOUT_DURATION = 900  # 15 minutes lockout
-
-def is_rate_limited(ip: str) -> bool:
+async def is_rate_limited(ip: str) -> bool:
     """Check if an IP is rate limited"""
-    now = datetime.now()
-    # Clean up old attempts
-    login_attempts[ip] = [
-        attempt for attempt in login_attempts[ip]
-        if now - attempt[0] < timedelta(seconds=ATTEMPT_WINDOW)
-    ]
-    
-    # Count failed attempts in window
-    failed_attempts = sum(
-        1 for attempt in login_attempts[ip]
-        if not attempt[1]  # not success
-    )
-    
-    return failed_attempts >= MAX_ATTEMPTS
+    return await _run_rate_limiter(login_rate_limiter.is_limited, ip)
 
-def record_login_attempt(ip: str, success: bool):
-    """Record a login attempt"""
-    login_attempts[ip].append((datetime.now(), success))
+async def record_login_attempt(ip: str, success: bool):
+    """Record a login attempt; only failures count towards the limit"""
+    if not success:
+        await _run_rate_limiter(login_rate_limiter.record_failure, ip)
 
 async def validate_token(token: str) -> Optional[dict]:
     """Validate JWT token and return payload if valid"""
@@ -61,26 +47,38 @@ async def validate_token(token: str) -> Optional[dict]:
     except jwt.InvalidTokenError:
         return None
 
+async def _load_user_from_cookie(request: Request, db: Session):
+    """Resolve the user from the token cookie when the middleware did not"""
+    token = request.cookies.get("access_token")
+    if not token or not token.startswith("Bearer "):
+        return None
+        
+    token_str = token.split(" ")[1]
+    payload = await validate_token(token_str)
+    if not payload:
+        return None
+        
+    user = user_cache.get(payload.get('sub'), payload.get('exp'))
+    if user is None:
+        db_user = AuthService(db).get_user_by_id(payload.get('sub'))
+        if not db_user:
+            return None
+        user = user_cache.put(payload.get('sub'), payload.get('exp'), db_user)
+    return user
+
 async def get_current_user(request: Request, db: Session = Depends(get_db)):
     """Get the current authenticated user or None"""
     try:
-        token = request.cookies.get("access_token")
-        if not token or not token.startswith("Bearer "):
-            return None
-            
-        token_str = token.split(" ")[1]
-        payload = await validate_token(token_str)
-        if not payload:
-            return None
-            
-        auth_service = AuthService(db)
-        user = auth_service.get_user_by_id(payload.get('sub'))
+        # AuthMiddleware already resolved the user for this request
+        if hasattr(request.state, "user"):
+            user = request.state.user
+        else:
+            user = await _load_user_from_cookie(request, db)
         if not user:
             return None
             
-        # Update last activity
-        user.last_active = datetime.utcnow()
-        db.commit()
+        # Update last activity; written in batches, not per request
+        activity_tracker.touch(user.id)
         
         return user
         
@@ -102,7 +100,7 @@ async def require_auth(
             
         # Check rate limiting for protected routes
         client_ip = request.client.host
-        if is_rate_limited(client_ip):
+        if await is_rate_limited(client_ip):
             raise HTTPException(
                 status_code=status.HTTP_429_TOO_MANY_REQUESTS,
                 detail="Too many failed attempts. Please try again later."
@@ -115,24 +113,3 @@ async def require_auth(
         )
         
     return current_user
-
-# Cleanup task for rate limiting data
-def cleanup_rate_limiting():
-    """Clean up old rate limiting data"""
-    now = datetime.now()
-    for ip in list(login_attempts.keys()):
-        login_attempts[ip] = [
-            attempt for attempt in login_attempts[ip]
-            if now - attempt[0] < timedelta(seconds=LOCKOUT_DURATION)
-        ]
-        if not login_attempts[ip]:
-            del login_attempts[ip]
-
-# Run cleanup periodically
-import threading
-def cleanup_thread():
-    while True:
-        time.sleep(300)  # Run every 5 minutes
-        cleanup_rate_limiting()
-
-threading.Thread(target=cleanup_thread, daemon=True).start() 
\ No newline at end of file
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional, List
+from typing import Optional, List, Dict
 from functools import lru_cache
 
 class Settings(BaseSettings):
@@ -20,6 +20,40 @@ class Settings(BaseSettings):
     HUGGINGFACE_API_KEY: str
     HUGGINGFACE_MODEL: str = "mistralai/Mistral-7B-Instruct-v0.2"
     
+    # Model HTTP Client Settings
+    LLM_MAX_CONNECTIONS: int = 20
+    LLM_KEEPALIVE_TIMEOUT: float = 60  # seconds
+    LLM_REQUEST_TIMEOUT: float = 60  # seconds
+    LLM_CONNECT_TIMEOUT: float = 10  # seconds
+    LLM_MAX_RETRIES: int = 3  # retries on 429/503
+    LLM_RETRY_BACKOFF: float = 0.5  # base backoff in seconds
+    
+    # Model Backend Settings (tried fastest first; one that cannot answer passes to the next)
+    MODEL_BACKENDS: List[str] = ["local", "remote"]
+    LOCAL_MODEL_PATH: Optional[str] = None  # GGUF file for llama_cpp, or a transformers model name/dir
+    LOCAL_MODEL_KIND: str = "llama_cpp"  # llama_cpp or transformers
+    LOCAL_MODEL_THREADS: int = 4
+    LOCAL_MODEL_CONTEXT: int = 4096  # tokens
+    LOCAL_MODEL_MAX_TOKENS: int = 256
+    
+    # Intent Matcher Settings (rule-based SQL for simple aggregates, ahead of the model)
+    INTENT_MATCHER_ENABLED: bool = True
+    INTENT_MATCH_MIN_CONFIDENCE: float = 0.8  # below this the question goes to the model
+    
+    # Schema Retrieval Settings (prompts carry only the tables relevant to the question)
+    SCHEMA_PRUNING_ENABLED: bool = True
+    SCHEMA_PRUNE_MIN_TABLES: int = 12  # smaller schemas are sent whole
+    SCHEMA_PRUNE_TOP_K: int = 5  # best-matching tables kept per question
+    SCHEMA_PRUNE_MAX_TABLES: int = 15  # cap after adding foreign-key neighbours
+    SCHEMA_INDEX_CACHE_SIZE: int = 128  # schema indexes kept, about one per connection
+    
+    # NL-to-SQL Cache Settings
+    NL_SQL_CACHE_ENABLED: bool = True
+    NL_SQL_CACHE_MAX_ENTRIES: int = 1000
+    NL_SQL_CACHE_TTL: int = 3600  # seconds
+    NL_SQL_CACHE_SIMILARITY_ENABLED: bool = False
+    NL_SQL_CACHE_SIMILARITY_THRESHOLD: float = 0.92
+    
     # MySQL Database Settings
     MYSQL_HOST: str
     MYSQL_PORT: int
@@ -35,6 +69,77 @@ class Settings(BaseSettings):
     # Connection Pool Settings
     MAX_CONNECTIONS_COUNT: int = 10
     MIN_CONNECTIONS_COUNT: int = 1
+    DB_WARM_POOL_ON_STARTUP: bool = True  # connect in the background once serving; failures only log
+    
+    # User Database Engine Pool Settings
+    USER_DB_POOL_SIZE: int = 5
+    USER_DB_MAX_OVERFLOW: int = 5
+    USER_DB_POOL_RECYCLE: int = 300  # seconds
+    USER_DB_ENGINE_IDLE_TIMEOUT: int = 600  # seconds before an unused engine is disposed
+    USER_DB_MAX_ENGINES: int = 50
+    
+    # Query Form Pool Settings (the /query demo page)
+    QUERY_FORM_DATABASE_URL: Optional[str] = None  # read-only account for the demo queries; the form is disabled when unset
+    QUERY_FORM_POOL_SIZE: int = 5
+    QUERY_FORM_MAX_OVERFLOW: int = 5
+    QUERY_FORM_POOL_TIMEOUT: float = 10  # seconds to wait for a free connection before failing
+    
+    # Login Rate Limiting Settings
+    LOGIN_MAX_ATTEMPTS: int = 5  # failed attempts allowed per sliding window
+    LOGIN_ATTEMPT_WINDOW: int = 300  # seconds
+    LOGIN_RATE_LIMIT_BACKEND: str = "memory"  # memory, or sqlite to share across workers
+    LOGIN_RATE_LIMIT_SQLITE_PATH: str = "login_rate_limits.db"
+    LOGIN_RATE_LIMIT_SHARDS: int = 16
+    LOGIN_RATE_LIMIT_MAX_KEYS: int = 100000
+    
+    # Password Hashing Settings
+    BCRYPT_ROUNDS: int = 12  # existing hashes are upgraded on next login when this changes
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_QUEUE: int = 32  # waiting operations before logins are refused
+    
+    # Authenticated User Cache Settings
+    USER_CACHE_TTL: int = 60  # seconds; never longer than the token lifetime
+    USER_CACHE_MAX_ENTRIES: int = 10000
+    
+    ACTIVITY_FLUSH_INTERVAL: float = 30  # seconds between bulk last_active writes
+    
+    # Decrypted Credential Cache Settings
+    CREDENTIAL_CACHE_TTL: int = 300  # seconds; 0 disables caching
+    CREDENTIAL_CACHE_MAX_ENTRIES: int = 256
+    
+    # Database Execution Settings
+    DB_EXECUTOR_WORKERS: int = 16  # threads running blocking driver calls
+    DB_MAX_CONCURRENT_QUERIES_PER_CONNECTION: int = 4
+    DISCONNECT_POLL_INTERVAL: float = 0.5  # seconds between client disconnect checks
+    QUERY_TIMEOUT_SECONDS: float = 30  # server-side statement deadline; 0 disables
+    QUERY_TIMEOUT_CONNECTION_OVERRIDES: Dict[int, float] = {}  # connection id -> seconds
+    
+    # Query Cost Guard Settings (policy: reject, limit, warn or off)
+    QUERY_COST_POLICY: str = "warn"
+    QUERY_COST_POLICY_OVERRIDES: Dict[int, str] = {}  # connection id -> policy
+    QUERY_COST_MAX_ROWS_EXAMINED: int = 10000000
+    QUERY_COST_LARGE_TABLE_ROWS: int = 1000000
+    
+    # Chat Result Settings
+    CHAT_MAX_ROWS: int = 1000
+    CHAT_FETCH_SIZE: int = 200  # rows read from the driver per fetchmany call
+    
+    # Chat Batch Settings
+    CHAT_BATCH_MAX_QUESTIONS: int = 500
+    CHAT_BATCH_MODEL_CONCURRENCY: int = 4  # model calls in flight per batch
+    
+    # Query Result Cache Settings (opt-in)
+    RESULT_CACHE_ENABLED: bool = False
+    RESULT_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    RESULT_CACHE_TTL: int = 300  # seconds
+    RESULT_CACHE_CONNECTION_TTLS: Dict[int, int] = {}  # per-connection overrides, 0 disables
+    
+    # Logging Settings
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json"  # json lines, or text for local development
+    LOG_QUEUE_SIZE: int = 10000  # records buffered for the writer thread; overflow is dropped
+    LOG_CATEGORY_LEVELS: Dict[str, str] = {"sql": "WARNING", "prompt": "WARNING", "model": "WARNING"}
+    LOG_SAMPLE_RATES: Dict[str, float] = {}  # category -> fraction of DEBUG/INFO records kept
     
     # JWT settings
     JWT_SECRET_KEY: str
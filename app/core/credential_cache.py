@@ -0,0 +1,101 @@
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+from app.core.config import settings
+from app.core.database import decrypt_value
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+class _CachedSecret:
+    __slots__ = ("buffer", "expires_at")
+
+    def __init__(self, secret: str, ttl: int):
+        self.buffer = bytearray(secret.encode())
+        self.expires_at = time.monotonic() + ttl
+
+    def wipe(self) -> None:
+        # Overwrite in place so the plaintext does not linger until GC
+        self.buffer[:] = bytes(len(self.buffer))
+
+class CredentialCache:
+    """Short-lived, memory-only cache of decrypted connection passwords.
+
+    Keyed by connection id and ciphertext, so a changed password never
+    returns the old secret. Entries expire after a fixed TTL in insertion
+    order and their buffers are zeroed on expiry, eviction or
+    invalidation. Strings handed to callers are ordinary copies and are
+    not wiped.
+    """
+
+    def __init__(self, ttl: int = settings.CREDENTIAL_CACHE_TTL, max_entries: int = settings.CREDENTIAL_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[int, str], _CachedSecret]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "expirations": 0,
+            "evictions": 0,
+            "invalidations": 0
+        }
+
+    def get_password(self, connection_id: Optional[int], ciphertext: str) -> str:
+        """Return the decrypted password, decrypting only on a miss"""
+        if connection_id is None or self.ttl <= 0:
+            return decrypt_value(ciphertext)
+        key = (connection_id, ciphertext)
+        with self._lock:
+            self._expire_locked()
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._stats["hits"] += 1
+                return entry.buffer.decode()
+            self._stats["misses"] += 1
+
+        secret = decrypt_value(ciphertext)
+        with self._lock:
+            # Any entry for an older ciphertext of this connection is stale
+            self._remove_locked(lambda cached_key: cached_key[0] == connection_id)
+            self._entries[key] = _CachedSecret(secret, self.ttl)
+            while len(self._entries) > self.max_entries:
+                _, evicted = self._entries.popitem(last=False)
+                evicted.wipe()
+                self._stats["evictions"] += 1
+        return secret
+
+    def invalidate(self, connection_id: int) -> int:
+        """Wipe the cached secret for a connection that was edited or deleted"""
+        with self._lock:
+            removed = self._remove_locked(lambda cached_key: cached_key[0] == connection_id)
+            self._stats["invalidations"] += removed
+        return removed
+
+    def clear(self) -> None:
+        with self._lock:
+            self._remove_locked(lambda cached_key: True)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, "entries": len(self._entries), "ttl": self.ttl}
+
+    def _expire_locked(self) -> None:
+        # Entries are never reordered, so the oldest expires first
+        now = time.monotonic()
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if entry.expires_at > now:
+                break
+            del self._entries[key]
+            entry.wipe()
+            self._stats["expirations"] += 1
+
+    def _remove_locked(self, predicate) -> int:
+        keys = [key for key in self._entries if predicate(key)]
+        for key in keys:
+            self._entries.pop(key).wipe()
+        return len(keys)
+
+credential_cache = CredentialCache()
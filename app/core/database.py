@@ -1,15 +1,21 @@
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
 from app.core.config import settings
-from typing import Generator
+from app.core.structured_logging import install_sql_logging
+from functools import lru_cache
+from typing import Generator, Optional
 import mysql.connector
 from mysql.connector import Error
 from cryptography.fernet import Fernet
 import base64
-import os
+import threading
+import logging
 from pathlib import Path
 
+logger = logging.getLogger(__name__)
+
 # Create the key file path in the app directory
 key_file = Path("app/core/encryption.key")
 
@@ -22,28 +28,31 @@ def get_encryption_key():
         key_file.write_bytes(key)
     return key_file.read_bytes()
 
-# Create Fernet instance for encryption/decryption
-fernet = Fernet(get_encryption_key())
+@lru_cache()
+def get_fernet() -> Fernet:
+    """Fernet instance for encryption/decryption, loaded on first use"""
+    return Fernet(get_encryption_key())
 
 def encrypt_value(value: str) -> str:
     if not value:
         return value
-    return base64.b64encode(fernet.encrypt(value.encode())).decode()
+    return base64.b64encode(get_fernet().encrypt(value.encode())).decode()
 
 def decrypt_value(encrypted_value: str) -> str:
     if not encrypted_value:
         return encrypted_value
     try:
-        return fernet.decrypt(base64.b64decode(encrypted_value)).decode()
+        return get_fernet().decrypt(base64.b64decode(encrypted_value)).decode()
     except:
         return encrypted_value
 
-def create_mysql_engine():
-    """Create MySQL engine with the correct database"""
+def create_database() -> None:
+    """Create the application database if it doesn't exist (bootstrap only)"""
     try:
-        # First create a connection without database
+        # Connect without a database, since it may not exist yet
         mysql_conn = mysql.connector.connect(
             host=settings.MYSQL_HOST,
+            port=settings.MYSQL_PORT,
             user=settings.MYSQL_USER,
             password=settings.MYSQL_PASSWORD
         )
@@ -51,7 +60,6 @@ def create_mysql_engine():
         
         # Create database if it doesn't exist
         cursor.execute(f"CREATE DATABASE IF NOT EXISTS {settings.MYSQL_DATABASE}")
-        cursor.execute(f"USE {settings.MYSQL_DATABASE}")
         mysql_conn.commit()
         
         # Check if database exists
@@ -63,31 +71,81 @@ def create_mysql_engine():
             
         cursor.close()
         mysql_conn.close()
-        
-        # Create SQLAlchemy engine with the database specified
-        db_url = settings.MYSQL_URL
-        print(f"Connecting to database with URL: {db_url}")
-        
-        return create_engine(
-            db_url,
-            pool_size=settings.MAX_CONNECTIONS_COUNT,
-            max_overflow=0,
-            pool_pre_ping=True,
-            echo=True
-        )
     except Error as e:
-        print(f"Error creating MySQL engine: {e}")
+        logger.error(f"Error creating MySQL database: {e}")
         raise
 
-# Create MySQL engine
-engine = create_mysql_engine()
+def create_mysql_engine():
+    """Create the SQLAlchemy engine for the application database.
+
+    No connection is opened here; the pool connects on first checkout
+    and pre-ping replaces connections dropped while MySQL was away.
+    """
+    engine = create_engine(
+        settings.MYSQL_URL,
+        pool_size=settings.MAX_CONNECTIONS_COUNT,
+        max_overflow=0,
+        pool_pre_ping=True
+    )
+    install_sql_logging(engine, "app")
+    return engine
+
+_engine: Optional[Engine] = None
+_engine_lock = threading.Lock()
+
+def get_engine() -> Engine:
+    """Return the application engine, creating it on first use"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = create_mysql_engine()
+    return _engine
+
+def dispose_engine() -> None:
+    """Close pooled application connections (on shutdown)"""
+    global _engine
+    with _engine_lock:
+        if _engine is not None:
+            _engine.dispose()
+            _engine = None
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def warm_engine() -> bool:
+    """Open one pooled connection ahead of the first request; never raises"""
+    try:
+        with get_engine().connect() as conn:
+            conn.execute(text("SELECT 1"))
+        return True
+    except Exception as e:
+        logger.warning(f"Application database not reachable yet: {str(e)}")
+        return False
+
+def __getattr__(name: str):
+    # Keep `from app.core.database import engine` working without an import-time engine
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+class _LazySessionmaker(sessionmaker):
+    """sessionmaker that binds the application engine when a session is made"""
+
+    def __call__(self, **local_kw) -> Session:
+        local_kw.setdefault("bind", get_engine())
+        return super().__call__(**local_kw)
+
+SessionLocal = _LazySessionmaker(autocommit=False, autoflush=False)
 Base = declarative_base()
 
 def init_db() -> None:
-    """Initialize the database, creating tables if they don't exist"""
+    """Initialize the database, creating tables if they don't exist.
+
+    Run once per deploy with ``python -m app.cli init-db``; workers do not
+    call this at startup.
+    """
     try:
+        create_database()
+        engine = get_engine()
+
         # Import all models here to ensure they are registered with Base
         from app.models.connection import Connection
         from app.models.database import QueryHistory
@@ -97,19 +155,31 @@ def init_db() -> None:
         with engine.connect() as conn:
             result = conn.execute(text("SELECT DATABASE()"))
             database_name = result.scalar()
-            print(f"Connected to database: {database_name}")
+            logger.info(f"Connected to database: {database_name}")
             
             # Create tables only if they don't exist
             Base.metadata.create_all(bind=engine, checkfirst=True)
-            print(f"Database tables verified/created successfully in {database_name}!")
+            logger.info(f"Database tables verified/created successfully in {database_name}")
+            
+            # create_all does not add columns to existing tables
+            user_columns = {column["name"] for column in inspect(conn).get_columns("users")}
+            if "last_active" not in user_columns:
+                conn.execute(text("ALTER TABLE users ADD COLUMN last_active DATETIME NULL"))
+                conn.commit()
+                logger.info("Added users.last_active column")
+            connection_columns = {column["name"] for column in inspect(conn).get_columns("connections")}
+            if "schema_hash" not in connection_columns:
+                conn.execute(text("ALTER TABLE connections ADD COLUMN schema_hash VARCHAR(16) NULL"))
+                conn.commit()
+                logger.info("Added connections.schema_hash column")
             
             # Show existing tables
             result = conn.execute(text("SHOW TABLES"))
             tables = [row[0] for row in result]
-            print(f"Available tables: {', '.join(tables)}")
+            logger.info(f"Available tables: {', '.join(tables)}")
 
     except Exception as e:
-        print(f"Error initializing database: {e}")
+        logger.error(f"Error initializing database: {e}")
         raise Exception(f"Failed to initialize database: {str(e)}")
 
 # Dependency for FastAPI
@@ -0,0 +1,148 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from app.core.config import settings
+import asyncio
+import contextvars
+import functools
+import logging
+
+logger = logging.getLogger(__name__)
+
+class QuerySlot:
+    """A held per-connection concurrency slot for one logical query.
+
+    Blocking calls made through ``call`` run on the executor thread pool.
+    If the awaiting task is cancelled (e.g. the client went away), the
+    ``on_cancel`` hook is invoked to interrupt the running statement and
+    the slot is only released once the worker thread has really finished.
+    """
+
+    def __init__(self, executor: "DatabaseExecutor", semaphore: asyncio.Semaphore, on_cancel: Optional[Callable[[], None]] = None):
+        self._executor = executor
+        self._semaphore = semaphore
+        self.on_cancel = on_cancel
+        self._pending: Optional[asyncio.Future] = None
+
+    async def call(self, func: Callable, *args, **kwargs) -> Any:
+        """Run a blocking function in the pool while holding this slot"""
+        loop = asyncio.get_running_loop()
+        # Carry context variables (e.g. the request id) into the worker thread
+        context = contextvars.copy_context()
+        future = loop.run_in_executor(self._executor._pool, functools.partial(context.run, func, *args, **kwargs))
+        self._pending = future
+        try:
+            result = await asyncio.shield(future)
+        except asyncio.CancelledError:
+            self._executor._stats["cancelled"] += 1
+            if self.on_cancel is not None:
+                # Killing a query may need its own round trip; keep it off the loop
+                self._executor._cancel_pool.submit(self._run_cancel_hook)
+            raise
+        self._pending = None
+        return result
+
+    def _run_cancel_hook(self) -> None:
+        try:
+            self.on_cancel()
+        except Exception as e:
+            logger.warning(f"Cancel hook failed: {str(e)}")
+
+    def defer(self, func: Callable, *args) -> None:
+        """Run cleanup in the pool once any in-flight call has finished.
+
+        Safe to use from cancellation paths, where awaiting is not possible.
+        """
+        pool = self._executor._pool
+        if self._pending is not None and not self._pending.done():
+            self._pending.add_done_callback(lambda _: pool.submit(func, *args))
+        else:
+            pool.submit(func, *args)
+
+    async def __aenter__(self) -> "QuerySlot":
+        self._executor._stats["waiting"] += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._executor._stats["waiting"] -= 1
+        self._executor._stats["active"] += 1
+        self._executor._stats["queries"] += 1
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        if self._pending is not None and not self._pending.done():
+            # A cancelled call is still running in its thread; keep the slot until it ends
+            self._pending.add_done_callback(lambda _: self._release())
+        else:
+            self._release()
+
+    def _release(self) -> None:
+        self._executor._stats["active"] -= 1
+        self._semaphore.release()
+
+class DatabaseExecutor:
+    """Runs blocking database driver calls off the event loop.
+
+    A bounded thread pool is shared by all user databases, and each
+    connection is limited to a fixed number of concurrent queries.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = settings.DB_EXECUTOR_WORKERS,
+        per_connection_limit: int = settings.DB_MAX_CONCURRENT_QUERIES_PER_CONNECTION
+    ):
+        self.max_workers = max_workers
+        self.per_connection_limit = per_connection_limit
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="db-query")
+        # Separate threads so kills still run when every query worker is busy
+        self._cancel_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="db-cancel")
+        self._limits: Dict[Hashable, asyncio.Semaphore] = {}
+        self._stats = {
+            "queries": 0,
+            "active": 0,
+            "waiting": 0,
+            "cancelled": 0
+        }
+
+    def slot(self, connection_key: Hashable, on_cancel: Optional[Callable[[], None]] = None) -> QuerySlot:
+        """Reserve a concurrency slot for a connection (use with ``async with``)"""
+        semaphore = self._limits.get(connection_key)
+        if semaphore is None:
+            semaphore = self._limits[connection_key] = asyncio.Semaphore(self.per_connection_limit)
+        return QuerySlot(self, semaphore, on_cancel)
+
+    async def run(self, connection_key: Hashable, func: Callable, *args, on_cancel: Optional[Callable[[], None]] = None, **kwargs) -> Any:
+        """Run one blocking call for a connection in the pool"""
+        async with self.slot(connection_key, on_cancel) as slot:
+            return await slot.call(func, *args, **kwargs)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return pool size and query concurrency counters"""
+        return {
+            **self._stats,
+            "max_workers": self.max_workers,
+            "per_connection_limit": self.per_connection_limit
+        }
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self._cancel_pool.shutdown(wait=False)
+
+async def run_until_disconnected(request: Request, coro, poll_interval: float = settings.DISCONNECT_POLL_INTERVAL):
+    """Await a handler coroutine, cancelling it if the HTTP client disconnects"""
+    task = asyncio.ensure_future(coro)
+    while True:
+        done, _ = await asyncio.wait({task}, timeout=poll_interval)
+        if done:
+            return task.result()
+        if await request.is_disconnected():
+            logger.info(f"Client disconnected from {request.url.path}, cancelling query")
+            task.cancel()
+            return JSONResponse(
+                status_code=499,
+                content={"success": False, "error": "Client disconnected"}
+            )
+
+db_executor = DatabaseExecutor()
@@ -0,0 +1,218 @@
+from collections import OrderedDict
+from typing import Dict, Any
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from app.core.config import settings
+from app.core.credential_cache import credential_cache
+from app.core.query_timeout import install_statement_timeout, statement_timeout_for
+from app.core.structured_logging import install_sql_logging
+import hashlib
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+def build_connection_url(connection) -> str:
+    """Build the SQLAlchemy URL for a stored user database connection"""
+    db_type = connection.db_type.lower()
+    if db_type == "mysql":
+        return (
+            f"mysql+mysqlconnector://{connection.username}:{connection.password}"
+            f"@{connection.host}:{connection.port}/{connection.database}"
+            "?charset=utf8mb4"
+            "&collation=utf8mb4_unicode_ci"
+            "&connection_timeout=30"
+        )
+    elif db_type == "postgresql":
+        return (
+            f"postgresql://{connection.username}:{connection.password}"
+            f"@{connection.host}:{connection.port}/{connection.database}"
+        )
+    elif db_type == "sqlite":
+        return f"sqlite:///{connection.database}"
+    raise ValueError(f"Unsupported database type: {connection.db_type}")
+
+def connection_fingerprint(connection) -> str:
+    """Fingerprint the credential-bearing fields of a connection.
+
+    Uses the stored ciphertext rather than the decrypted password, so a
+    fingerprint can be computed without touching the encryption key.
+    """
+    parts = [
+        connection.db_type,
+        connection.host,
+        connection.port,
+        connection.database,
+        connection.username,
+        connection._password,
+    ]
+    raw = "\x1f".join("" if part is None else str(part) for part in parts)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+class _RegistryEntry:
+    def __init__(self, engine: Engine, fingerprint: str):
+        self.engine = engine
+        self.fingerprint = fingerprint
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+class EngineRegistry:
+    """Process-wide cache of pooled engines, one per user database connection"""
+
+    def __init__(
+        self,
+        pool_size: int = settings.USER_DB_POOL_SIZE,
+        max_overflow: int = settings.USER_DB_MAX_OVERFLOW,
+        pool_recycle: int = settings.USER_DB_POOL_RECYCLE,
+        idle_timeout: int = settings.USER_DB_ENGINE_IDLE_TIMEOUT,
+        max_engines: int = settings.USER_DB_MAX_ENGINES
+    ):
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.pool_recycle = pool_recycle
+        self.idle_timeout = idle_timeout
+        self.max_engines = max_engines
+        self._entries: "OrderedDict[int, _RegistryEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "stale": 0,
+            "idle_evictions": 0,
+            "lru_evictions": 0,
+            "invalidations": 0
+        }
+
+    def get_engine(self, connection) -> Engine:
+        """Return a pooled engine for the connection, creating it on a miss"""
+        fingerprint = connection_fingerprint(connection)
+        to_dispose = []
+        with self._lock:
+            to_dispose.extend(self._sweep_idle_locked())
+            entry = self._entries.get(connection.id)
+            if entry is not None and entry.fingerprint == fingerprint:
+                entry.last_used = time.monotonic()
+                self._entries.move_to_end(connection.id)
+                self._stats["hits"] += 1
+                engine = entry.engine
+            else:
+                if entry is not None:
+                    # Credentials or target changed since the pool was built
+                    self._stats["stale"] += 1
+                    to_dispose.append(self._entries.pop(connection.id).engine)
+                self._stats["misses"] += 1
+                engine = self._create_engine(connection)
+                self._entries[connection.id] = _RegistryEntry(engine, fingerprint)
+                while len(self._entries) > self.max_engines:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._stats["lru_evictions"] += 1
+                    to_dispose.append(evicted.engine)
+
+        for old_engine in to_dispose:
+            old_engine.dispose()
+        return engine
+
+    def invalidate(self, connection_id: int) -> bool:
+        """Drop and dispose the engine for a connection that was edited or deleted"""
+        with self._lock:
+            entry = self._entries.pop(connection_id, None)
+            if entry is not None:
+                self._stats["invalidations"] += 1
+        credential_cache.invalidate(connection_id)
+        if entry is None:
+            return False
+        entry.engine.dispose()
+        logger.info(f"Invalidated engine pool for connection {connection_id}")
+        return True
+
+    def evict_idle(self) -> int:
+        """Dispose engines that have not been used within the idle timeout"""
+        with self._lock:
+            evicted = self._sweep_idle_locked(force=True)
+        for engine in evicted:
+            engine.dispose()
+        return len(evicted)
+
+    def dispose_all(self) -> None:
+        """Dispose every pooled engine, e.g. on application shutdown"""
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+        for entry in entries:
+            entry.engine.dispose()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and per-connection pool status"""
+        now = time.monotonic()
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else 0.0,
+                "engines": len(self._entries),
+                "max_engines": self.max_engines,
+                "pools": {
+                    connection_id: {
+                        "status": entry.engine.pool.status(),
+                        "idle_seconds": round(now - entry.last_used, 1)
+                    }
+                    for connection_id, entry in self._entries.items()
+                }
+            }
+
+    def _sweep_idle_locked(self, force: bool = False) -> list:
+        """Pop idle entries; callers must hold the lock and dispose the result"""
+        now = time.monotonic()
+        # Sweeping is O(n), so only do it periodically on the hot path
+        if not force and now - self._last_sweep < min(self.idle_timeout, 60):
+            return []
+        self._last_sweep = now
+        expired = [
+            connection_id
+            for connection_id, entry in self._entries.items()
+            if now - entry.last_used > self.idle_timeout
+        ]
+        for connection_id in expired:
+            self._stats["idle_evictions"] += 1
+        return [self._entries.pop(connection_id).engine for connection_id in expired]
+
+    def _create_engine(self, connection) -> Engine:
+        """Create a bounded pooled engine with per-session setup.
+
+        This is the only place the registry reads the decrypted password;
+        hits are matched on the ciphertext fingerprint.
+        """
+        db_type = connection.db_type.lower()
+        url = build_connection_url(connection)
+        if db_type == "sqlite":
+            engine = create_engine(url, pool_pre_ping=True)
+        else:
+            engine = create_engine(
+                url,
+                pool_size=self.pool_size,
+                max_overflow=self.max_overflow,
+                pool_recycle=self.pool_recycle,
+                pool_pre_ping=True
+            )
+
+        if db_type == "mysql":
+            @event.listens_for(engine, "connect")
+            def _set_session_options(dbapi_connection, connection_record):
+                # Runs once per physical connection instead of once per message.
+                # Idle server timeout must outlive pool_recycle or pooled
+                # connections get killed between checkouts.
+                cursor = dbapi_connection.cursor()
+                try:
+                    cursor.execute(f"SET SESSION wait_timeout={self.pool_recycle + 60}")
+                finally:
+                    cursor.close()
+
+        install_statement_timeout(engine, db_type, statement_timeout_for(connection.id))
+        install_sql_logging(engine, f"connection:{connection.id}")
+
+        logger.info(f"Created engine pool for connection {connection.id}")
+        return engine
+
+engine_registry = EngineRegistry()
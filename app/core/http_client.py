@@ -0,0 +1,133 @@
+from typing import Dict, Any, Optional
+from app.core.config import settings
+import aiohttp
+import asyncio
+import random
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUSES = {429, 503}
+
+class ModelClientError(Exception):
+    """Raised when a model endpoint returns a non-success response"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(f"API request failed with status {status}: {message}")
+        self.status = status
+
+class ModelHTTPClient:
+    """Shared keep-alive HTTP client for remote model inference calls"""
+
+    def __init__(
+        self,
+        max_connections: int = settings.LLM_MAX_CONNECTIONS,
+        keepalive_timeout: float = settings.LLM_KEEPALIVE_TIMEOUT,
+        request_timeout: float = settings.LLM_REQUEST_TIMEOUT,
+        connect_timeout: float = settings.LLM_CONNECT_TIMEOUT,
+        max_retries: int = settings.LLM_MAX_RETRIES,
+        retry_backoff: float = settings.LLM_RETRY_BACKOFF
+    ):
+        self.max_connections = max_connections
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout = aiohttp.ClientTimeout(total=request_timeout, connect=connect_timeout)
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._stats = {
+            "requests": 0,
+            "in_flight": 0,
+            "retries": 0,
+            "errors": 0,
+            "connections_created": 0,
+            "connection_setup_seconds": 0.0,
+            "generation_seconds": 0.0
+        }
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Create the session on first use, inside the running event loop"""
+        if self._session is None or self._session.closed:
+            trace_config = aiohttp.TraceConfig()
+            trace_config.on_connection_create_start.append(self._on_connection_create_start)
+            trace_config.on_connection_create_end.append(self._on_connection_create_end)
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self.max_connections,
+                    keepalive_timeout=self.keepalive_timeout,
+                    ttl_dns_cache=300
+                ),
+                timeout=self.timeout,
+                trace_configs=[trace_config]
+            )
+        return self._session
+
+    async def _on_connection_create_start(self, session, trace_config_ctx, params) -> None:
+        trace_config_ctx.connect_started = time.perf_counter()
+
+    async def _on_connection_create_end(self, session, trace_config_ctx, params) -> None:
+        elapsed = time.perf_counter() - trace_config_ctx.connect_started
+        trace_config_ctx.trace_request_ctx["connect_seconds"] += elapsed
+        self._stats["connections_created"] += 1
+
+    def _retry_delay(self, attempt: int, retry_after: Optional[str]) -> float:
+        """Exponential backoff with full jitter, honouring Retry-After when given"""
+        if retry_after:
+            try:
+                return min(float(retry_after), self.timeout.total)
+            except ValueError:
+                pass
+        return random.uniform(0, self.retry_backoff * (2 ** attempt))
+
+    async def post_json(self, url: str, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> Any:
+        """POST a JSON payload and return the decoded JSON response.
+
+        Retries 429 and 503 responses and raises ModelClientError for any
+        other non-200 status or when retries are exhausted.
+        """
+        session = self._get_session()
+        self._stats["requests"] += 1
+        self._stats["in_flight"] += 1
+        try:
+            for attempt in range(self.max_retries + 1):
+                timing = {"connect_seconds": 0.0}
+                started = time.perf_counter()
+                async with session.post(url, json=payload, headers=headers, trace_request_ctx=timing) as response:
+                    if response.status == 200:
+                        body = await response.json()
+                        elapsed = time.perf_counter() - started
+                        self._stats["connection_setup_seconds"] += timing["connect_seconds"]
+                        self._stats["generation_seconds"] += elapsed - timing["connect_seconds"]
+                        return body
+
+                    message = await response.text()
+                    self._stats["connection_setup_seconds"] += timing["connect_seconds"]
+                    if response.status not in RETRYABLE_STATUSES or attempt == self.max_retries:
+                        self._stats["errors"] += 1
+                        raise ModelClientError(response.status, message)
+                    delay = self._retry_delay(attempt, response.headers.get("Retry-After"))
+
+                self._stats["retries"] += 1
+                logger.warning(f"Model endpoint returned {response.status}, retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            self._stats["errors"] += 1
+            raise
+        finally:
+            self._stats["in_flight"] -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Return request counters and connection-setup versus generation time"""
+        return {
+            **self._stats,
+            "connection_setup_seconds": round(self._stats["connection_setup_seconds"], 4),
+            "generation_seconds": round(self._stats["generation_seconds"], 4)
+        }
+
+    async def close(self) -> None:
+        """Close the session and its pooled connections"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+model_client = ModelHTTPClient()
@@ -1,27 +1,85 @@
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import HTTPConnection
+from starlette.types import ASGIApp, Receive, Scope, Send
 from app.services.auth import AuthService
-from app.core.database import get_db
-
-class AuthMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        request.scope["user"] = None
-        
-        # Get token from cookie
-        token = request.cookies.get("access_token")
-        if token and token.startswith("Bearer "):
-            try:
-                # Get database session
-                db = next(get_db())
-                
-                # Get user from token
-                auth_service = AuthService(db)
-                user = auth_service.get_current_user(token.split(" ")[1])
-                
-                # Set user in request scope
-                request.scope["user"] = user
-            except Exception:
-                pass
-        
-        response = await call_next(request)
-        return response 
\ No newline at end of file
+from app.core.database import SessionLocal
+from app.core.structured_logging import request_id_var
+import re
+import uuid
+
+# Paths that never need the current user; no token or database work is done
+PUBLIC_PATH_PREFIXES = ("/static", "/login", "/signup", "/api/auth/login", "/api/auth/signup")
+
+# Accept caller-supplied correlation ids only if they are short and log-safe
+REQUEST_ID_PATTERN = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+def resolve_scope_user(scope: Scope):
+    """Return the user for the request's access_token cookie, or None"""
+    token = HTTPConnection(scope).cookies.get("access_token")
+    if not token or not token.startswith("Bearer "):
+        return None
+
+    # Sessions only connect on first use, so cache hits cost no round trip
+    db = SessionLocal()
+    try:
+        return AuthService(db).get_current_user(token.split(" ")[1])
+    except Exception:
+        return None
+    finally:
+        db.close()
+
+class AuthMiddleware:
+    """Resolves the user from the access_token cookie into the request scope.
+
+    A plain ASGI middleware: unlike BaseHTTPMiddleware it adds no extra
+    task or memory stream per request, so streaming responses pass
+    straight through.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        user = None
+        if not scope["path"].startswith(PUBLIC_PATH_PREFIXES):
+            user = resolve_scope_user(scope)
+
+        scope["user"] = user
+        # Resolved once here; dependencies read it instead of reloading
+        scope.setdefault("state", {})["user"] = user
+        await self.app(scope, receive, send)
+
+class RequestIdMiddleware:
+    """Assigns each request a correlation id for logs and the X-Request-ID header.
+
+    An incoming X-Request-ID is reused when it looks safe, so ids can be
+    followed across a proxy or load balancer.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = HTTPConnection(scope).headers.get("x-request-id", "")
+        if not REQUEST_ID_PATTERN.match(request_id):
+            request_id = uuid.uuid4().hex
+        scope.setdefault("state", {})["request_id"] = request_id
+        token = request_id_var.set(request_id)
+
+        async def send_with_request_id(message) -> None:
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"x-request-id", request_id.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            request_id_var.reset(token)
@@ -0,0 +1,158 @@
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, Optional
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from app.core.config import settings
+from app.core.query_timeout import QueryCanceller, install_statement_timeout, is_timeout_error
+from app.core.structured_logging import install_sql_logging
+from app.services.sql_utils import apply_row_limit
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+class QueryFormPool:
+    """Shared connection pool for the /query web form.
+
+    Separate from the application engine so a burst of demo queries can't
+    starve logins and page loads, and connected through its own URL so the
+    generated SQL never runs with the application's credentials. Queries get
+    the same server-side timeout and row cap as the chat path.
+    """
+
+    def __init__(
+        self,
+        database_url: Optional[str] = settings.QUERY_FORM_DATABASE_URL,
+        pool_size: int = settings.QUERY_FORM_POOL_SIZE,
+        max_overflow: int = settings.QUERY_FORM_MAX_OVERFLOW,
+        pool_timeout: float = settings.QUERY_FORM_POOL_TIMEOUT
+    ):
+        self.database_url = database_url
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.pool_timeout = pool_timeout
+        self._engine: Optional[Engine] = None
+        self._lock = threading.Lock()
+        self._stats = {
+            "checkouts": 0,
+            "checkout_wait_ms_total": 0.0,
+            "checkout_wait_ms_max": 0.0,
+            "checkout_timeouts": 0,
+            "queries": 0,
+            "truncated": 0
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.database_url)
+
+    @property
+    def engine(self) -> Engine:
+        if self._engine is None:
+            with self._lock:
+                if self._engine is None:
+                    engine = create_engine(
+                        self.database_url,
+                        pool_size=self.pool_size,
+                        max_overflow=self.max_overflow,
+                        pool_timeout=self.pool_timeout,
+                        pool_recycle=settings.USER_DB_POOL_RECYCLE,
+                        pool_pre_ping=True
+                    )
+                    install_statement_timeout(engine, engine.dialect.name, settings.QUERY_TIMEOUT_SECONDS)
+                    install_sql_logging(engine, "query-form")
+                    self._engine = engine
+        return self._engine
+
+    @contextmanager
+    def connect(self) -> Iterator[Connection]:
+        """Check out a pooled connection, recording how long the wait was"""
+        started = time.perf_counter()
+        try:
+            conn = self.engine.connect()
+        except PoolTimeoutError:
+            with self._lock:
+                self._stats["checkout_timeouts"] += 1
+            raise
+        waited_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self._stats["checkouts"] += 1
+            self._stats["checkout_wait_ms_total"] += waited_ms
+            self._stats["checkout_wait_ms_max"] = max(self._stats["checkout_wait_ms_max"], waited_ms)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def canceller(self) -> QueryCanceller:
+        return QueryCanceller(self.engine, self.engine.dialect.name)
+
+    def execute(self, sql_query: str, canceller: Optional[QueryCanceller] = None, max_rows: int = settings.CHAT_MAX_ROWS) -> Dict[str, Any]:
+        """Execute SQL and return results with execution time (blocking)"""
+        start_time = time.time()
+        canceller = canceller or self.canceller()
+        try:
+            with self.connect() as conn, canceller.attached(conn):
+                # One extra row tells us whether the result was cut off
+                result_set = conn.execution_options(stream_results=True).execute(
+                    text(apply_row_limit(sql_query, max_rows + 1))
+                )
+                columns = [str(col) for col in result_set.keys()]
+                results = []
+                while len(results) < max_rows:
+                    chunk = result_set.fetchmany(min(settings.CHAT_FETCH_SIZE, max_rows - len(results)))
+                    if not chunk:
+                        break
+                    results.extend(dict(row._mapping) for row in chunk)
+                truncated = len(results) >= max_rows and result_set.fetchone() is not None
+                result_set.close()
+
+            with self._lock:
+                self._stats["queries"] += 1
+                self._stats["truncated"] += int(truncated)
+            return {
+                "status": "success",
+                "columns": columns,
+                "results": results,
+                "truncated": truncated,
+                "execution_time": round((time.time() - start_time) * 1000, 2),
+                "error": None
+            }
+        except PoolTimeoutError:
+            logger.warning("Query form pool exhausted")
+            error = "Too many queries are running right now. Please try again in a moment."
+        except Exception as e:
+            logger.error(f"Database error: {str(e)}")
+            error = "Query timed out" if is_timeout_error(e) else f"Database error: {str(e)}"
+        return {
+            "status": "error",
+            "columns": [],
+            "results": [],
+            "truncated": False,
+            "execution_time": round((time.time() - start_time) * 1000, 2),
+            "error": error
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        checkouts = stats["checkouts"]
+        stats["checkout_wait_ms_avg"] = round(stats.pop("checkout_wait_ms_total") / checkouts, 2) if checkouts else 0.0
+        stats["checkout_wait_ms_max"] = round(stats["checkout_wait_ms_max"], 2)
+        stats["pool_size"] = self.pool_size
+        stats["max_overflow"] = self.max_overflow
+        if self._engine is not None:
+            pool = self._engine.pool
+            stats["checked_out"] = pool.checkedout()
+            stats["idle"] = pool.checkedin()
+        return stats
+
+    def dispose(self) -> None:
+        with self._lock:
+            if self._engine is not None:
+                self._engine.dispose()
+                self._engine = None
+
+query_form_pool = QueryFormPool()
@@ -0,0 +1,135 @@
+from contextlib import contextmanager
+from typing import Iterator, Optional
+from sqlalchemy import event, text
+from sqlalchemy.engine import Connection, Engine
+from app.core.config import settings
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# SQLite virtual machine instructions between deadline checks
+SQLITE_PROGRESS_STEPS = 10000
+
+class QueryCancelledError(Exception):
+    """Raised when a statement is started after its request was cancelled"""
+
+def statement_timeout_for(connection_id: Optional[int]) -> float:
+    """Return the execution deadline in seconds for a connection; 0 disables it"""
+    return settings.QUERY_TIMEOUT_CONNECTION_OVERRIDES.get(connection_id, settings.QUERY_TIMEOUT_SECONDS)
+
+def install_statement_timeout(engine: Engine, db_type: str, timeout: float) -> None:
+    """Make the database itself abort statements that run longer than timeout.
+
+    MySQL uses MAX_EXECUTION_TIME (read-only SELECTs only), PostgreSQL uses
+    statement_timeout and SQLite interrupts from a progress handler.
+    """
+    if timeout <= 0:
+        return
+    db_type = db_type.lower()
+    timeout_ms = int(timeout * 1000)
+
+    if db_type in ("mysql", "postgresql"):
+        statement = (
+            f"SET SESSION MAX_EXECUTION_TIME={timeout_ms}"
+            if db_type == "mysql"
+            else f"SET statement_timeout = {timeout_ms}"
+        )
+
+        @event.listens_for(engine, "connect")
+        def _set_statement_timeout(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            try:
+                cursor.execute(statement)
+                dbapi_connection.commit()
+            except Exception as e:
+                # e.g. MariaDB has no MAX_EXECUTION_TIME; cancellation still works
+                logger.warning(f"Could not set statement timeout: {str(e)}")
+            finally:
+                cursor.close()
+
+    elif db_type == "sqlite":
+        @event.listens_for(engine, "connect")
+        def _install_progress_handler(dbapi_connection, connection_record):
+            info = connection_record.info
+
+            def _past_deadline() -> int:
+                deadline = info.get("statement_deadline")
+                return 1 if deadline is not None and time.monotonic() > deadline else 0
+
+            dbapi_connection.set_progress_handler(_past_deadline, SQLITE_PROGRESS_STEPS)
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def _start_deadline(conn, cursor, statement, parameters, context, executemany):
+            conn.info["statement_deadline"] = time.monotonic() + timeout
+
+        @event.listens_for(engine, "checkin")
+        def _clear_deadline(dbapi_connection, connection_record):
+            # Pool pings bypass before_cursor_execute, so never leave a stale deadline
+            connection_record.info.pop("statement_deadline", None)
+
+def is_timeout_error(error: Exception) -> bool:
+    """Check whether a driver error means the statement hit its deadline or was killed"""
+    orig = getattr(error, "orig", error)
+    if getattr(orig, "errno", None) in (3024, 1317):  # MySQL: timeout exceeded, interrupted
+        return True
+    if getattr(orig, "pgcode", None) == "57014":  # PostgreSQL: query_canceled
+        return True
+    return "interrupted" in str(orig).lower()
+
+class QueryCanceller:
+    """Kills the statement running on one checked-out connection from another thread.
+
+    The worker thread attaches the connection before executing and detaches
+    it before returning it to the pool; ``cancel`` holds the same lock, so a
+    kill can never land on a connection that was handed to another query.
+    """
+
+    def __init__(self, engine: Engine, db_type: str):
+        self._engine = engine
+        self._db_type = db_type.lower()
+        self._lock = threading.Lock()
+        self._dbapi_connection = None
+        self._server_id: Optional[int] = None
+        self.cancelled = False
+
+    def attach(self, conn: Connection) -> None:
+        """Record the connection a statement is about to run on"""
+        dbapi_connection = conn.connection.dbapi_connection
+        with self._lock:
+            if self.cancelled:
+                raise QueryCancelledError("Query was cancelled before it started")
+            self._dbapi_connection = dbapi_connection
+            if self._db_type == "mysql":
+                self._server_id = dbapi_connection.connection_id
+
+    def detach(self) -> None:
+        with self._lock:
+            self._dbapi_connection = None
+            self._server_id = None
+
+    @contextmanager
+    def attached(self, conn: Connection) -> Iterator[Connection]:
+        """Attach for the duration of a block that must end before conn is released"""
+        self.attach(conn)
+        try:
+            yield conn
+        finally:
+            self.detach()
+
+    def cancel(self) -> None:
+        """Abort the running statement on the server, if one is attached"""
+        with self._lock:
+            self.cancelled = True
+            if self._dbapi_connection is None:
+                return
+            if self._db_type == "mysql":
+                # The busy session cannot kill itself; use another pooled connection
+                with self._engine.connect() as conn:
+                    conn.execute(text(f"KILL QUERY {int(self._server_id)}"))
+            elif self._db_type == "postgresql":
+                self._dbapi_connection.cancel()
+            elif self._db_type == "sqlite":
+                self._dbapi_connection.interrupt()
+            logger.info("Cancelled running query on the database server")
@@ -0,0 +1,177 @@
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+from app.core.config import settings
+import sqlite3
+import threading
+import time
+import zlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+# (window_start, count in that window, count in the window before it)
+WindowCounts = Tuple[int, int, int]
+
+def _roll(counts: Optional[WindowCounts], window_start: int, window: int) -> WindowCounts:
+    """Shift stored counts forward so they are relative to window_start"""
+    if counts is None:
+        return window_start, 0, 0
+    start, current, previous = counts
+    if start == window_start:
+        return counts
+    if start == window_start - window:
+        return window_start, 0, current
+    return window_start, 0, 0
+
+class InMemoryRateLimitBackend:
+    """Per-process counters split across independently locked shards.
+
+    Each key holds three integers and each shard keeps at most
+    ``max_keys / shards`` keys, dropping the least recently used, so
+    memory stays bounded however many addresses an attacker rotates.
+    """
+
+    blocking = False
+
+    def __init__(self, shards: int = settings.LOGIN_RATE_LIMIT_SHARDS, max_keys: int = settings.LOGIN_RATE_LIMIT_MAX_KEYS):
+        self._shards = [(threading.Lock(), OrderedDict()) for _ in range(shards)]
+        self._max_keys_per_shard = max(1, max_keys // shards)
+
+    def _shard(self, key: str):
+        return self._shards[zlib.crc32(key.encode()) % len(self._shards)]
+
+    def increment(self, key: str, window_start: int, window: int) -> None:
+        lock, counters = self._shard(key)
+        with lock:
+            start, current, previous = _roll(counters.get(key), window_start, window)
+            counters[key] = (start, current + 1, previous)
+            counters.move_to_end(key)
+            if len(counters) > self._max_keys_per_shard:
+                counters.popitem(last=False)
+
+    def get(self, key: str, window_start: int, window: int) -> WindowCounts:
+        lock, counters = self._shard(key)
+        with lock:
+            return _roll(counters.get(key), window_start, window)
+
+    def reset(self, key: str) -> None:
+        lock, counters = self._shard(key)
+        with lock:
+            counters.pop(key, None)
+
+    def size(self) -> int:
+        return sum(len(counters) for _, counters in self._shards)
+
+class SQLiteRateLimitBackend:
+    """Counters in a local SQLite file so every uvicorn worker on a host shares them.
+
+    Each increment is one UPSERT that rolls the window in SQL, so
+    concurrent workers never lose updates. Stale keys are pruned
+    periodically.
+    """
+
+    PRUNE_EVERY = 1000  # increments between stale-row cleanups
+    blocking = True  # file I/O; async callers run it off the event loop
+
+    def __init__(self, path: str = settings.LOGIN_RATE_LIMIT_SQLITE_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._increments = 0
+        conn = self._connection()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS login_rate_limits ("
+            "key TEXT PRIMARY KEY, window_start INTEGER NOT NULL, "
+            "current INTEGER NOT NULL, previous INTEGER NOT NULL)"
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def increment(self, key: str, window_start: int, window: int) -> None:
+        conn = self._connection()
+        # Every right-hand side sees the old row, so the roll and the increment are atomic
+        conn.execute(
+            "INSERT INTO login_rate_limits (key, window_start, current, previous) VALUES (?, ?, 1, 0) "
+            "ON CONFLICT(key) DO UPDATE SET "
+            "previous = CASE WHEN window_start = excluded.window_start THEN previous "
+            "WHEN window_start = excluded.window_start - ? THEN current ELSE 0 END, "
+            "current = CASE WHEN window_start = excluded.window_start THEN current + 1 ELSE 1 END, "
+            "window_start = excluded.window_start",
+            (key, window_start, window)
+        )
+        self._increments += 1
+        if self._increments % self.PRUNE_EVERY == 0:
+            conn.execute("DELETE FROM login_rate_limits WHERE window_start < ?", (window_start - window,))
+
+    def get(self, key: str, window_start: int, window: int) -> WindowCounts:
+        row = self._connection().execute(
+            "SELECT window_start, current, previous FROM login_rate_limits WHERE key = ?", (key,)
+        ).fetchone()
+        return _roll(row, window_start, window)
+
+    def reset(self, key: str) -> None:
+        self._connection().execute("DELETE FROM login_rate_limits WHERE key = ?", (key,))
+
+    def size(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM login_rate_limits").fetchone()[0]
+
+class LoginRateLimiter:
+    """Sliding-window limit on failed logins per key (client IP).
+
+    Uses the two-window approximation: the previous window's count is
+    weighted by how much of it still overlaps the sliding window. Checks
+    and updates are O(1) and never scan a history of attempts.
+    """
+
+    def __init__(self, backend, max_attempts: int = settings.LOGIN_MAX_ATTEMPTS, window: int = settings.LOGIN_ATTEMPT_WINDOW):
+        self.backend = backend
+        self.max_attempts = max_attempts
+        self.window = window
+        self._stats = {"checks": 0, "limited": 0, "failures_recorded": 0}
+
+    def _estimate(self, counts: WindowCounts, now: float) -> float:
+        start, current, previous = counts
+        overlap = 1 - (now - start) / self.window
+        return current + previous * max(overlap, 0.0)
+
+    def is_limited(self, key: str) -> bool:
+        now = time.time()
+        window_start = int(now // self.window * self.window)
+        self._stats["checks"] += 1
+        limited = self._estimate(self.backend.get(key, window_start, self.window), now) >= self.max_attempts
+        if limited:
+            self._stats["limited"] += 1
+        return limited
+
+    def record_failure(self, key: str) -> None:
+        now = time.time()
+        window_start = int(now // self.window * self.window)
+        self.backend.increment(key, window_start, self.window)
+        self._stats["failures_recorded"] += 1
+
+    def reset(self, key: str) -> None:
+        self.backend.reset(key)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._stats,
+            "backend": type(self.backend).__name__,
+            "keys": self.backend.size(),
+            "max_attempts": self.max_attempts,
+            "window": self.window
+        }
+
+def create_rate_limit_backend(name: str = settings.LOGIN_RATE_LIMIT_BACKEND):
+    if name == "sqlite":
+        return SQLiteRateLimitBackend()
+    if name != "memory":
+        logger.warning(f"Unknown rate limit backend '{name}', using memory")
+    return InMemoryRateLimitBackend()
+
+login_rate_limiter = LoginRateLimiter(create_rate_limit_backend())
@@ -0,0 +1,31 @@
+from decimal import Decimal
+from typing import Any
+from fastapi.responses import JSONResponse
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def _default(value: Any) -> Any:
+    """Fallback for types the encoders don't know (Decimal, dates for stdlib json, ...)"""
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+def dumps(content: Any) -> bytes:
+    """Compact JSON bytes, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse that skips FastAPI's jsonable_encoder pass and renders with ``dumps``.
+
+    Content must already be made of JSON-compatible values (plus Decimal,
+    date and datetime, which are converted during encoding).
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
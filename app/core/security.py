@@ -1,11 +1,14 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Dict, Optional, Tuple
 from passlib.context import CryptContext
 from jose import jwt
 from app.core.config import settings
+import asyncio
+import time
 
 # Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
@@ -15,6 +18,106 @@ def get_password_hash(password: str) -> str:
     """Hash a password"""
     return pwd_context.hash(password)
 
+def needs_rehash(hashed_password: str) -> bool:
+    """Check whether a hash was made with a different scheme or bcrypt cost"""
+    if pwd_context.needs_update(hashed_password):
+        return True
+    try:
+        # bcrypt hashes look like $2b$<cost>$<salt+digest>
+        return int(hashed_password.split("$")[2]) != settings.BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+def _verify_and_rehash(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    if not verify_password(plain_password, hashed_password):
+        return False, None
+    if needs_rehash(hashed_password):
+        return True, get_password_hash(plain_password)
+    return True, None
+
+class PasswordHasherBusy(Exception):
+    """Raised when too many hash operations are already queued"""
+
+class PasswordHasher:
+    """Runs bcrypt on a small dedicated thread pool instead of the event loop.
+
+    At most ``max_workers`` hashes run at once and ``max_queue`` more may
+    wait; beyond that callers get PasswordHasherBusy straight away rather
+    than piling up behind a login burst.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = settings.PASSWORD_HASH_WORKERS,
+        max_queue: int = settings.PASSWORD_HASH_MAX_QUEUE
+    ):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bcrypt")
+        self._depth = 0  # running + queued; only touched on the event loop
+        self._stats = {
+            "hashes": 0,
+            "verifies": 0,
+            "rehashes": 0,
+            "rejected": 0,
+            "queue_seconds": 0.0,
+            "compute_seconds": 0.0,
+            "max_compute_seconds": 0.0
+        }
+
+    async def _run(self, func, *args) -> Any:
+        if self._depth >= self.max_workers + self.max_queue:
+            self._stats["rejected"] += 1
+            raise PasswordHasherBusy("Too many password operations in progress")
+
+        def timed():
+            started = time.perf_counter()
+            return func(*args), started, time.perf_counter()
+
+        self._depth += 1
+        submitted = time.perf_counter()
+        try:
+            result, started, finished = await asyncio.get_running_loop().run_in_executor(self._pool, timed)
+        finally:
+            self._depth -= 1
+        self._stats["queue_seconds"] += started - submitted
+        self._stats["compute_seconds"] += finished - started
+        self._stats["max_compute_seconds"] = max(self._stats["max_compute_seconds"], finished - started)
+        return result
+
+    async def hash(self, password: str) -> str:
+        """Hash a password with the configured cost"""
+        self._stats["hashes"] += 1
+        return await self._run(get_password_hash, password)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """Verify a password; also return a new hash if the stored one is outdated"""
+        self._stats["verifies"] += 1
+        valid, new_hash = await self._run(_verify_and_rehash, password, hashed_password)
+        if new_hash:
+            self._stats["rehashes"] += 1
+        return valid, new_hash
+
+    def stats(self) -> Dict[str, Any]:
+        """Return counters and average/max latency in milliseconds"""
+        operations = self._stats["hashes"] + self._stats["verifies"] - self._stats["rejected"]
+        return {
+            "hashes": self._stats["hashes"],
+            "verifies": self._stats["verifies"],
+            "rehashes": self._stats["rehashes"],
+            "rejected": self._stats["rejected"],
+            "in_progress": self._depth,
+            "bcrypt_rounds": settings.BCRYPT_ROUNDS,
+            "avg_queue_ms": round(self._stats["queue_seconds"] * 1000 / operations, 2) if operations else 0.0,
+            "avg_compute_ms": round(self._stats["compute_seconds"] * 1000 / operations, 2) if operations else 0.0,
+            "max_compute_ms": round(self._stats["max_compute_seconds"] * 1000, 2)
+        }
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+password_hasher = PasswordHasher()
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token"""
     to_encode = data.copy()
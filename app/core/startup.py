@@ -0,0 +1,34 @@
+from typing import Dict, Any
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+class StartupTimer:
+    """Records how long each phase of worker startup took.
+
+    Import this module first so the clock starts before the heavy imports.
+    """
+
+    def __init__(self):
+        self._started = time.perf_counter()
+        self._last = self._started
+        self._phases: Dict[str, float] = {}
+
+    def mark(self, phase: str) -> None:
+        """Close the current phase under the given name"""
+        now = time.perf_counter()
+        self._phases[phase] = round((now - self._last) * 1000, 1)
+        self._last = now
+
+    def report(self) -> None:
+        breakdown = ", ".join(f"{phase}={ms}ms" for phase, ms in self._phases.items())
+        logger.info(f"Worker ready in {self.stats()['total_ms']}ms ({breakdown})")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "phases_ms": dict(self._phases),
+            "total_ms": round((self._last - self._started) * 1000, 1)
+        }
+
+startup_timer = StartupTimer()
@@ -0,0 +1,186 @@
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Any, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.core.config import settings
+import json
+import logging
+import queue
+import random
+import sys
+import time
+
+# Correlation id of the request being served, set by RequestIdMiddleware
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+# Loggers for bulky payloads; levels and sampling are configured per category
+CATEGORY_PREFIX = "app"
+CATEGORIES = ("sql", "prompt", "model")
+
+def category_logger(category: str) -> logging.Logger:
+    """Logger for a payload category, e.g. ``category_logger("sql")``"""
+    return logging.getLogger(f"{CATEGORY_PREFIX}.{category}")
+
+class ContextFilter(logging.Filter):
+    """Stamps records with the request id while still on the calling thread"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+class SamplingFilter(logging.Filter):
+    """Keeps a fraction of DEBUG/INFO records per category; warnings always pass"""
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = {f"{CATEGORY_PREFIX}.{category}": rate for category, rate in rates.items()}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rates.get(record.name)
+        return rate is None or random.random() < rate
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; ``extra={"fields": {...}}`` adds structured keys"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage()
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            entry["request_id"] = request_id
+        fields = getattr(record, "fields", None)
+        if fields:
+            entry.update(fields)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+class TextFormatter(logging.Formatter):
+    """The previous human-readable format, plus request id and fields"""
+
+    def __init__(self):
+        super().__init__('%(asctime)s - %(levelname)s - %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            line = f"{line} [{request_id}]"
+        fields = getattr(record, "fields", None)
+        if fields:
+            line += "".join(f"\n  {key}: {value}" for key, value in fields.items())
+        return line
+
+def install_sql_logging(engine: Engine, source: str) -> None:
+    """Log each statement with its duration to the "sql" category.
+
+    Statement text is only captured when the category is enabled, so the
+    default WARNING level costs one level check per statement.
+    """
+    sql_logger = category_logger("sql")
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start_timer(conn, cursor, statement, parameters, context, executemany):
+        if sql_logger.isEnabledFor(logging.DEBUG):
+            conn.info["sql_log_started"] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _log_statement(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.pop("sql_log_started", None)
+        if started is None:
+            return
+        sql_logger.debug("SQL executed", extra={"fields": {
+            "source": source,
+            "statement": statement,
+            "duration_ms": round((time.perf_counter() - started) * 1000, 2)
+        }})
+
+class _BoundedQueueHandler(QueueHandler):
+    """Never blocks the caller: records are dropped when the writer falls behind"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Render the message and traceback here; fields stay structured
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[_BoundedQueueHandler] = None
+
+def configure_logging() -> None:
+    """Route all records through a queue to a single writer thread.
+
+    Request paths only pay for filtering and an enqueue; formatting and
+    the stream write happen on the listener thread.
+    """
+    global _listener, _queue_handler
+    if _listener is not None:
+        return
+
+    stream_handler = logging.StreamHandler(sys.stderr)
+    stream_handler.setFormatter(JsonFormatter() if settings.LOG_FORMAT == "json" else TextFormatter())
+
+    log_queue: queue.Queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+    _queue_handler = _BoundedQueueHandler(log_queue)
+    _queue_handler.addFilter(ContextFilter())
+    _queue_handler.addFilter(SamplingFilter(settings.LOG_SAMPLE_RATES))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_queue_handler)
+    root.setLevel(settings.LOG_LEVEL.upper())
+
+    for category in CATEGORIES:
+        level = settings.LOG_CATEGORY_LEVELS.get(category, "WARNING")
+        category_logger(category).setLevel(level.upper())
+
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+
+def stop_logging() -> None:
+    """Drain queued records and stop the writer thread (on shutdown).
+
+    The root logger then writes straight to the listener's handlers, so
+    records logged after shutdown are not left in a queue nobody reads.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        root = logging.getLogger()
+        root.removeHandler(_queue_handler)
+        for handler in _listener.handlers:
+            for log_filter in _queue_handler.filters:
+                handler.addFilter(log_filter)
+            root.addHandler(handler)
+        _listener = None
+
+def stats() -> Dict[str, Any]:
+    return {
+        "queued": _queue_handler.queue.qsize() if _queue_handler else 0,
+        "dropped": _queue_handler.dropped if _queue_handler else 0,
+        "category_levels": {
+            category: logging.getLevelName(category_logger(category).getEffectiveLevel())
+            for category in CATEGORIES
+        }
+    }
@@ -0,0 +1,86 @@
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+from app.core.config import settings
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+class CachedUser:
+    """Session-independent snapshot of the fields request handlers read from a user"""
+
+    def __init__(self, user):
+        self.id = user.id
+        self.email = user.email
+        self.first_name = user.first_name
+        self.last_name = user.last_name
+        self.created_at = user.created_at
+
+    @property
+    def full_name(self) -> str:
+        return f"{self.first_name} {self.last_name}".strip()
+
+    def __repr__(self):
+        return f"<User {self.email}>"
+
+class UserCache:
+    """Per-process cache of authenticated users keyed by JWT subject and expiry.
+
+    Entries live for a short TTL and never beyond the token's own expiry.
+    Password changes must call ``invalidate_user``.
+    """
+
+    def __init__(self, ttl: int = settings.USER_CACHE_TTL, max_entries: int = settings.USER_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, Any], Tuple[CachedUser, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "invalidations": 0
+        }
+
+    def get(self, subject: Any, token_exp: Any) -> Optional[CachedUser]:
+        key = (str(subject), token_exp)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None and cached[1] > time.monotonic():
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return cached[0]
+            if cached is not None:
+                del self._entries[key]
+            self._stats["misses"] += 1
+            return None
+
+    def put(self, subject: Any, token_exp: Any, user) -> CachedUser:
+        """Snapshot a loaded user and cache it; returns the snapshot"""
+        snapshot = CachedUser(user)
+        ttl = self.ttl
+        if isinstance(token_exp, (int, float)):
+            ttl = min(ttl, token_exp - time.time())
+        if ttl <= 0:
+            return snapshot
+        with self._lock:
+            self._entries[(str(subject), token_exp)] = (snapshot, time.monotonic() + ttl)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return snapshot
+
+    def invalidate_user(self, user_id: Any) -> int:
+        """Drop every cached token entry for a user, e.g. after a password reset"""
+        subject = str(user_id)
+        with self._lock:
+            keys = [key for key in self._entries if key[0] == subject]
+            for key in keys:
+                del self._entries[key]
+            self._stats["invalidations"] += len(keys)
+        return len(keys)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, "entries": len(self._entries), "ttl": self.ttl}
+
+user_cache = UserCache()
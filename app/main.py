@@ -1,20 +1,29 @@
+from app.core.startup import startup_timer
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from app.routers import database, query, schema, auth, connections, dashboard, chat
+from app.routers import database, query, schema, auth, connections, dashboard, chat, metrics
 from app.core.config import settings
-from app.core.database import init_db
-from app.core.middleware import AuthMiddleware
+from app.core.database import warm_engine, dispose_engine
+from app.core.middleware import AuthMiddleware, RequestIdMiddleware
+from app.core.structured_logging import configure_logging, stop_logging
 from app.core.dependencies import get_templates, templates
+from app.core.engine_registry import engine_registry
+from app.core.db_executor import db_executor
+from app.core.query_form_pool import query_form_pool
+from app.core.activity import activity_tracker
+from app.core.security import password_hasher
+from app.core.http_client import model_client
+from app.services.model_backends import model_router
+from contextlib import asynccontextmanager
+import asyncio
 import logging
 import os
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
-)
+startup_timer.mark("imports")
+
+# Configure logging: records are written by a background thread
+configure_logging()
 
 # Configure SQLAlchemy logging
 sqlalchemy_loggers = [
@@ -36,10 +45,37 @@ logging.getLogger('uvicorn.error').setLevel(logging.WARNING)
 # Keep our application logging at INFO level
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Manage process-wide clients and pools"""
+    activity_tracker.start()
+    warm_task = None
+    if settings.DB_WARM_POOL_ON_STARTUP:
+        # Don't block readiness on the database; a cold pool only slows the first request
+        warm_task = asyncio.get_running_loop().run_in_executor(None, warm_engine)
+    startup_timer.mark("lifespan")
+    startup_timer.report()
+    yield
+    if warm_task is not None:
+        await warm_task
+    # Write pending last_active timestamps before the process exits
+    await activity_tracker.stop()
+    # Close keep-alive model connections and pooled user database connections
+    await model_client.close()
+    model_router.close()
+    db_executor.shutdown()
+    password_hasher.shutdown()
+    engine_registry.dispose_all()
+    query_form_pool.dispose()
+    dispose_engine()
+    # Flush queued log records last so shutdown messages are kept
+    stop_logging()
+
 app = FastAPI(
     title="AI SQL Chatbot",
     description="Natural Language to SQL Query Converter",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -54,6 +90,9 @@ app.add_middleware(
 # Auth middleware
 app.add_middleware(AuthMiddleware)
 
+# Correlation ids (outermost, so every log line of a request carries one)
+app.add_middleware(RequestIdMiddleware)
+
 # Create static directory structure
 static_dirs = ["css", "js", "images"]
 for dir_name in static_dirs:
@@ -62,11 +101,6 @@ for dir_name in static_dirs:
 # Static files
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
 
-# Initialize database
-logger.info("Initializing database...")
-init_db()
-logger.info("Database initialized successfully!")
-
 # Include routers
 app.include_router(auth.web_router)  # Web routes at root
 app.include_router(auth.api_router)  # API routes at /api/auth
@@ -76,6 +110,9 @@ app.include_router(query.web_router)  # Query web interface at /query
 app.include_router(query.api_router)  # Query API at /api/query
 app.include_router(schema.router, prefix="/api", tags=["schema"])  # Schema API
 app.include_router(chat.router)  # Chat interface
+app.include_router(metrics.router)  # Runtime metrics
+
+startup_timer.mark("app_setup")
 
 # Root route
 @app.get("/")
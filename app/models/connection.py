@@ -1,7 +1,9 @@
 from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Text
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
-from app.core.database import Base, encrypt_value, decrypt_value
+from app.core.database import Base, encrypt_value
+from app.core.credential_cache import credential_cache
+import hashlib
 import json
 from typing import Optional, Dict, Any, Union
 
@@ -18,6 +20,7 @@ class Connection(Base):
     username = Column(String(255))
     _password = Column('password', String(255))  # Encrypted password
     _schema_info = Column('schema', Text)  # Stores the database schema and relationships
+    schema_hash = Column(String(16))  # Changes whenever the stored schema does; keys per-schema caches
     is_active = Column(Boolean, default=True)
     last_used = Column(DateTime(timezone=True))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -32,17 +35,19 @@ class Connection(Base):
 
     @property
     def password(self) -> Optional[str]:
-        """Decrypt password when accessing"""
+        """Decrypt password when accessing (cached briefly per connection)"""
         if not self._password:
             return None
         try:
-            return decrypt_value(self._password)
+            return credential_cache.get_password(self.id, self._password)
         except Exception as e:
             raise ValueError(f"Failed to decrypt password: {str(e)}")
 
     @password.setter
     def password(self, value: Optional[str]) -> None:
         """Encrypt password when setting"""
+        if self.id is not None:
+            credential_cache.invalidate(self.id)
         if not value:
             self._password = None
             return
@@ -61,12 +66,14 @@ class Connection(Base):
         """Set schema information from either a string or dictionary"""
         if not value:
             self._schema_info = None
+            self.schema_hash = None
             return
         
         if isinstance(value, dict):
             self._schema_info = json.dumps(value)
         else:
             self._schema_info = value
+        self.schema_hash = hashlib.sha256(self._schema_info.encode()).hexdigest()[:16]
 
     def __repr__(self):
         return f"<Connection {self.name} ({self.db_type})>" 
\ No newline at end of file
@@ -15,6 +15,7 @@ class User(Base):
     hashed_password = Column(String(255), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    last_active = Column(DateTime(timezone=True))  # written in batches by ActivityTracker
 
     # Relationships
     connections = relationship("Connection", back_populates="user", cascade="all, delete-orphan")
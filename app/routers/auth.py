@@ -7,6 +7,8 @@ from app.services.auth import AuthService
 from app.services.email_service import ResetCodeService
 from app.schemas.auth import UserCreate, Token, UserResponse
 from app.core.config import settings
+from app.core.security import PasswordHasherBusy
+from app.core.auth import is_rate_limited, record_login_attempt
 import secrets
 import logging
 
@@ -139,7 +141,7 @@ async def reset_password(
                 }
             )
 
-        if not auth_service.update_password(user.id, password):
+        if not await auth_service.update_password(user.id, password):
             return templates.TemplateResponse(
                 "reset_password.html",
                 {
@@ -183,7 +185,7 @@ async def signup(
         }
         
         auth_service = AuthService(db)
-        user = auth_service.create_user(user_data)
+        user = await auth_service.create_user(user_data)
         token = await auth_service.authenticate_user(email, password)
         
         if not token:
@@ -225,9 +227,23 @@ async def login(
     next: str = Form("/dashboard"),
     db: Session = Depends(get_db)
 ):
+    client_ip = request.client.host if request.client else "unknown"
+    # Refuse before spending a bcrypt verification on a throttled client
+    if await is_rate_limited(client_ip):
+        return templates.TemplateResponse(
+            "login.html",
+            {
+                "request": request,
+                "error": "Too many failed attempts. Please try again later.",
+                "email": email
+            },
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS
+        )
+
     try:
         auth_service = AuthService(db)
         token = await auth_service.authenticate_user(email, password)
+        await record_login_attempt(client_ip, token is not None)
         
         if not token:
             return templates.TemplateResponse(
@@ -251,6 +267,16 @@ async def login(
         )
         return response
         
+    except PasswordHasherBusy:
+        return templates.TemplateResponse(
+            "login.html",
+            {
+                "request": request,
+                "error": "Too many sign-ins right now. Please try again in a moment.",
+                "email": email
+            },
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
     except Exception as e:
         logger.error(f"Login error: {str(e)}")
         return templates.TemplateResponse(
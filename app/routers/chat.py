@@ -1,13 +1,21 @@
-from fastapi import APIRouter, Request, Depends, HTTPException, status
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi import APIRouter, Request, Depends, HTTPException, Query, status
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
 from typing import Optional, Dict, Any
+import json
 
 from app.core.auth import require_auth
 from app.core.database import get_db
 from app.services.connection_service import ConnectionService
 from app.services.chat_service import ChatService
+from app.core.db_executor import run_until_disconnected
+from app.core.config import settings
+from app.core.responses import FastJSONResponse, dumps
+from app.services.result_format import check_result_format
+
+# Non-streaming chat responses; streams always send row arrays
+CHAT_RESULT_FORMATS = ("rows", "columns", "html")
 
 router = APIRouter()
 templates = Jinja2Templates(directory="app/templates")
@@ -52,6 +60,8 @@ async def chat_page(
 @router.post("/api/chat")
 async def chat_message(
     request: Dict[str, Any],
+    http_request: Request,
+    result_format: str = Query("rows", alias="format", description="rows, columns, or html for a rendered table"),
     current_user = Depends(require_auth),
     db: Session = Depends(get_db)
 ):
@@ -60,6 +70,10 @@ async def chat_message(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Connection ID and message are required"
         )
+    try:
+        check_result_format(result_format, CHAT_RESULT_FORMATS)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     
     conn_service = ConnectionService(db)
     db_connection = conn_service.get_connection(request["connection_id"], current_user.id)
@@ -77,14 +91,85 @@ async def chat_message(
         )
     
     chat_service = ChatService(db)
+    if request.get("stream"):
+        # Newline-delimited JSON events, flushed as rows are read
+        async def event_stream():
+            async for event in chat_service.stream_message(
+                message=request["message"],
+                connection=db_connection
+            ):
+                yield json.dumps(event) + "\n"
+
+        return StreamingResponse(event_stream(), media_type="application/x-ndjson")
+
     try:
-        result = await chat_service.process_message(
+        # Cancel the query if the client disconnects before it finishes
+        result = await run_until_disconnected(http_request, chat_service.process_message(
             message=request["message"],
-            connection=db_connection
-        )
-        return JSONResponse(content=result)
+            connection=db_connection,
+            result_format=result_format
+        ))
+        if isinstance(result, JSONResponse):
+            return result
+        return FastJSONResponse(content=result)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
-        ) 
\ No newline at end of file
+        ) 
+
+@router.post("/api/chat/batch")
+async def chat_batch(
+    request: Dict[str, Any],
+    result_format: str = Query("rows", alias="format", description="rows, columns, or html for rendered tables"),
+    current_user = Depends(require_auth),
+    db: Session = Depends(get_db)
+):
+    """Answer a list of questions, streaming one NDJSON result event per question as it completes"""
+    questions = request.get("questions")
+    if "connection_id" not in request or not isinstance(questions, list) or not questions:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Connection ID and a non-empty list of questions are required"
+        )
+    if len(questions) > settings.CHAT_BATCH_MAX_QUESTIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.CHAT_BATCH_MAX_QUESTIONS} questions per batch"
+        )
+    if not all(isinstance(question, str) and question.strip() for question in questions):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Questions must be non-empty strings"
+        )
+    try:
+        check_result_format(result_format, CHAT_RESULT_FORMATS)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    conn_service = ConnectionService(db)
+    db_connection = conn_service.get_connection(request["connection_id"], current_user.id)
+    
+    if not db_connection:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Connection not found"
+        )
+    
+    if db_connection.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to access this connection"
+        )
+
+    chat_service = ChatService(db)
+
+    async def event_stream():
+        async for event in chat_service.process_batch(
+            [question.strip() for question in questions],
+            connection=db_connection,
+            result_format=result_format
+        ):
+            yield dumps(event) + b"\n"
+
+    return StreamingResponse(event_stream(), media_type="application/x-ndjson")
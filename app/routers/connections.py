@@ -6,6 +6,8 @@ from datetime import datetime
 from app.core.database import get_db
 from app.models.connection import Connection
 from app.services.auth import AuthService
+from app.core.engine_registry import engine_registry
+from app.services.result_cache import result_cache
 from typing import Optional
 import logging
 from pydantic import BaseModel
@@ -119,6 +121,8 @@ async def delete_connection(
         
         db.delete(connection)
         db.commit()
+        engine_registry.invalidate(connection_id)
+        result_cache.invalidate_connection(connection_id)
         
         return {"status": "success"}
     except HTTPException:
@@ -0,0 +1,45 @@
+from fastapi import APIRouter, Depends
+from typing import Dict, Any
+from app.core.auth import require_auth
+from app.core.engine_registry import engine_registry
+from app.core.db_executor import db_executor
+from app.core.query_form_pool import query_form_pool
+from app.core.credential_cache import credential_cache
+from app.core.user_cache import user_cache
+from app.core.activity import activity_tracker
+from app.core.security import password_hasher
+from app.core.rate_limit import login_rate_limiter
+from app.core.http_client import model_client
+from app.core.startup import startup_timer
+from app.core import structured_logging
+from app.services.nl_to_sql_cache import nl_to_sql_cache
+from app.services.model_backends import model_router
+from app.services.intent_matcher import intent_matcher
+from app.services.schema_retrieval import schema_retriever
+from app.services.result_cache import result_cache
+from app.services.query_cost import query_cost_guard
+
+router = APIRouter(prefix="/api/metrics", tags=["metrics"])
+
+@router.get("")
+async def get_metrics(current_user = Depends(require_auth)) -> Dict[str, Any]:
+    """Get runtime performance metrics for this worker process"""
+    return {
+        "startup": startup_timer.stats(),
+        "logging": structured_logging.stats(),
+        "engine_pool": engine_registry.stats(),
+        "db_executor": db_executor.stats(),
+        "query_form_pool": query_form_pool.stats(),
+        "credential_cache": credential_cache.stats(),
+        "user_cache": user_cache.stats(),
+        "activity_tracker": activity_tracker.stats(),
+        "password_hasher": password_hasher.stats(),
+        "login_rate_limiter": login_rate_limiter.stats(),
+        "model_client": model_client.stats(),
+        "model_router": model_router.stats(),
+        "intent_matcher": intent_matcher.stats(),
+        "schema_retriever": schema_retriever.stats(),
+        "nl_to_sql_cache": nl_to_sql_cache.stats(),
+        "result_cache": result_cache.stats(),
+        "query_cost_guard": query_cost_guard.stats()
+    }
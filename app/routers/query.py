@@ -1,19 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
 from app.core.database import get_db
 from app.services.query import QueryService
 from app.models.connection import Connection
 from app.models.database import QueryHistory
-from app.schemas.query import QueryRequest, QueryResponse, QueryHistoryResponse
+from app.schemas.query import QueryRequest, QueryResponse, QueryHistoryResponse, CacheInvalidateRequest
+from app.services.result_cache import result_cache
+from app.services.database import DatabaseService
+from app.core.db_executor import db_executor, run_until_disconnected
+from app.core.query_form_pool import query_form_pool
+from app.core.query_timeout import QueryCanceller
+from app.core.responses import FastJSONResponse
+from app.services.result_format import check_result_format
 from typing import List, Optional
-from app.core.auth import get_current_user
+from app.core.auth import get_current_user, require_auth
 from fastapi.templating import Jinja2Templates
-import mysql.connector
-import time
+from fastapi.responses import JSONResponse
 from datetime import datetime
-from app.services.nl_to_sql_service import NLToSQLService
+from app.services.nl_to_sql_service import nl_to_sql_service
 import logging
-from app.core.config import settings
 from app.core.dependencies import get_templates
 
 # Configure logging
@@ -23,58 +28,16 @@ logger = logging.getLogger(__name__)
 web_router = APIRouter(prefix="/query", tags=["query-web"])
 api_router = APIRouter(prefix="/api/query", tags=["query-api"])
 
-def execute_sql_query(sql_query: str) -> dict:
+def execute_sql_query(sql_query: str, canceller: Optional[QueryCanceller] = None) -> dict:
     """Execute SQL query and return results with execution time"""
-    start_time = time.time()
-    try:
-        # TODO: Use connection pooling instead of creating new connections
-        connection = mysql.connector.connect(
-            host=settings.DB_HOST,
-            user=settings.DB_USER,
-            password=settings.DB_PASSWORD,
-            database=settings.DB_NAME
-        )
-        
-        cursor = connection.cursor(dictionary=True)
-        cursor.execute(sql_query)
-        results = cursor.fetchall()
-        
-        columns = [desc[0] for desc in cursor.description] if cursor.description else []
-        
-        cursor.close()
-        connection.close()
-        
-        execution_time = round((time.time() - start_time) * 1000, 2)
-        return {
-            "status": "success",
-            "columns": columns,
-            "results": results,
-            "execution_time": execution_time,
-            "error": None
-        }
-    except mysql.connector.Error as e:
-        logger.error(f"Database error: {str(e)}")
-        execution_time = round((time.time() - start_time) * 1000, 2)
-        return {
-            "status": "error",
-            "columns": [],
-            "results": [],
-            "execution_time": execution_time,
-            "error": f"Database error: {str(e)}"
-        }
-    except Exception as e:
-        logger.error(f"Unexpected error: {str(e)}")
-        execution_time = round((time.time() - start_time) * 1000, 2)
-        return {
-            "status": "error",
-            "columns": [],
-            "results": [],
-            "execution_time": execution_time,
-            "error": f"Unexpected error: {str(e)}"
-        }
+    return query_form_pool.execute(sql_query, canceller)
 
 @web_router.get("/")
-async def show_query_form(request: Request, templates: Jinja2Templates = Depends(get_templates)):
+async def show_query_form(
+    request: Request,
+    current_user = Depends(require_auth),
+    templates: Jinja2Templates = Depends(get_templates)
+):
     """Show the query input form"""
     return templates.TemplateResponse(
         "query_form.html",
@@ -82,7 +45,11 @@ async def show_query_form(request: Request, templates: Jinja2Templates = Depends
     )
 
 @web_router.post("/")
-async def process_query(request: Request, templates: Jinja2Templates = Depends(get_templates)):
+async def process_query(
+    request: Request,
+    current_user = Depends(require_auth),
+    templates: Jinja2Templates = Depends(get_templates)
+):
     """Process natural language query and show results"""
     try:
         form_data = await request.form()
@@ -91,7 +58,22 @@ async def process_query(request: Request, templates: Jinja2Templates = Depends(g
         if not natural_query:
             raise HTTPException(status_code=400, detail="Query is required")
         
-        nl_service = NLToSQLService()
+        if not query_form_pool.enabled:
+            return templates.TemplateResponse(
+                "query_result.html",
+                {
+                    "request": request,
+                    "natural_query": natural_query,
+                    "sql_query": "",
+                    "status": "error",
+                    "error": "The query form is not configured on this server.",
+                    "execution_time": 0,
+                    "columns": [],
+                    "results": []
+                }
+            )
+        
+        nl_service = nl_to_sql_service
         
         schema_info = """
         Table: users
@@ -115,7 +97,7 @@ async def process_query(request: Request, templates: Jinja2Templates = Depends(g
         - created_at (datetime)
         """
         
-        result = nl_service.generate_sql(natural_query, schema_info)
+        result = await nl_service.generate_sql(natural_query, schema_info)
         
         if not result["success"]:
             logger.error(f"SQL generation failed: {result['error']}")
@@ -133,7 +115,10 @@ async def process_query(request: Request, templates: Jinja2Templates = Depends(g
                 }
             )
         
-        query_result = execute_sql_query(result["sql"])
+        canceller = query_form_pool.canceller()
+        query_result = await db_executor.run(
+            "query-form", execute_sql_query, result["sql"], canceller, on_cancel=canceller.cancel
+        )
         
         if query_result["status"] == "success":
             for row in query_result["results"]:
@@ -151,7 +136,8 @@ async def process_query(request: Request, templates: Jinja2Templates = Depends(g
                 "error": query_result["error"],
                 "execution_time": query_result["execution_time"],
                 "columns": query_result["columns"],
-                "results": query_result["results"]
+                "results": query_result["results"],
+                "truncated": query_result["truncated"]
             }
         )
     except Exception as e:
@@ -175,17 +161,28 @@ async def process_query(request: Request, templates: Jinja2Templates = Depends(g
 async def execute_query(
     connection_id: int,
     query_request: QueryRequest,
+    request: Request,
+    result_format: str = Query("records", alias="format", description="records, rows or columns"),
     db: Session = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
     """Execute a natural language query on a database connection"""
+    try:
+        check_result_format(result_format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     try:
         query_service = QueryService(db)
-        result = await query_service.process_natural_language_query(
+        # Stop work on the user database if the client goes away
+        result = await run_until_disconnected(request, query_service.process_natural_language_query(
             connection_id=connection_id,
             user_id=current_user.id,
-            query=query_request.query
-        )
+            query=query_request.query,
+            result_format=result_format
+        ))
+        if result_format != "records" and not isinstance(result, JSONResponse):
+            # Compact layouts skip response_model validation and jsonable_encoder
+            return FastJSONResponse(content=result)
         return result
     except Exception as e:
         logger.error(f"Error executing query: {str(e)}")
@@ -210,4 +207,22 @@ async def get_query_history(
         )
     except Exception as e:
         logger.error(f"Error getting query history: {str(e)}")
-        raise HTTPException(status_code=400, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=400, detail=str(e))
+
+@api_router.post("/{connection_id}/cache/invalidate")
+async def invalidate_query_cache(
+    connection_id: int,
+    invalidate_request: CacheInvalidateRequest,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    """Drop cached results for a connection, optionally only those reading given tables"""
+    connection = DatabaseService(db).get_connection(connection_id, current_user.id)
+    if not connection:
+        raise HTTPException(status_code=404, detail="Connection not found")
+
+    if invalidate_request.tables:
+        invalidated = result_cache.invalidate_tables(connection_id, invalidate_request.tables)
+    else:
+        invalidated = result_cache.invalidate_connection(connection_id)
+    return {"invalidated": invalidated}
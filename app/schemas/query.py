@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Union
 from datetime import datetime
 
 class QueryRequest(BaseModel):
@@ -27,12 +27,18 @@ class QueryResponse(BaseModel):
     execution_time: float
     status: str
     error_message: Optional[str]
-    results: Optional[List[Dict[str, Any]]]
+    # List of row dicts, or a compact {"format", "columns", "rows" | "data"} payload
+    results: Optional[Union[List[Dict[str, Any]], Dict[str, Any]]]
     row_count: int
+    truncated: bool = False  # the cost guard's limit policy cut the result off
 
 class QueryHistoryResponse(BaseModel):
     """Schema for paginated query history response"""
     total: int
     queries: List[QueryHistory]
     limit: int
-    offset: int 
\ No newline at end of file
+    offset: int
+
+class CacheInvalidateRequest(BaseModel):
+    """Schema for invalidating cached query results"""
+    tables: Optional[List[str]] = None
@@ -1,8 +1,11 @@
 from typing import Dict, Any, List
 from pydantic import BaseModel, Field
 from app.core.config import settings
+from app.core.http_client import ModelClientError
+from app.services.model_backends import create_backend
 from fastapi import HTTPException
-import requests
+import aiohttp
+import asyncio
 import json
 
 class SQLQuery(BaseModel):
@@ -17,8 +20,7 @@ class AIService:
                 detail="Hugging Face API key not configured. Please set HUGGINGFACE_API_KEY in your environment variables."
             )
         
-        self.api_url = f"https://api-inference.huggingface.co/models/{settings.HUGGINGFACE_MODEL}"
-        self.headers = {"Authorization": f"Bearer {settings.HUGGINGFACE_API_KEY}"}
+        self.backend = create_backend("remote")
 
     async def natural_to_sql(self, natural_query: str, schema: Dict[str, Any]) -> str:
         """Convert natural language query to SQL using AI"""
@@ -44,21 +46,22 @@ class AIService:
             
             Generate only the SQL query, without any explanation or additional text."""
             
-            # Make request to Hugging Face API
-            response = requests.post(
-                self.api_url,
-                headers=self.headers,
-                json={"inputs": prompt, "parameters": {"max_length": 500}}
-            )
-            
-            if response.status_code != 200:
+            # Make request to Hugging Face API over the shared keep-alive client
+            try:
+                generated_text = await self.backend.complete(prompt, {"max_length": 500})
+            except ModelClientError as e:
+                raise HTTPException(
+                    status_code=e.status,
+                    detail="Failed to get response from Hugging Face API"
+                )
+            except (aiohttp.ClientError, asyncio.TimeoutError):
                 raise HTTPException(
-                    status_code=response.status_code,
+                    status_code=502,
                     detail="Failed to get response from Hugging Face API"
                 )
 
             # Extract SQL query from response
-            sql_query = response.json()[0]["generated_text"].strip()
+            sql_query = generated_text.strip()
             
             # Validate the SQL query (basic checks)
             if not sql_query.upper().startswith("SELECT"):
@@ -70,6 +73,8 @@ class AIService:
             
             return sql_query
 
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(
                 status_code=400,
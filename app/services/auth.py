@@ -5,7 +5,8 @@ from sqlalchemy.orm import Session
 from jose import JWTError, jwt
 from app.models.user import User
 from app.core.config import settings
-from app.core.security import get_password_hash, verify_password, create_access_token
+from app.core.security import PasswordHasherBusy, create_access_token, password_hasher
+from app.core.user_cache import CachedUser, user_cache
 from app.schemas.auth import Token
 import logging
 
@@ -40,8 +41,8 @@ class AuthService:
             logger.error(f"Error getting user by email: {e}")
             return None
 
-    def get_current_user(self, token: str) -> User:
-        """Get the current user from a JWT token"""
+    def get_current_user(self, token: str) -> CachedUser:
+        """Get the current user from a JWT token, from the user cache when possible"""
         try:
             payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
             user_id = payload.get("sub")
@@ -52,6 +53,9 @@ class AuthService:
                     detail="Invalid authentication token",
                     headers={"WWW-Authenticate": "Bearer"},
                 )
+            cached = user_cache.get(user_id, payload.get("exp"))
+            if cached is not None:
+                return cached
             user = self.db.query(User).filter(User.id == user_id).first()
             if user is None:
                 logger.warning(f"No user found for ID {user_id}")
@@ -60,7 +64,7 @@ class AuthService:
                     detail="User not found",
                     headers={"WWW-Authenticate": "Bearer"},
                 )
-            return user
+            return user_cache.put(user_id, payload.get("exp"), user)
         except JWTError as e:
             logger.error(f"JWT decode error: {e}")
             raise HTTPException(
@@ -84,9 +88,15 @@ class AuthService:
                 logger.warning(f"Authentication failed: User not found for email {email}")
                 return None
             
-            if not verify_password(password, user.hashed_password):
+            # bcrypt runs off the event loop
+            valid, new_hash = await password_hasher.verify_and_update(password, user.hashed_password)
+            if not valid:
                 logger.warning(f"Authentication failed: Invalid password for email {email}")
                 return None
+            if new_hash:
+                # Stored hash used an old cost; upgrade it transparently
+                user.hashed_password = new_hash
+                self.db.commit()
 
             # Create access token
             access_token = create_access_token(
@@ -97,11 +107,13 @@ class AuthService:
             logger.info(f"Successfully authenticated user: {email}")
             return Token(access_token=access_token, token_type="bearer")
             
+        except PasswordHasherBusy:
+            raise
         except Exception as e:
             logger.error(f"Authentication error: {e}")
             return None
 
-    def create_user(self, user_data: Dict) -> User:
+    async def create_user(self, user_data: Dict) -> User:
         """Create a new user"""
         try:
             # Check if user already exists
@@ -112,7 +124,7 @@ class AuthService:
                 )
             
             # Create new user
-            hashed_password = get_password_hash(user_data["password"])
+            hashed_password = await password_hasher.hash(user_data["password"])
             user = User(
                 email=user_data["email"],
                 hashed_password=hashed_password,
@@ -129,6 +141,11 @@ class AuthService:
             
         except HTTPException:
             raise
+        except PasswordHasherBusy:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is busy. Please try again in a moment."
+            )
         except Exception as e:
             logger.error(f"Error creating user: {e}")
             self.db.rollback()
@@ -137,7 +154,7 @@ class AuthService:
                 detail="Error creating user"
             )
 
-    def update_password(self, user_id: int, new_password: str) -> bool:
+    async def update_password(self, user_id: int, new_password: str) -> bool:
         """Update a user's password"""
         try:
             user = self.get_user_by_id(user_id)
@@ -145,9 +162,11 @@ class AuthService:
                 logger.warning(f"Password update failed: User not found with ID {user_id}")
                 return False
             
-            hashed_password = get_password_hash(new_password)
+            hashed_password = await password_hasher.hash(new_password)
             user.hashed_password = hashed_password
             self.db.commit()
+            # Force the next request to reload the user
+            user_cache.invalidate_user(user_id)
             
             logger.info(f"Successfully updated password for user ID: {user_id}")
             return True
@@ -1,9 +1,19 @@
-from typing import Dict
-from sqlalchemy import create_engine, text
-from app.services.nl_to_sql_service import NLToSQLService
+from typing import Dict, AsyncIterator, List
+from sqlalchemy import text
+from app.services.nl_to_sql_service import nl_to_sql_service
 from app.services.connection_service import ConnectionService
 from app.core.database import get_db
-import json
+from app.core.engine_registry import engine_registry
+from app.core.db_executor import db_executor
+from app.core.query_timeout import QueryCanceller, is_timeout_error
+from app.core.config import settings
+from app.services.sql_utils import apply_row_limit
+from app.services.schema_introspection import format_schema_for_prompt, load_stored_schema
+from app.services.result_cache import result_cache
+from app.services.query_cost import QueryCostError, query_cost_guard
+from app.services.result_format import to_columnar
+from app.services.result_html import render_results_table
+import asyncio
 import re
 import datetime
 import decimal
@@ -14,7 +24,7 @@ logger = logging.getLogger(__name__)
 
 class ChatService:
     def __init__(self, db=None):
-        self.nl_to_sql = NLToSQLService()
+        self.nl_to_sql = nl_to_sql_service
         self.db = db if db is not None else next(get_db())
         self.connection_service = ConnectionService(self.db)
 
@@ -111,7 +121,7 @@ class ChatService:
         
         return True
 
-    def _get_schema(self, connection, url: str) -> Dict:
+    def _get_schema(self, connection, engine) -> Dict:
         """Get schema information, either from cache or fresh"""
         try:
             # Check if we have a valid cached schema
@@ -120,10 +130,18 @@ class ChatService:
                     "success": True,
                     "schema": connection.schema
                 }
+
+            # Reuse a normalized schema stored by SchemaService without a round trip
+            stored = load_stored_schema(connection.schema)
+            if stored:
+                return {
+                    "success": True,
+                    "schema": format_schema_for_prompt(stored)
+                }
             
             # Get fresh schema
             from app.services.schema_service import SchemaService
-            schema_service = SchemaService(url, connection.db_type, connection.database)
+            schema_service = SchemaService(None, connection.db_type, connection.database, engine=engine)
             schema_info = schema_service.format_schema_for_prompt()
             
             # Validate the fresh schema
@@ -180,203 +198,255 @@ class ChatService:
             return f"[Error: Could not sanitize value of type {type(value).__name__}]"
 
     def _create_safe_response(self, success: bool, message: str = "", error: str = "", sql: str = "", results: dict = None) -> Dict:
-        """Create a safe response dictionary with basic Python types"""
-        try:
-            base_response = {
-                "success": bool(success),
-                "message": self._sanitize_value(message) if message else "",
-                "sql": self._sanitize_value(sql) if sql else ""
-            }
-            
-            if error:
-                # Sanitize error message to avoid exposing internal details
-                error_msg = self._sanitize_value(error)
-                if "mysql" in error_msg.lower() or "sql" in error_msg.lower():
-                    error_msg = "Database error occurred. Please try again."
-                base_response["error"] = error_msg
-            
-            if results:
-                # Format results as HTML table
-                table_html = "<div class='result-table-wrapper'><table class='result-table'>"
-                
-                # Add headers
-                if results.get("columns"):
-                    table_html += "<thead><tr>"
-                    for col in results["columns"]:
-                        table_html += f"<th>{self._sanitize_value(col)}</th>"
-                    table_html += "</tr></thead>"
-                
-                # Add rows
-                if results.get("rows"):
-                    table_html += "<tbody>"
-                    for row in results["rows"]:
-                        table_html += "<tr>"
-                        for cell in row:
-                            table_html += f"<td>{self._sanitize_value(cell)}</td>"
-                        table_html += "</tr>"
-                    table_html += "</tbody>"
-                
-                table_html += "</table></div>"
-                
-                # Add summary text
-                total_rows = len(results.get("rows", []))
-                if total_rows > 0:
-                    summary = f"Found {total_rows} result{'s' if total_rows != 1 else ''}:"
-                    base_response["content"] = f"{summary}<br>{table_html}"
-                else:
-                    base_response["content"] = "No matching records found."
-            
-            # Verify the response is JSON serializable
-            json.dumps(base_response)
-            return base_response
-            
-        except Exception as e:
-            logger.error(f"Error creating safe response: {str(e)}")
-            return {
-                "success": False,
-                "error": "An internal error occurred while processing the response",
-                "message": "",
-                "sql": ""
-            }
+        """Create a response dictionary with basic Python types.
 
-    async def process_message(self, message: str, connection_id: int = None, user_id: int = None, connection = None) -> Dict:
-        """Process a chat message and return the response"""
-        engine = None
+        ``results`` (already sanitized rows) is rendered into ``content``
+        as an escaped HTML table; structured formats set ``results`` instead.
+        """
+        base_response = {
+            "success": bool(success),
+            "message": self._sanitize_value(message) if message else "",
+            "sql": self._sanitize_value(sql) if sql else ""
+        }
+        
+        if error:
+            # Sanitize error message to avoid exposing internal details
+            error_msg = self._sanitize_value(error)
+            if "mysql" in error_msg.lower() or "sql" in error_msg.lower():
+                error_msg = "Database error occurred. Please try again."
+            base_response["error"] = error_msg
+        
+        if results:
+            base_response["content"] = render_results_table(
+                results.get("columns", []), results.get("rows", []), results.get("truncated", False)
+            )
+        
+        return base_response
+
+    async def _prepare_query(self, message: str, connection_id: int = None, user_id: int = None, connection = None) -> Dict:
+        """Resolve the connection, load its schema and generate SQL for a message"""
+        target = await self._prepare_target(connection_id, user_id, connection)
+        if not target["success"]:
+            return target
+        return await self._generate_query(target, message)
+
+    async def _prepare_target(self, connection_id: int = None, user_id: int = None, connection = None) -> Dict:
+        """Resolve the connection, its pooled engine and the prompt-ready schema"""
         start_time = time.time()
+
+        # Get connection details if not provided
+        if connection is None and connection_id is not None and user_id is not None:
+            connection = self.connection_service.get_connection(connection_id, user_id)
+        
+        if not connection:
+            return {"success": False, "error": "Connection not found"}
+
+        logger.info(f"Processing message for connection: {connection.id}")
         
+        if connection.db_type.lower() != "mysql":
+            return {"success": False, "error": f"Database type {connection.db_type} not supported"}
+
+        # The password is only decrypted when the registry builds a new pool
+        if not connection._password:
+            return {"success": False, "error": "Failed to decrypt database password"}
+
+        # Reuse the pooled engine for this connection
         try:
-            # Get connection details if not provided
-            if connection is None and connection_id is not None and user_id is not None:
-                connection = self.connection_service.get_connection(connection_id, user_id)
-            
-            if not connection:
-                return self._create_safe_response(
-                    success=False,
-                    error="Connection not found"
-                )
+            engine = engine_registry.get_engine(connection)
+        except Exception as e:
+            logger.error(f"Database connection error: {str(e)}")
+            return {"success": False, "error": "Failed to connect to database"}
 
-            logger.info(f"Processing message for connection: {connection.id}")
-            
-            # Create database URL with connection timeout
-            if connection.db_type.lower() == "mysql":
-                decrypted_password = connection.password
-                if not decrypted_password:
+        # Get schema information with timeout
+        logger.info("Getting schema information...")
+        schema_result = await db_executor.run(connection.id, self._get_schema, connection, engine)
+        if not schema_result["success"]:
+            return {"success": False, "error": schema_result["error"]}
+
+        # Check execution time
+        if time.time() - start_time > 30:  # 30 seconds timeout
+            return {"success": False, "error": "Query timed out"}
+
+        # Format schema for NLToSQL service
+        logger.info("Formatting schema for NLToSQL service...")
+        return {
+            "success": True,
+            "connection_id": connection.id,
+            "db_type": connection.db_type,
+            "engine": engine,
+            "schema": self._format_schema_for_nl_to_sql(schema_result["schema"])
+        }
+
+    async def _generate_query(self, target: Dict, message: str) -> Dict:
+        """Generate SQL for a message against a prepared target"""
+        # Generate SQL before checking out a pooled connection so the
+        # model round trip does not hold one
+        logger.info("Generating SQL from natural language...")
+        result = await self.nl_to_sql.generate_sql(message, target["schema"])
+        if not result["success"]:
+            return {"success": False, "error": result["error"]}
+
+        return {
+            "success": True,
+            "connection_id": target["connection_id"],
+            "db_type": target["db_type"],
+            "engine": target["engine"],
+            "sql": result["sql"],
+            "explanation": result.get("explanation", "Query executed successfully")
+        }
+
+    def _execute_capped(self, conn, sql: str, max_rows: int):
+        """Execute a query bounded to max_rows, streaming from the driver where supported"""
+        # Ask for one extra row so truncation can be detected without a COUNT
+        capped_sql = apply_row_limit(sql, max_rows + 1)
+        return conn.execution_options(stream_results=True).execute(text(capped_sql))
+
+    def _iter_row_chunks(self, result_set, max_rows: int):
+        """Yield sanitized chunks of rows, stopping at the row cap"""
+        row_count = 0
+        while row_count < max_rows:
+            chunk = result_set.fetchmany(min(settings.CHAT_FETCH_SIZE, max_rows - row_count))
+            if not chunk:
+                return
+            row_count += len(chunk)
+            yield [[self._sanitize_value(value) for value in row] for row in chunk]
+
+    def _has_more_rows(self, result_set, row_count: int, max_rows: int) -> bool:
+        """Check whether the result was cut off at the row cap"""
+        return row_count >= max_rows and result_set.fetchone() is not None
+
+    def _query_error(self, error: Exception, default: str) -> str:
+        """User-facing message for a failed execution"""
+        if isinstance(error, QueryCostError):
+            return str(error)
+        if is_timeout_error(error):
+            return "Query timed out"
+        return default
+
+    def _stream_rows(self, prepared: Dict, max_rows: int, canceller: QueryCanceller):
+        """Blocking generator of ("warnings" | "columns" | "rows" | "truncated", payload) pairs"""
+        with prepared["engine"].connect() as conn, canceller.attached(conn):
+            sql, warnings = query_cost_guard.review(conn, prepared["db_type"], prepared["connection_id"], prepared["sql"])
+            if warnings:
+                yield "warnings", warnings
+            result_set = self._execute_capped(conn, sql, max_rows)
+            yield "columns", [str(col) for col in result_set.keys()]
+            row_count = 0
+            for rows in self._iter_row_chunks(result_set, max_rows):
+                row_count += len(rows)
+                yield "rows", rows
+            truncated = self._has_more_rows(result_set, row_count, max_rows)
+            result_set.close()
+            yield "truncated", truncated
+
+    def _results_response(self, prepared: Dict, results: Dict, result_format: str) -> Dict:
+        """Success response with results as an HTML table or a compact columnar payload"""
+        if result_format == "html":
+            return self._create_safe_response(
+                success=True,
+                message=prepared["explanation"],
+                sql=prepared["sql"],
+                results=results
+            )
+        response = self._create_safe_response(success=True, message=prepared["explanation"], sql=prepared["sql"])
+        response["results"] = to_columnar(results["columns"], results["rows"], result_format)
+        response["total_rows"] = results["total_rows"]
+        response["truncated"] = results["truncated"]
+        return response
+
+    def _run_query(self, prepared: Dict, canceller: QueryCanceller, result_format: str = "rows") -> Dict:
+        """Execute prepared SQL and build the response (runs on the executor)"""
+        try:
+            with prepared["engine"].connect() as conn:
+                return self._run_on_connection(conn, prepared, canceller, result_format)
+        except Exception as e:
+            logger.error(f"Database connection error: {str(e)}")
+            return self._create_safe_response(
+                success=False,
+                error="Failed to connect to database"
+            )
+
+    def _run_on_connection(self, conn, prepared: Dict, canceller: QueryCanceller, result_format: str = "rows") -> Dict:
+        """Execute prepared SQL on an already checked-out connection (blocking)"""
+        with canceller.attached(conn):
+            # Execute query with timeout monitoring
+            logger.info("Executing query...")
+            try:
+                # Plan first so expensive statements never start
+                sql, warnings = query_cost_guard.review(
+                    conn, prepared["db_type"], prepared["connection_id"], prepared["sql"]
+                )
+                max_rows = settings.CHAT_MAX_ROWS
+                result_set = self._execute_capped(conn, sql, max_rows)
+                
+                # Process results with size limits
+                try:
+                    columns = [str(col) for col in result_set.keys()]
+                    rows = []
+                    for chunk in self._iter_row_chunks(result_set, max_rows):
+                        rows.extend(chunk)
+                    row_count = len(rows)
+                    truncated = self._has_more_rows(result_set, row_count, max_rows)
+                    result_set.close()
+                    
+                    logger.info(f"Query executed successfully. Found {row_count} rows.")
+                    
+                    results = {
+                        "columns": columns,
+                        "rows": rows,
+                        "total_rows": row_count,
+                        "truncated": truncated
+                    }
+                    result_cache.put(prepared["connection_id"], prepared["sql"], results, namespace="chat")
+                    
+                    response = self._results_response(prepared, results, result_format)
+                    if warnings:
+                        response["warnings"] = warnings
+                    return response
+                    
+                except Exception as e:
+                    logger.error(f"Error processing query results: {str(e)}")
                     return self._create_safe_response(
                         success=False,
-                        error="Failed to decrypt database password"
+                        error=self._query_error(e, "Error processing query results"),
+                        sql=prepared["sql"]
                     )
-                
-                # Configure MySQL connection with proper parameters
-                url = (
-                    f"mysql+mysqlconnector://{connection.username}:{decrypted_password}"
-                    f"@{connection.host}:{connection.port}/{connection.database}"
-                    "?charset=utf8mb4"
-                    "&collation=utf8mb4_unicode_ci"
-                    "&connection_timeout=30"
-                    "&pool_size=5"
-                )
-            else:
+                    
+            except Exception as e:
+                logger.error(f"Error executing query: {str(e)}")
                 return self._create_safe_response(
                     success=False,
-                    error=f"Database type {connection.db_type} not supported"
+                    error=self._query_error(e, "Error executing query"),
+                    sql=prepared["sql"]
                 )
 
-            # Get schema information with timeout
-            logger.info("Getting schema information...")
-            schema_result = self._get_schema(connection, url)
-            if not schema_result["success"]:
-                return self._create_safe_response(
-                    success=False,
-                    error=schema_result["error"]
-                )
+    async def process_message(self, message: str, connection_id: int = None, user_id: int = None, connection = None, result_format: str = "rows") -> Dict:
+        """Process a chat message and return the response.
 
-            # Check execution time
-            if time.time() - start_time > 30:  # 30 seconds timeout
+        ``result_format`` is rows or columns for a structured ``results``
+        payload, or html for a server-rendered table in ``content``.
+        """
+        try:
+            prepared = await self._prepare_query(message, connection_id, user_id, connection)
+            if not prepared["success"]:
                 return self._create_safe_response(
                     success=False,
-                    error="Query timed out"
+                    error=prepared["error"]
                 )
 
-            # Create database engine with basic configuration
-            try:
-                logger.info("Creating database engine...")
-                engine = create_engine(
-                    url,
-                    pool_pre_ping=True  # Keep this as it's supported
-                )
-                
-                with engine.connect() as conn:
-                    # Set session timeout
-                    conn.execute(text("SET SESSION wait_timeout=30"))
-                    
-                    # Format schema for NLToSQL service
-                    logger.info("Formatting schema for NLToSQL service...")
-                    formatted_schema = self._format_schema_for_nl_to_sql(schema_result["schema"])
-
-                    # Generate SQL from natural language
-                    logger.info("Generating SQL from natural language...")
-                    result = await self.nl_to_sql.generate_sql(message, formatted_schema)
-                    if not result["success"]:
-                        return self._create_safe_response(
-                            success=False,
-                            error=result["error"]
-                        )
-                    
-                    # Execute query with timeout monitoring
-                    logger.info("Executing query...")
-                    try:
-                        result_set = conn.execute(text(result["sql"]))
-                        
-                        # Process results with size limits
-                        try:
-                            columns = [str(col) for col in result_set.keys()]
-                            rows = []
-                            row_count = 0
-                            max_rows = 1000
-                            
-                            for row in result_set.fetchall():
-                                if row_count >= max_rows:
-                                    break
-                                processed_row = [self._sanitize_value(value) for value in row]
-                                rows.append(processed_row)
-                                row_count += 1
-                            
-                            logger.info(f"Query executed successfully. Found {row_count} rows.")
-                            
-                            return self._create_safe_response(
-                                success=True,
-                                message=result.get("explanation", "Query executed successfully"),
-                                sql=result.get("sql", ""),
-                                results={
-                                    "columns": columns,
-                                    "rows": rows,
-                                    "total_rows": row_count,
-                                    "truncated": row_count >= max_rows
-                                }
-                            )
-                            
-                        except Exception as e:
-                            logger.error(f"Error processing query results: {str(e)}")
-                            return self._create_safe_response(
-                                success=False,
-                                error="Error processing query results",
-                                sql=result.get("sql", "")
-                            )
-                            
-                    except Exception as e:
-                        logger.error(f"Error executing query: {str(e)}")
-                        return self._create_safe_response(
-                            success=False,
-                            error="Error executing query",
-                            sql=result.get("sql", "")
-                        )
+            # Identical SELECTs against the same connection can be served from cache
+            cached = result_cache.get(prepared["connection_id"], prepared["sql"], namespace="chat")
+            if cached is not None:
+                logger.info("Serving query results from cache")
+                return self._results_response(prepared, cached, result_format)
 
-            except Exception as e:
-                logger.error(f"Database connection error: {str(e)}")
-                return self._create_safe_response(
-                    success=False,
-                    error="Failed to connect to database"
-                )
+            # Driver I/O runs on the executor so the event loop stays free;
+            # a cancelled request kills the statement on the server
+            canceller = QueryCanceller(prepared["engine"], prepared["db_type"])
+            return await db_executor.run(
+                prepared["connection_id"], self._run_query, prepared, canceller, result_format,
+                on_cancel=canceller.cancel
+            )
 
         except Exception as e:
             logger.error(f"Error in process_message: {str(e)}")
@@ -384,6 +454,156 @@ class ChatService:
                 success=False,
                 error="An unexpected error occurred"
             )
+
+    async def stream_message(self, message: str, connection_id: int = None, user_id: int = None, connection = None) -> AsyncIterator[Dict]:
+        """Process a chat message and yield result events as rows are read.
+
+        Yields a ``meta`` event with the SQL and columns, one ``rows`` event
+        per fetched chunk and a final ``done`` event; failures yield a
+        single ``error`` event instead.
+        """
+        sql = ""
+        try:
+            prepared = await self._prepare_query(message, connection_id, user_id, connection)
+            if not prepared["success"]:
+                yield {"type": "error", **self._create_safe_response(success=False, error=prepared["error"])}
+                return
+
+            sql = prepared["sql"]
+            cached = result_cache.get(prepared["connection_id"], sql, namespace="chat")
+            if cached is not None:
+                yield {
+                    "type": "meta",
+                    **self._create_safe_response(success=True, message=prepared["explanation"], sql=sql),
+                    "columns": cached["columns"]
+                }
+                yield {"type": "rows", "rows": cached["rows"]}
+                yield {"type": "done", "total_rows": cached["total_rows"], "truncated": cached["truncated"]}
+                return
+
+            canceller = QueryCanceller(prepared["engine"], prepared["db_type"])
+            async with db_executor.slot(prepared["connection_id"], on_cancel=canceller.cancel) as slot:
+                events = self._stream_rows(prepared, settings.CHAT_MAX_ROWS, canceller)
+                try:
+                    # Only keep rows around when they will be cached
+                    collected = [] if result_cache.enabled else None
+                    columns, warnings, row_count, truncated = [], [], 0, False
+                    while True:
+                        # Each chunk is fetched on the executor, one at a time
+                        event = await slot.call(next, events, None)
+                        if event is None:
+                            break
+                        kind, payload = event
+                        if kind == "warnings":
+                            warnings = payload
+                        elif kind == "columns":
+                            columns = payload
+                            meta = {
+                                "type": "meta",
+                                **self._create_safe_response(success=True, message=prepared["explanation"], sql=sql),
+                                "columns": columns
+                            }
+                            if warnings:
+                                meta["warnings"] = warnings
+                            yield meta
+                        elif kind == "rows":
+                            row_count += len(payload)
+                            if collected is not None:
+                                collected.extend(payload)
+                            yield {"type": "rows", "rows": payload}
+                        else:
+                            truncated = payload
+                finally:
+                    # Release the cursor and connection on the worker thread
+                    slot.defer(events.close)
+
+            if collected is not None:
+                result_cache.put(prepared["connection_id"], sql, {
+                    "columns": columns,
+                    "rows": collected,
+                    "total_rows": row_count,
+                    "truncated": truncated
+                }, namespace="chat")
+
+            logger.info(f"Query streamed successfully. Sent {row_count} rows.")
+            yield {"type": "done", "total_rows": row_count, "truncated": truncated}
+
+        except Exception as e:
+            logger.error(f"Error in stream_message: {str(e)}")
+            error = self._query_error(e, "Error executing query")
+            yield {"type": "error", **self._create_safe_response(success=False, error=error, sql=sql)}
+
+    def _run_batch_query(self, conn, prepared: Dict, canceller: QueryCanceller, result_format: str) -> Dict:
+        """Execute one batch question on the batch's held connection (blocking)"""
+        try:
+            return self._run_on_connection(conn, prepared, canceller, result_format)
         finally:
-            if engine:
-                engine.dispose() 
\ No newline at end of file
+            # End the read transaction so later questions see fresh data
+            conn.rollback()
+
+    async def process_batch(self, questions: List[str], connection, result_format: str = "rows", concurrency: int = settings.CHAT_BATCH_MODEL_CONCURRENCY) -> AsyncIterator[Dict]:
+        """Answer many questions against one connection, yielding results as they complete.
+
+        The schema is loaded once. Model calls run concurrently, at most
+        ``concurrency`` at a time, while generated SQL runs one statement
+        at a time over a single pooled connection held for the batch.
+        Yields one ``result`` event per question, tagged with its index,
+        then a ``done`` event.
+        """
+        started = time.perf_counter()
+        target = await self._prepare_target(connection=connection)
+        if not target["success"]:
+            yield {"type": "error", **self._create_safe_response(success=False, error=target["error"])}
+            return
+
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def generate(index: int, question: str):
+            async with semaphore:
+                try:
+                    return index, question, await self._generate_query(target, question)
+                except Exception as e:
+                    logger.error(f"Error generating SQL for batch question {index}: {str(e)}")
+                    return index, question, {"success": False, "error": "An unexpected error occurred"}
+
+        generations = [asyncio.ensure_future(generate(i, q)) for i, q in enumerate(questions)]
+        canceller = QueryCanceller(target["engine"], target["db_type"])
+        succeeded = 0
+        try:
+            async with db_executor.slot(target["connection_id"], on_cancel=canceller.cancel) as slot:
+                conn = None
+                try:
+                    for next_generated in asyncio.as_completed(generations):
+                        index, question, prepared = await next_generated
+                        if not prepared["success"]:
+                            response = self._create_safe_response(success=False, error=prepared["error"])
+                        else:
+                            cached = result_cache.get(prepared["connection_id"], prepared["sql"], namespace="chat")
+                            if cached is not None:
+                                response = self._results_response(prepared, cached, result_format)
+                            else:
+                                if conn is None:
+                                    conn = await slot.call(target["engine"].connect)
+                                response = await slot.call(self._run_batch_query, conn, prepared, canceller, result_format)
+                        succeeded += int(response["success"])
+                        yield {"type": "result", "index": index, "question": question, **response}
+                finally:
+                    if conn is not None:
+                        # Return the connection on the worker thread once any running call ends
+                        slot.defer(conn.close)
+        except Exception as e:
+            logger.error(f"Error in process_batch: {str(e)}")
+            yield {"type": "error", **self._create_safe_response(success=False, error="Failed to connect to database")}
+            return
+        finally:
+            # Stop outstanding model calls if the client went away or execution failed
+            for task in generations:
+                task.cancel()
+
+        logger.info(f"Batch of {len(questions)} questions finished, {succeeded} succeeded")
+        yield {
+            "type": "done",
+            "total": len(questions),
+            "succeeded": succeeded,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)
+        }
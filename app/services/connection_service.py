@@ -5,6 +5,8 @@ from sqlalchemy import create_engine, text
 from sqlalchemy.exc import SQLAlchemyError
 from app.services.schema_service import SchemaService
 from app.core.database import get_db
+from app.core.engine_registry import engine_registry
+from app.services.result_cache import result_cache
 
 class ConnectionService:
     def __init__(self, db: Session = None):
@@ -88,6 +90,9 @@ class ConnectionService:
         
         self.db.commit()
         self.db.refresh(connection)
+        # Pooled connections and cached results belong to the old settings
+        engine_registry.invalidate(connection_id)
+        result_cache.invalidate_connection(connection_id)
         return connection
     
     def delete_connection(self, connection_id: int, user_id: int) -> bool:
@@ -96,5 +101,7 @@ class ConnectionService:
         if connection:
             self.db.delete(connection)
             self.db.commit()
+            engine_registry.invalidate(connection_id)
+            result_cache.invalidate_connection(connection_id)
             return True
         return False 
\ No newline at end of file
@@ -16,6 +16,9 @@ except ImportError:
     PostgreSQLError = Exception
 import sqlite3
 import logging
+from sqlalchemy.exc import SQLAlchemyError
+from app.core.engine_registry import engine_registry, build_connection_url
+from app.services.schema_introspection import introspect_schema
 
 logger = logging.getLogger(__name__)
 
@@ -133,6 +136,7 @@ class DatabaseService:
             if connection:
                 self.db.delete(connection)
                 self.db.commit()
+                engine_registry.invalidate(connection_id)
                 logger.info(f"Successfully deleted connection {connection_id}")
                 return True
             logger.warning(f"Connection {connection_id} not found for deletion")
@@ -144,120 +148,24 @@ class DatabaseService:
 
     def get_schema(self, connection: Connection) -> Dict[str, Any]:
         """Get the schema of a database"""
-        conn = None
-        cursor = None
+        # Connections that are not saved yet have no id to pool under
+        engine = (
+            engine_registry.get_engine(connection)
+            if connection.id is not None
+            else create_engine(build_connection_url(connection))
+        )
         try:
-            schema = {}
-            
-            if connection.db_type == "mysql":
-                conn = mysql.connector.connect(
-                    host=connection.host,
-                    port=connection.port,
-                    database=connection.database,
-                    user=connection.username,
-                    password=connection.password
-                )
-                cursor = conn.cursor()
-                
-                # Get tables
-                cursor.execute("SHOW TABLES")
-                tables = cursor.fetchall()
-                
-                for table in tables:
-                    table_name = table[0]
-                    cursor.execute(f"DESCRIBE {table_name}")
-                    columns = cursor.fetchall()
-                    schema[table_name] = {
-                        "columns": [
-                            {
-                                "name": col[0],
-                                "type": col[1],
-                                "null": col[2],
-                                "key": col[3],
-                                "default": col[4],
-                                "extra": col[5]
-                            }
-                            for col in columns
-                        ]
-                    }
-            
-            elif connection.db_type == "postgresql":
-                if not psycopg2:
-                    raise ImportError("PostgreSQL support requires psycopg2-binary package")
-                conn = psycopg2.connect(
-                    host=connection.host,
-                    port=connection.port,
-                    dbname=connection.database,
-                    user=connection.username,
-                    password=connection.password
-                )
-                cursor = conn.cursor()
-                
-                # Get tables
-                cursor.execute("""
-                    SELECT table_name 
-                    FROM information_schema.tables 
-                    WHERE table_schema = 'public'
-                """)
-                tables = cursor.fetchall()
-                
-                for table in tables:
-                    table_name = table[0]
-                    cursor.execute(f"""
-                        SELECT column_name, data_type, is_nullable, 
-                               column_default, character_maximum_length
-                        FROM information_schema.columns
-                        WHERE table_name = %s
-                    """, (table_name,))
-                    columns = cursor.fetchall()
-                    schema[table_name] = {
-                        "columns": [
-                            {
-                                "name": col[0],
-                                "type": col[1],
-                                "null": col[2],
-                                "default": col[3],
-                                "length": col[4]
-                            }
-                            for col in columns
-                        ]
-                    }
-            
-            elif connection.db_type == "sqlite":
-                conn = sqlite3.connect(connection.database)
-                cursor = conn.cursor()
-                
-                # Get tables
-                cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-                tables = cursor.fetchall()
-                
-                for table in tables:
-                    table_name = table[0]
-                    cursor.execute(f"PRAGMA table_info({table_name})")
-                    columns = cursor.fetchall()
-                    schema[table_name] = {
-                        "columns": [
-                            {
-                                "name": col[1],
-                                "type": col[2],
-                                "null": not col[3],
-                                "default": col[4],
-                                "primary_key": bool(col[5])
-                            }
-                            for col in columns
-                        ]
-                    }
+            with engine.connect() as conn:
+                schema = introspect_schema(conn, connection.db_type, connection.database)
             
             logger.info(f"Successfully retrieved schema for connection {connection.id}")
             return schema
-        except (MySQLError, PostgreSQLError, sqlite3.Error) as e:
+        except SQLAlchemyError as e:
             logger.error(f"Failed to get schema for connection {connection.id}: {e}")
             raise Exception(f"Failed to get schema: {str(e)}")
         finally:
-            if cursor:
-                cursor.close()
-            if conn:
-                conn.close()
+            if connection.id is None:
+                engine.dispose()
 
     def execute_query(self, connection: Connection, query: str) -> Dict[str, Any]:
         """Execute a query on the database"""
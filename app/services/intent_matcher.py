@@ -0,0 +1,296 @@
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Tuple
+from app.core.config import settings
+from sqlparse.keywords import KEYWORDS_COMMON
+import re
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Phrase -> aggregate; longest phrases are tried first
+AGGREGATE_PHRASES = {
+    "total number of": "COUNT", "number of": "COUNT", "how many": "COUNT", "count of": "COUNT", "count": "COUNT",
+    "average": "AVG", "avg": "AVG", "mean": "AVG",
+    "maximum": "MAX", "max": "MAX", "highest": "MAX", "largest": "MAX", "most expensive": "MAX", "latest": "MAX",
+    "minimum": "MIN", "min": "MIN", "lowest": "MIN", "smallest": "MIN", "cheapest": "MIN", "earliest": "MIN",
+    "total": "SUM", "sum of": "SUM", "sum": "SUM"
+}
+_AGGREGATE_RE = re.compile(r"\b(" + "|".join(sorted(AGGREGATE_PHRASES, key=len, reverse=True)) + r")\b")
+_GROUP_RE = re.compile(r"\b(?:(?:in|for)\s+(?:each|every)|per|by(?:\s+each)?|grouped\s+by)\s+(\w+)$")
+_TOP_RE = re.compile(r"^top\s+(\d{1,4})\s+(.+?)\s+by\s+(.+)$")
+
+# Words that add no meaning to an aggregate question
+STOPWORDS = {
+    "a", "an", "the", "of", "all", "are", "is", "was", "were", "there", "what", "whats", "show", "find", "list",
+    "get", "give", "me", "calculate", "compute", "tell", "display", "return", "across", "among", "for", "in",
+    "do", "does", "we", "have", "our", "value", "values", "amount", "overall", "entire", "every", "each",
+    "how", "many", "number", "count", "total"
+}
+# Words that mean the question filters, compares or combines; the model handles those
+DISQUALIFIERS = {
+    "with", "without", "where", "who", "whose", "which", "that", "above", "below", "over", "under", "than",
+    "between", "not", "except", "and", "or", "only", "having", "greater", "less", "more", "fewer", "least",
+    "before", "after", "since", "during", "percentage", "percent", "ratio", "rate", "distinct", "unique",
+    "different", "compare", "versus", "vs", "if", "when", "whether", "like", "same"
+}
+# Words reserved in MySQL, PostgreSQL or SQLite that turn up as table or column names.
+# SQL is built with bare identifiers, so a schema using one of these goes to the model.
+RESERVED_WORDS = set(KEYWORDS_COMMON) | {
+    "ALL", "ANALYSE", "ANALYZE", "ANY", "ASC", "BETWEEN", "BOTH", "CHECK", "COLLATE", "COLUMN", "CONDITION",
+    "CONSTRAINT", "CROSS", "CURRENT_DATE", "CURRENT_TIME", "CURRENT_TIMESTAMP", "CURRENT_USER", "DEFAULT",
+    "DESC", "DESCRIBE", "EXCEPT", "EXISTS", "FETCH", "FOREIGN", "GROUPS", "HAVING", "INDEX", "INTERSECT",
+    "INTERVAL", "INTO", "IS", "KEY", "KEYS", "LEADING", "LIMIT", "LOCK", "MATCH", "NATURAL", "NOT", "NULL",
+    "OFFSET", "OPTION", "PRIMARY", "RANGE", "RANK", "READ", "REFERENCES", "RELEASE", "RIGHT", "ROW", "ROWS",
+    "SCHEMA", "SHOW", "TABLE", "TO", "TRAILING", "UNION", "UNIQUE", "USER", "USING", "VALUES", "WINDOW", "WITH"
+}
+NUMERIC_TYPES = ("int", "dec", "num", "float", "double", "real", "money")
+ORDERED_TYPES = NUMERIC_TYPES + ("date", "time", "year")
+
+class SchemaIndex:
+    """Tables, columns and foreign keys parsed from the prompt schema text"""
+
+    def __init__(self, schema: str):
+        self.tables: Dict[str, List[Tuple[str, str]]] = {}
+        self.links: Dict[Tuple[str, str], Optional[Tuple[str, str]]] = {}
+        current: Optional[str] = None
+        for line in schema.splitlines():
+            table = re.match(r"^Table:\s*(\w+)", line)
+            if table:
+                current = table.group(1)
+                self.tables[current] = []
+                continue
+            column = re.match(r"^\s+-\s+(\w+)\s+\(((?:[^()]|\([^()]*\))*)\)", line)
+            if column and current is not None:
+                self.tables[current].append((column.group(1), column.group(2).lower()))
+                continue
+            link = re.match(r"^\s+-\s+(\w+)\.(\w+)\s+->\s+(\w+)\.(\w+)", line)
+            if link:
+                child, child_column, parent, parent_column = link.groups()
+                # Several links between one pair of tables make the join ambiguous
+                self.links[(child, parent)] = None if (child, parent) in self.links else (child_column, parent_column)
+            elif not line.strip():
+                current = None
+
+        self._table_words = {}
+        for table in self.tables:
+            for word in {table.lower(), singular(table.lower())}:
+                self._table_words[word] = table
+
+    def table(self, word: str) -> Optional[str]:
+        return self._table_words.get(word) or self._table_words.get(singular(word))
+
+    def column_type(self, table: str, column: str) -> str:
+        return next(data_type for name, data_type in self.tables[table] if name == column)
+
+    def label(self, table: str) -> str:
+        """The column that names a row: name, title, *_name, or the first text column"""
+        columns = self.tables[table]
+        for column, _ in columns:
+            if column in ("name", "title") or column.endswith("_name"):
+                return column
+        for column, data_type in columns:
+            if "char" in data_type or "text" in data_type:
+                return column
+        return columns[0][0]
+
+    def resolve_column(self, words: List[str], table: Optional[str]) -> Tuple[Optional[Tuple[str, str]], float, set]:
+        """Best (table, column) for the words, with a confidence and the words it explains.
+
+        A column scores by the share of its name parts found in the words;
+        ties are broken by the named table, and an unbroken tie across
+        tables is reported with low confidence.
+        """
+        stems = {singular(word) for word in words}
+        scored = []
+        for candidate_table, columns in self.tables.items():
+            if table is not None and candidate_table != table:
+                continue
+            for column, _ in columns:
+                parts = [singular(part) for part in column.lower().split("_") if part]
+                matched = [part for part in parts if part in stems]
+                if matched:
+                    scored.append((len(matched) / len(parts), len(matched), candidate_table, column, set(matched)))
+        if not scored:
+            return None, 0.0, set()
+
+        scored.sort(key=lambda item: (item[0], item[1]), reverse=True)
+        best = scored[0]
+        ties = [item for item in scored if item[:2] == best[:2]]
+        confidence = best[0] if len(ties) == 1 else best[0] * 0.5
+        explained = {word for word in words if singular(word) in best[4]}
+        return (best[2], best[3]), confidence, explained
+
+@lru_cache(maxsize=64)
+def schema_index(schema: str) -> SchemaIndex:
+    return SchemaIndex(schema)
+
+def singular(word: str) -> str:
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    if word.endswith(("sses", "xes", "ches", "shes")):
+        return word[:-2]
+    if word.endswith("s") and not word.endswith("ss") and len(word) > 3:
+        return word[:-1]
+    return word
+
+class IntentMatch:
+    def __init__(self, sql: str, confidence: float, intent: str):
+        self.sql = sql
+        self.confidence = confidence
+        self.intent = intent
+
+class IntentMatcher:
+    """Answers simple aggregate questions with SQL built straight from the schema.
+
+    Handles COUNT/AVG/SUM/MAX/MIN over one table or column, optionally per
+    row of a directly related table, and "top N <table> by <column>".
+    Every remaining word must be explained by a table or column name;
+    filters, comparisons and unresolved words lower the confidence so the
+    question goes to the model instead.
+    """
+
+    def __init__(self, min_confidence: float = settings.INTENT_MATCH_MIN_CONFIDENCE):
+        self.min_confidence = min_confidence
+        self._lock = threading.Lock()
+        self._stats = {"questions": 0, "hits": 0, "low_confidence": 0, "no_intent": 0, "match_seconds": 0.0}
+
+    def match(self, question: str, schema: str) -> Optional[IntentMatch]:
+        """Return a match at or above the confidence threshold, or None"""
+        started = time.perf_counter()
+        result = self._match(question, schema)
+        elapsed = time.perf_counter() - started
+
+        outcome = "no_intent" if result is None else "hits" if result.confidence >= self.min_confidence else "low_confidence"
+        with self._lock:
+            self._stats["questions"] += 1
+            self._stats[outcome] += 1
+            self._stats["match_seconds"] += elapsed
+        if outcome == "low_confidence":
+            logger.debug(f"Intent match below threshold ({result.confidence:.2f}): {result.sql}")
+        return result if outcome == "hits" else None
+
+    def _match(self, question: str, schema: str) -> Optional[IntentMatch]:
+        index = schema_index(schema)
+        text = re.sub(r"[^\w\s]", " ", question.lower())
+        text = " ".join(text.split())
+        # Drop the politeness and framing around the actual question
+        text = re.sub(r"^(?:(?:please|can you|could you)\s+)*(?:show|find|list|get|give|calculate|compute|tell|display|return)?\s*(?:me\s+)?", "", text)
+
+        top = _TOP_RE.match(text)
+        if top:
+            return self._match_top(index, int(top.group(1)), top.group(2).split(), top.group(3).split())
+
+        found = _AGGREGATE_RE.search(text)
+        if not found:
+            return None
+        aggregate = AGGREGATE_PHRASES[found.group(1)]
+        intent = found.group(1)
+        rest = (text[:found.start()] + " " + text[found.end():]).strip()
+
+        group = None
+        grouped = _GROUP_RE.search(rest)
+        if grouped:
+            group = index.table(grouped.group(1))
+            if group is None:
+                return None
+            rest = rest[:grouped.start()]
+
+        words = [word for word in rest.split() if word not in STOPWORDS]
+        if any(word in DISQUALIFIERS or word.isdigit() for word in words):
+            return None
+
+        tables = {index.table(word) for word in words} - {None}
+        if len(tables) > 1:
+            return None
+        named_table = next(iter(tables), None)
+
+        if aggregate == "COUNT":
+            if named_table is None:
+                return None
+            leftover = [word for word in words if index.table(word) != named_table]
+            return self._build(index, "COUNT", named_table, None, group, _penalty(leftover), intent)
+
+        resolved, confidence, explained = index.resolve_column(words, named_table)
+        if resolved is None:
+            return None
+        table, column = resolved
+
+        allowed_types = NUMERIC_TYPES if aggregate in ("AVG", "SUM") else ORDERED_TYPES
+        if not any(kind in index.column_type(table, column) for kind in allowed_types):
+            return None
+        leftover = [word for word in words if word not in explained and index.table(word) != table]
+        if named_table is None:
+            confidence *= 0.9  # the table was inferred from the column alone
+        return self._build(index, aggregate, table, column, group, confidence * _penalty(leftover), intent)
+
+    def _match_top(self, index: SchemaIndex, limit: int, table_words: List[str], column_words: List[str]) -> Optional[IntentMatch]:
+        table_words = [word for word in table_words if word not in STOPWORDS]
+        if len(table_words) != 1 or index.table(table_words[0]) is None:
+            return None
+        table = index.table(table_words[0])
+        column_words = [word for word in column_words if word not in STOPWORDS]
+        if any(word in DISQUALIFIERS for word in column_words):
+            return None
+        resolved, confidence, explained = index.resolve_column(column_words, table)
+        if resolved is None:
+            return None
+        leftover = [word for word in column_words if word not in explained]
+        if _reserved(table, resolved[1]):
+            return None
+        sql = f"SELECT * FROM {table} ORDER BY {table}.{resolved[1]} DESC LIMIT {limit};"
+        return IntentMatch(sql, confidence * _penalty(leftover), "top")
+
+    def _build(self, index: SchemaIndex, aggregate: str, table: str, column: Optional[str],
+               group: Optional[str], confidence: float, intent: str) -> Optional[IntentMatch]:
+        if _reserved(table, column):
+            return None
+        if aggregate == "COUNT":
+            measure, alias = "COUNT(*)", f"total_{table}"
+        else:
+            measure, alias = f"{aggregate}({table}.{column})", f"{aggregate.lower()}_{column}"
+
+        if group is None:
+            return IntentMatch(f"SELECT {measure} AS {alias} FROM {table};", confidence, intent)
+
+        link = index.links.get((table, group))
+        if link is None:
+            return None
+        child_column, parent_column = link
+        label = index.label(group)
+        if _reserved(group, label, child_column, parent_column):
+            return None
+        if aggregate == "COUNT":
+            # Left join so groups without rows still show a count of zero
+            measure, alias, join = f"COUNT({table}.{child_column})", f"{table}_count", "LEFT JOIN"
+        else:
+            join = "JOIN"
+        sql = (
+            f"SELECT {group}.{label}, {measure} AS {alias} FROM {group} "
+            f"{join} {table} ON {table}.{child_column} = {group}.{parent_column} "
+            f"GROUP BY {group}.{parent_column}, {group}.{label};"
+        )
+        return IntentMatch(sql, confidence, intent)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        questions = stats.pop("questions")
+        match_seconds = stats.pop("match_seconds")
+        return {
+            "questions": questions,
+            **stats,
+            "hit_rate": round(stats["hits"] / questions, 4) if questions else 0.0,
+            "avg_match_us": round(match_seconds / questions * 1e6, 1) if questions else 0.0,
+            "min_confidence": self.min_confidence
+        }
+
+def _reserved(*identifiers: Optional[str]) -> bool:
+    return any(name is not None and name.upper() in RESERVED_WORDS for name in identifiers)
+
+def _penalty(leftover: List[str]) -> float:
+    """Each word nothing accounts for halves the confidence"""
+    return 0.5 ** len(leftover)
+
+intent_matcher = IntentMatcher()
@@ -0,0 +1,237 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, List, Optional, Tuple
+from app.core.config import settings
+from app.core.http_client import model_client
+import asyncio
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+class ModelBackendError(Exception):
+    """Raised when no configured backend produced SQL for a question"""
+
+class GenerationRequest:
+    """One question to answer; the LLM prompt is only built if a model backend needs it"""
+
+    def __init__(self, question: str, schema: str, prompt_builder: Callable[[], str]):
+        self.question = question
+        self.schema = schema
+        self._prompt_builder = prompt_builder
+        self._prompt: Optional[str] = None
+
+    @property
+    def prompt(self) -> str:
+        if self._prompt is None:
+            self._prompt = self._prompt_builder()
+        return self._prompt
+
+class ModelBackend:
+    """A way of turning a question into SQL text.
+
+    ``expected_ms`` seeds the latency estimate the router orders backends
+    by; it is replaced by a moving average of real answers as they come in.
+    """
+
+    name = "base"
+    expected_ms = 1000.0
+
+    def __init__(self):
+        self.latency_ms = self.expected_ms
+        self._stats = {"calls": 0, "answered": 0, "declined": 0, "failures": 0}
+
+    def can_handle(self, request: GenerationRequest) -> bool:
+        return True
+
+    async def generate(self, request: GenerationRequest) -> Optional[str]:
+        raise NotImplementedError
+
+    def record(self, outcome: str, elapsed_ms: float = 0.0) -> None:
+        self._stats["calls"] += 1
+        self._stats[outcome] += 1
+        if outcome == "answered":
+            self.latency_ms = 0.8 * self.latency_ms + 0.2 * elapsed_ms
+        elif outcome == "failures":
+            # A failing backend drifts behind the others until it answers again
+            self.latency_ms *= 2
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self._stats, "latency_ms": round(self.latency_ms, 3)}
+
+    def close(self) -> None:
+        pass
+
+class RemoteHTTPBackend(ModelBackend):
+    """Hosted text-generation endpoint (Hugging Face Inference API format) over the shared client"""
+
+    name = "remote"
+    expected_ms = 3000.0
+
+    def __init__(self, api_url: str, api_key: Optional[str], parameters: Dict[str, Any]):
+        super().__init__()
+        self.api_url = api_url
+        self.headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        self.parameters = parameters
+
+    def can_handle(self, request: GenerationRequest) -> bool:
+        return bool(self.headers)
+
+    async def complete(self, prompt: str, parameters: Optional[Dict[str, Any]] = None) -> str:
+        """Return the generated text for a raw prompt"""
+        response_json = await model_client.post_json(
+            self.api_url,
+            {"inputs": prompt, "parameters": parameters or self.parameters},
+            headers=self.headers
+        )
+        return response_json[0]["generated_text"]
+
+    async def generate(self, request: GenerationRequest) -> Optional[str]:
+        return await self.complete(request.prompt)
+
+class LocalModelBackend(ModelBackend):
+    """In-process CPU model through llama.cpp (GGUF file) or a transformers pipeline.
+
+    Neither library is a hard dependency; the model is imported and loaded
+    on first use. Inference runs on one dedicated thread so it never blocks
+    the event loop and calls never compete for the same weights.
+    """
+
+    name = "local"
+    expected_ms = 1500.0
+
+    def __init__(self, model_path: Optional[str], kind: str, threads: int, context: int, max_tokens: int):
+        super().__init__()
+        self.model_path = model_path
+        self.kind = kind
+        self.threads = threads
+        self.context = context
+        self.max_tokens = max_tokens
+        self._model = None
+        self._load_error: Optional[str] = None
+        self._load_lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def can_handle(self, request: GenerationRequest) -> bool:
+        return bool(self.model_path) and self._load_error is None
+
+    def _load(self):
+        with self._load_lock:
+            if self._model is not None:
+                return self._model
+            started = time.perf_counter()
+            try:
+                if self.kind == "llama_cpp":
+                    from llama_cpp import Llama
+                    self._model = Llama(
+                        model_path=self.model_path,
+                        n_ctx=self.context,
+                        n_threads=self.threads,
+                        verbose=False
+                    )
+                elif self.kind == "transformers":
+                    import torch
+                    from transformers import pipeline
+                    torch.set_num_threads(self.threads)
+                    self._model = pipeline("text-generation", model=self.model_path, device=-1)
+                else:
+                    raise ValueError(f"Unknown local model kind '{self.kind}'")
+            except Exception as e:
+                # Stop routing to this backend rather than failing every question
+                self._load_error = str(e)
+                logger.error(f"Local model unavailable: {self._load_error}")
+                raise
+            logger.info(f"Loaded local {self.kind} model {self.model_path} in {time.perf_counter() - started:.1f}s")
+            return self._model
+
+    def _complete(self, prompt: str) -> str:
+        model = self._load()
+        if self.kind == "llama_cpp":
+            output = model(prompt, max_tokens=self.max_tokens, temperature=0.1, top_p=0.95)
+            return output["choices"][0]["text"]
+        output = model(prompt, max_new_tokens=self.max_tokens, do_sample=False, return_full_text=False)
+        return output[0]["generated_text"]
+
+    async def generate(self, request: GenerationRequest) -> Optional[str]:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="local-model")
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self._complete, request.prompt)
+
+    def stats(self) -> Dict[str, Any]:
+        return {**super().stats(), "loaded": self._model is not None, "load_error": self._load_error}
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+class ModelRouter:
+    """Sends each question to the fastest backend that can answer it.
+
+    Backends are tried in order of their current latency estimate. One that
+    declines or fails passes the question on to the next.
+    """
+
+    def __init__(self, backends: List[ModelBackend]):
+        self.backends = backends
+
+    def get(self, name: str) -> Optional[ModelBackend]:
+        return next((backend for backend in self.backends if backend.name == name), None)
+
+    async def generate(self, question: str, schema: str, prompt_builder: Callable[[], str]) -> Tuple[str, str]:
+        """Return (generated text, backend name)"""
+        request = GenerationRequest(question, schema, prompt_builder)
+        errors = []
+        for backend in sorted(self.backends, key=lambda b: b.latency_ms):
+            if not backend.can_handle(request):
+                continue
+            started = time.perf_counter()
+            try:
+                generated_text = await backend.generate(request)
+            except Exception as e:
+                backend.record("failures")
+                errors.append(f"{backend.name}: {str(e)}")
+                logger.warning(f"Model backend {backend.name} failed: {str(e)}")
+                continue
+            if not generated_text:
+                backend.record("declined")
+                continue
+            backend.record("answered", (time.perf_counter() - started) * 1000)
+            return generated_text, backend.name
+        raise ModelBackendError("; ".join(errors) or "No model backend could answer the question")
+
+    def stats(self) -> Dict[str, Any]:
+        return {backend.name: backend.stats() for backend in self.backends}
+
+    def close(self) -> None:
+        for backend in self.backends:
+            backend.close()
+
+def create_backend(name: str) -> Optional[ModelBackend]:
+    if name == "local":
+        return LocalModelBackend(
+            settings.LOCAL_MODEL_PATH,
+            settings.LOCAL_MODEL_KIND,
+            settings.LOCAL_MODEL_THREADS,
+            settings.LOCAL_MODEL_CONTEXT,
+            settings.LOCAL_MODEL_MAX_TOKENS
+        )
+    if name == "remote":
+        return RemoteHTTPBackend(
+            f"https://api-inference.huggingface.co/models/{settings.HUGGINGFACE_MODEL}",
+            settings.HUGGINGFACE_API_KEY,
+            {
+                "max_new_tokens": 256,
+                "temperature": 0.1,
+                "top_p": 0.95,
+                "do_sample": True,
+                "return_full_text": False
+            }
+        )
+    logger.warning(f"Unknown model backend '{name}', skipping")
+    return None
+
+def create_model_router(names: List[str] = settings.MODEL_BACKENDS) -> ModelRouter:
+    return ModelRouter([backend for backend in map(create_backend, names) if backend is not None])
+
+model_router = create_model_router()
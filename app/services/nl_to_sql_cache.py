@@ -0,0 +1,161 @@
+from collections import OrderedDict, Counter
+from typing import Dict, Any, Optional, Tuple
+from app.core.config import settings
+import hashlib
+import math
+import re
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+def normalize_question(question: str) -> str:
+    """Normalize question text so trivial differences share a cache key"""
+    text = question.lower().strip()
+    text = re.sub(r"^\d+[.)]\s*", "", text)  # leading list numbering
+    text = re.sub(r"[^\w\s.]", " ", text)
+    text = re.sub(r"\.(?!\d)", " ", text)  # keep decimal points, drop full stops
+    return " ".join(text.split())
+
+def schema_hash(schema: str) -> str:
+    """Hash the schema text a question was answered against"""
+    return hashlib.sha256((schema or "").encode()).hexdigest()[:16]
+
+def _ngram_vector(text: str, n: int = 3) -> Counter:
+    padded = f" {text} "
+    return Counter(padded[i:i + n] for i in range(len(padded) - n + 1))
+
+def _cosine(a: Counter, b: Counter) -> float:
+    if not a or not b:
+        return 0.0
+    dot = sum(count * b[gram] for gram, count in a.items() if gram in b)
+    norm = math.sqrt(sum(v * v for v in a.values())) * math.sqrt(sum(v * v for v in b.values()))
+    return dot / norm if norm else 0.0
+
+class _CacheEntry:
+    def __init__(self, result: Dict[str, Any], question: str, numbers: Tuple[str, ...], vector: Counter):
+        self.result = result
+        self.question = question
+        self.numbers = numbers
+        self.vector = vector
+        self.created_at = time.monotonic()
+
+class NLToSQLCache:
+    """LRU/TTL cache of generated SQL keyed by normalized question and schema hash.
+
+    The optional similarity tier matches near-duplicate phrasing using
+    character trigram vectors. It only matches questions that contain the
+    same numbers, so "GPA above 3.5" never reuses the SQL for "above 3.0".
+    """
+
+    def __init__(
+        self,
+        max_entries: int = settings.NL_SQL_CACHE_MAX_ENTRIES,
+        ttl: int = settings.NL_SQL_CACHE_TTL,
+        similarity_enabled: bool = settings.NL_SQL_CACHE_SIMILARITY_ENABLED,
+        similarity_threshold: float = settings.NL_SQL_CACHE_SIMILARITY_THRESHOLD
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.similarity_enabled = similarity_enabled
+        self.similarity_threshold = similarity_threshold
+        self._entries: "OrderedDict[Tuple[str, str], _CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {
+            "exact_hits": 0,
+            "similar_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "invalidations": 0
+        }
+
+    def get(self, question: str, schema: str) -> Optional[Dict[str, Any]]:
+        """Return a cached generation result for the question, if any"""
+        normalized = normalize_question(question)
+        key = (schema_hash(schema), normalized)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry):
+                del self._entries[key]
+                self._stats["expirations"] += 1
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._stats["exact_hits"] += 1
+                return dict(entry.result)
+
+            if self.similarity_enabled:
+                match = self._find_similar_locked(key[0], normalized)
+                if match is not None:
+                    self._entries.move_to_end(match)
+                    self._stats["similar_hits"] += 1
+                    return dict(self._entries[match].result)
+
+            self._stats["misses"] += 1
+            return None
+
+    def put(self, question: str, schema: str, result: Dict[str, Any]) -> None:
+        """Store a successful generation result"""
+        normalized = normalize_question(question)
+        key = (schema_hash(schema), normalized)
+        entry = _CacheEntry(
+            dict(result),
+            normalized,
+            tuple(re.findall(r"\d+(?:\.\d+)?", normalized)),
+            _ngram_vector(normalized) if self.similarity_enabled else Counter()
+        )
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def invalidate_schema(self, schema: str) -> int:
+        """Drop every entry generated against the given schema text"""
+        target = schema_hash(schema)
+        with self._lock:
+            stale = [key for key in self._entries if key[0] == target]
+            for key in stale:
+                del self._entries[key]
+            self._stats["invalidations"] += len(stale)
+        if stale:
+            logger.info(f"Invalidated {len(stale)} cached SQL generations after schema change")
+        return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and the overall hit rate"""
+        with self._lock:
+            hits = self._stats["exact_hits"] + self._stats["similar_hits"]
+            lookups = hits + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "similarity_enabled": self.similarity_enabled
+            }
+
+    def _expired(self, entry: _CacheEntry) -> bool:
+        return time.monotonic() - entry.created_at > self.ttl
+
+    def _find_similar_locked(self, schema_key: str, normalized: str) -> Optional[Tuple[str, str]]:
+        """Find the closest live entry for the same schema above the threshold"""
+        numbers = tuple(re.findall(r"\d+(?:\.\d+)?", normalized))
+        vector = _ngram_vector(normalized)
+        best_key, best_score = None, self.similarity_threshold
+        for key, entry in self._entries.items():
+            if key[0] != schema_key or entry.numbers != numbers or self._expired(entry):
+                continue
+            score = _cosine(vector, entry.vector)
+            if score >= best_score:
+                best_key, best_score = key, score
+        return best_key
+
+nl_to_sql_cache = NLToSQLCache()
@@ -1,25 +1,27 @@
 from typing import Dict, Any, Optional
-import aiohttp
 from app.core.config import settings
+from app.services.nl_to_sql_cache import nl_to_sql_cache
+from app.services.model_backends import model_router, ModelBackendError
+from app.services.intent_matcher import intent_matcher
+from app.services.schema_retrieval import schema_retriever
+from app.core.structured_logging import category_logger
 import re
+import time
 import logging
 from sqlalchemy import text
 from fastapi import HTTPException
 import sqlparse
 
 logger = logging.getLogger(__name__)
+prompt_logger = category_logger("prompt")
+model_logger = category_logger("model")
 
 class NLToSQLService:
-    def __init__(self):
-        self.api_url = f"https://api-inference.huggingface.co/models/mistralai/Mistral-7B-Instruct-v0.2"
-        self.headers = {"Authorization": f"Bearer {settings.HUGGINGFACE_API_KEY}"}
-        self.model_params = {
-            "max_new_tokens": 256,
-            "temperature": 0.1,
-            "top_p": 0.95,
-            "do_sample": True,
-            "return_full_text": False
-        }
+    def __init__(self, cache=nl_to_sql_cache, router=model_router, matcher=intent_matcher, retriever=schema_retriever):
+        self.cache = cache if settings.NL_SQL_CACHE_ENABLED else None
+        self.router = router
+        self.matcher = matcher if settings.INTENT_MATCHER_ENABLED else None
+        self.retriever = retriever if settings.SCHEMA_PRUNING_ENABLED else None
         
         self.dangerous_keywords = {
             'DROP', 'DELETE', 'TRUNCATE', 'UPDATE', 'INSERT', 'ALTER', 'CREATE',
@@ -35,6 +37,9 @@ class NLToSQLService:
     
     def create_prompt(self, question: str, schema_info: str) -> str:
         """Create a detailed prompt for Mistral model"""
+        # Large schemas are cut down to the tables this question needs
+        if self.retriever is not None:
+            schema_info = self.retriever.prune_prompt(question, schema_info)
         return f"""<s>[INST] You are an expert SQL developer. Convert the following natural language question into a SQL query based on the given database schema.
 
 Database Schema:
@@ -201,6 +206,22 @@ Generate a SQL query that answers this question. Return ONLY the SQL query, noth
     async def generate_sql(self, natural_query: str, schema: str) -> Dict[str, Any]:
         """Generate SQL from natural language query"""
         try:
+            # Simple aggregates are answered from the schema without a model call
+            if self.matcher is not None:
+                match = self.matcher.match(natural_query, schema)
+                if match is not None and await self.validate_sql(match.sql):
+                    return {
+                        "success": True,
+                        "sql": match.sql,
+                        "explanation": f"Generated SQL query: {match.sql}"
+                    }
+
+            # Serve repeated questions against the same schema from cache
+            if self.cache is not None:
+                cached = self.cache.get(natural_query, schema)
+                if cached is not None:
+                    return cached
+
             # Generate SQL using AI model
             sql_query = await self._generate_raw_sql(natural_query, schema)
             
@@ -220,11 +241,14 @@ Generate a SQL query that answers this question. Return ONLY the SQL query, noth
                 logger.error(f"SQL parsing error: {str(e)}")
                 raise ValueError("Generated SQL is not valid")
             
-            return {
+            result = {
                 "success": True,
                 "sql": cleaned_query,
                 "explanation": f"Generated SQL query: {cleaned_query}"
             }
+            if self.cache is not None:
+                self.cache.put(natural_query, schema, result)
+            return result
             
         except Exception as e:
             logger.error(f"Error generating SQL: {str(e)}")
@@ -234,51 +258,34 @@ Generate a SQL query that answers this question. Return ONLY the SQL query, noth
             }
 
     async def _generate_raw_sql(self, natural_query: str, schema: str) -> str:
-        """Generate raw SQL using AI model"""
-        try:
-            print("\nGenerating SQL for question:", natural_query)
-            print("\nUsing schema:")
-            print("-" * 50)
-            print(schema)
-            print("-" * 50)
-            
+        """Generate raw SQL with the fastest model backend that can answer"""
+        def build_prompt() -> str:
             prompt = self.create_prompt(natural_query, schema)
-            print("\nGenerated prompt:")
-            print("-" * 50)
-            print(prompt)
-            print("-" * 50)
-            
-            # Make API call to Hugging Face using aiohttp
-            print("\nMaking API call to Hugging Face...")
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    self.api_url,
-                    headers=self.headers,
-                    json={
-                        "inputs": prompt,
-                        "parameters": self.model_params
-                    }
-                ) as response:
-                    if response.status != 200:
-                        error_msg = f"API request failed with status {response.status}: {await response.text()}"
-                        print("\nError:", error_msg)
-                        return ""
+            prompt_logger.debug("Model prompt", extra={"fields": {
+                "question": natural_query,
+                "schema_chars": len(schema),
+                "prompt": prompt
+            }})
+            return prompt
 
-                    # Extract and clean SQL from response
-                    print("\nGot response from API, extracting SQL...")
-                    response_json = await response.json()
-                    generated_text = response_json[0]["generated_text"]
-                    print("\nRaw generated text:")
-                    print("-" * 50)
-                    print(generated_text)
-                    print("-" * 50)
-                    
-                    return generated_text
+        try:
+            started = time.perf_counter()
+            try:
+                generated_text, backend = await self.router.generate(natural_query, schema, build_prompt)
+            except ModelBackendError as e:
+                logger.error(f"Model request failed: {str(e)}")
+                return ""
+
+            model_logger.debug("Model response", extra={"fields": {
+                "backend": backend,
+                "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+                "generated_text": generated_text
+            }})
+            
+            return generated_text
 
         except Exception as e:
-            import traceback
-            error_msg = f"Failed to generate SQL: {str(e)}\n{traceback.format_exc()}"
-            print("\nError:", error_msg)
+            logger.exception(f"Failed to generate SQL: {str(e)}")
             return ""
 
     def _generate_query_explanation(self, query: str) -> str:
@@ -318,4 +325,7 @@ Generate a SQL query that answers this question. Return ONLY the SQL query, noth
             parts.append("calculating aggregate values")
         
         explanation = " and ".join(parts)
-        return f"This query is {explanation}." 
\ No newline at end of file
+        return f"This query is {explanation}."
+
+# Shared instance so per-request services do not rebuild it
+nl_to_sql_service = NLToSQLService()
@@ -1,11 +1,19 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
 from app.models.database import QueryHistory
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 import time
 from datetime import datetime
 from app.models.connection import Connection
 from app.services.database import DatabaseService
+from app.services.result_cache import result_cache
+from app.core.db_executor import db_executor
+from app.core.engine_registry import engine_registry
+from app.core.query_timeout import QueryCanceller
+from app.services.query_cost import query_cost_guard
+from app.services.result_format import to_columnar, to_records
+from app.services.schema_introspection import load_stored_schema
+from app.services.schema_retrieval import schema_retriever
 import openai
 from app.core.config import settings
 
@@ -24,21 +32,40 @@ class QueryService:
         """Execute a SQL query on the connected database"""
         start_time = time.time()
         try:
-            # Create connection string
-            if connection.db_type == "sqlite":
-                conn_str = f"sqlite:///{connection.database}"
-            elif connection.db_type == "postgresql":
-                conn_str = f"postgresql://{connection.username}:{connection.password}@{connection.host}:{connection.port}/{connection.database}"
-            else:  # MySQL
-                conn_str = f"mysql+mysqlconnector://{connection.username}:{connection.password}@{connection.host}:{connection.port}/{connection.database}"
-
-            # Execute query
-            engine = create_engine(conn_str)
-            with engine.connect() as conn:
-                result = conn.execute(text(sql_query))
-                rows = [dict(row) for row in result]
+            # Serve repeated identical SELECTs from the opt-in result cache
+            cached = result_cache.get(connection.id, sql_query, namespace="query")
+            if cached is not None:
+                execution_time = time.time() - start_time
+                # Cache hits still belong in the history the dashboard reads
+                await self._record_query_history(
+                    connection.id,
+                    sql_query,
+                    execution_time,
+                    "success",
+                    user_id=user_id
+                )
+                return {
+                    "columns": cached["columns"],
+                    "rows": cached["rows"],
+                    "execution_time": execution_time,
+                    "row_count": len(cached["rows"]),
+                    "truncated": cached.get("truncated", False),
+                    "cached": True
+                }
+
+            # Execute query off the event loop on the pooled engine, which
+            # enforces the statement timeout; cancelling kills it server-side
+            engine = engine_registry.get_engine(connection)
+            canceller = QueryCanceller(engine, connection.db_type)
+            columns, rows, truncated = await db_executor.run(
+                connection.id, self._fetch_rows, connection, engine, sql_query, canceller,
+                on_cancel=canceller.cancel
+            )
 
             execution_time = time.time() - start_time
+            result_cache.put(
+                connection.id, sql_query, {"columns": columns, "rows": rows, "truncated": truncated}, namespace="query"
+            )
 
             # Record query history
             await self._record_query_history(
@@ -50,9 +77,11 @@ class QueryService:
             )
 
             return {
+                "columns": columns,
                 "rows": rows,
                 "execution_time": execution_time,
-                "row_count": len(rows)
+                "row_count": len(rows),
+                "truncated": truncated
             }
 
         except Exception as e:
@@ -68,6 +97,24 @@ class QueryService:
             )
             raise Exception(f"Query execution failed: {str(e)}")
 
+    def _fetch_rows(self, connection: Connection, engine, sql_query: str, canceller: QueryCanceller) -> Tuple[List[str], List[tuple], bool]:
+        """Run a statement and return its column names, row tuples and whether rows were cut off (blocking).
+
+        Rows stay positional; dicts are only built if a caller asks for records.
+        """
+        with engine.connect() as conn, canceller.attached(conn):
+            # Raises QueryCostError under a reject policy
+            reviewed, problems = query_cost_guard.review(conn, connection.db_type, connection.id, sql_query)
+            result = conn.execute(text(reviewed))
+            columns = list(result.keys())
+            if not (problems and query_cost_guard.policy_for(connection.id) == "limit"):
+                return columns, [tuple(row) for row in result], False
+            # The limit policy asks for one row past its cap to detect truncation
+            max_rows = query_cost_guard.limit_rows
+            rows = [tuple(row) for row in result.fetchmany(max_rows)]
+            truncated = len(rows) >= max_rows and result.fetchone() is not None
+            return columns, rows, truncated
+
     async def get_query_history(
         self,
         connection_id: int,
@@ -128,24 +175,33 @@ class QueryService:
         self, 
         connection_id: int,
         user_id: int,
-        query: str
+        query: str,
+        result_format: str = "records"
     ) -> Dict[str, Any]:
-        """Process a natural language query and convert it to SQL"""
+        """Process a natural language query and convert it to SQL.
+
+        ``result_format`` picks the results layout: records (list of dicts),
+        or rows/columns for the compact payloads in app.services.result_format.
+        """
         try:
             # Get the connection
             connection = self.database_service.get_connection(connection_id, user_id)
             if not connection:
                 raise ValueError("Connection not found")
 
-            # Get the database schema
-            schema = connection.schema
-            if not schema:
-                schema = self.database_service.get_schema(connection)
+            # Get the database schema; the chat path may have stored prompt text instead
+            schema = load_stored_schema(connection.schema)
+            if schema is None:
+                schema = await db_executor.run(connection.id, self.database_service.get_schema, connection)
                 connection.schema = schema
                 self.db.commit()
+            elif connection.schema_hash is None:
+                # Stored before schemas were hashed
+                connection.schema = connection.schema
+                self.db.commit()
 
             # Convert schema to string format for OpenAI
-            schema_str = self._format_schema_for_prompt(schema)
+            schema_str = self._format_schema_for_prompt(schema, query, f"{connection.id}:{connection.schema_hash}")
 
             # Create the prompt for OpenAI
             prompt = f"""Given the following database schema:
@@ -201,17 +257,33 @@ Return only the SQL query without any explanation."""
                 "execution_time": execution_time,
                 "status": status,
                 "error_message": error_message,
-                "results": results["rows"] if results else None,
-                "row_count": results["row_count"] if results else 0
+                "results": self._shape_results(results, result_format) if results else None,
+                "row_count": results["row_count"] if results else 0,
+                "truncated": results["truncated"] if results else False
             }
 
         except Exception as e:
             raise Exception(f"Failed to process natural language query: {str(e)}")
 
-    def _format_schema_for_prompt(self, schema: Dict[str, Any]) -> str:
-        """Format the schema into a string for the OpenAI prompt"""
+    def _shape_results(self, results: Dict[str, Any], result_format: str):
+        if result_format == "records":
+            return to_records(results["columns"], results["rows"])
+        return to_columnar(results["columns"], results["rows"], result_format)
+
+    def _format_schema_for_prompt(self, schema: Dict[str, Any], question: Optional[str] = None, schema_key: Optional[str] = None) -> str:
+        """Format the schema into a string for the OpenAI prompt.
+
+        With a question, only the tables relevant to it (and their
+        foreign-key neighbours) are included; ``schema_key`` identifies
+        the schema version for the retriever's index cache.
+        """
+        tables = list(schema)
+        if question and schema_key and settings.SCHEMA_PRUNING_ENABLED:
+            tables = schema_retriever.select_tables(question, schema, schema_key)
+
         schema_lines = []
-        for table_name, table_info in schema.items():
+        for table_name in tables:
+            table_info = schema[table_name]
             columns = table_info["columns"]
             column_lines = [
                 f"  - {col['name']}: {col['type']}" +
@@ -0,0 +1,224 @@
+from typing import Dict, Any, List, Optional, Tuple
+from sqlalchemy import text
+from app.core.config import settings
+from app.services.sql_utils import apply_row_limit, strip_trailing_semicolon, table_aliases
+import json
+import re
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+POLICIES = ("reject", "limit", "warn", "off")
+
+class QueryCostError(Exception):
+    """Raised when the cost guard rejects a statement before it runs"""
+
+    def __init__(self, reasons: List[str]):
+        super().__init__(f"Query rejected as too expensive: {'; '.join(reasons)}")
+        self.reasons = reasons
+
+class CostEstimate:
+    """What the planner expects a statement to do"""
+
+    def __init__(self):
+        self.estimated_rows = 0
+        self.full_scans: Dict[str, int] = {}  # table -> rows in the table
+        self.cartesian_joins: List[str] = []  # tables joined without any usable condition
+
+    def problems(self, max_rows: int, large_table_rows: int) -> List[str]:
+        """Describe every threshold this estimate crosses"""
+        problems = []
+        if self.estimated_rows > max_rows:
+            problems.append(f"about {self.estimated_rows:,} rows examined (limit {max_rows:,})")
+        for table, rows in self.full_scans.items():
+            if rows >= large_table_rows:
+                problems.append(f"full scan of {table} (~{rows:,} rows)")
+        for table in self.cartesian_joins:
+            problems.append(f"cartesian or unindexed join on {table}")
+        return problems
+
+def _product(values: List[int]) -> int:
+    result = 1
+    for value in values:
+        result *= max(value, 1)
+    return result
+
+def _explain_mysql(conn, sql: str) -> CostEstimate:
+    """Nested-loop estimate from tabular EXPLAIN: multiply rows within each SELECT"""
+    estimate = CostEstimate()
+    by_select: Dict[Any, List[int]] = {}
+    for row in conn.execute(text(f"EXPLAIN {sql}")):
+        plan = {key.lower(): value for key, value in row._mapping.items()}
+        rows = int(plan.get("rows") or 0)
+        table = plan.get("table")
+        tables = by_select.setdefault(plan.get("id"), [])
+        if table and plan.get("type") == "ALL":
+            estimate.full_scans[table] = max(rows, estimate.full_scans.get(table, 0))
+            extra = (plan.get("extra") or "").lower()
+            if tables and plan.get("ref") is None and "join buffer" in extra:
+                estimate.cartesian_joins.append(table)
+        tables.append(rows)
+    estimate.estimated_rows = sum(_product(rows) for rows in by_select.values())
+    return estimate
+
+def _walk_postgresql_plan(node: Dict[str, Any], estimate: CostEstimate, scans: List[str]) -> None:
+    node_type = node.get("Node Type")
+    estimate.estimated_rows = max(estimate.estimated_rows, int(node.get("Plan Rows") or 0))
+    if node_type == "Seq Scan" and node.get("Relation Name"):
+        scans.append(node["Relation Name"])
+    children = node.get("Plans") or []
+    if node_type == "Nested Loop" and "Join Filter" not in node and not any(
+        "Index Cond" in child or "Recheck Cond" in child for child in children
+    ):
+        inner = children[-1] if children else {}
+        estimate.cartesian_joins.append(inner.get("Relation Name") or inner.get("Node Type", "subplan"))
+    for child in children:
+        _walk_postgresql_plan(child, estimate, scans)
+
+def _explain_postgresql(conn, sql: str) -> CostEstimate:
+    """Estimate from the JSON plan; table sizes come from pg_class statistics"""
+    estimate = CostEstimate()
+    plan = conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    scans: List[str] = []
+    _walk_postgresql_plan(plan[0]["Plan"], estimate, scans)
+    if scans:
+        sizes = conn.execute(
+            text("SELECT relname, reltuples FROM pg_class WHERE relkind = 'r' AND relname = ANY(:names)"),
+            {"names": list(set(scans))}
+        )
+        for relname, reltuples in sizes:
+            estimate.full_scans[relname] = max(int(reltuples), 0)
+    return estimate
+
+def _explain_sqlite(conn, sql: str) -> CostEstimate:
+    """SQLite has no row estimates, so size full scans with MAX(rowid)"""
+    estimate = CostEstimate()
+    aliases = table_aliases(sql)
+    scans_by_parent: Dict[int, List[str]] = {}
+    for _, parent, _, detail in conn.execute(text(f"EXPLAIN QUERY PLAN {sql}")):
+        match = re.match(r"SCAN (?:TABLE )?(\w+)", detail)
+        if match:
+            name = match.group(1).lower()
+            scans_by_parent.setdefault(parent, []).append(aliases.get(name, name))
+
+    sizes: Dict[str, int] = {}
+    for table in {table for tables in scans_by_parent.values() for table in tables}:
+        try:
+            sizes[table] = int(conn.execute(text(f'SELECT MAX(rowid) FROM "{table}"')).scalar() or 0)
+        except Exception:
+            sizes[table] = 0  # WITHOUT ROWID tables, views and CTEs
+    for tables in scans_by_parent.values():
+        for table in tables:
+            estimate.full_scans[table] = sizes[table]
+        # Two full scans under the same parent are nested without an index
+        estimate.cartesian_joins.extend(tables[1:])
+        estimate.estimated_rows += _product([sizes[table] for table in tables])
+    return estimate
+
+_EXPLAINERS = {
+    "mysql": _explain_mysql,
+    "postgresql": _explain_postgresql,
+    "sqlite": _explain_sqlite
+}
+
+class QueryCostGuard:
+    """Plans statements with EXPLAIN before they run and applies a per-connection policy.
+
+    Policies: ``reject`` raises QueryCostError, ``limit`` bounds the result
+    with a LIMIT, ``warn`` runs the statement but reports the problems and
+    ``off`` skips planning entirely.
+    """
+
+    def __init__(
+        self,
+        default_policy: str = settings.QUERY_COST_POLICY,
+        policy_overrides: Optional[Dict[int, str]] = None,
+        max_rows: int = settings.QUERY_COST_MAX_ROWS_EXAMINED,
+        large_table_rows: int = settings.QUERY_COST_LARGE_TABLE_ROWS,
+        limit_rows: int = settings.CHAT_MAX_ROWS
+    ):
+        self.default_policy = default_policy
+        self.policy_overrides = dict(
+            settings.QUERY_COST_POLICY_OVERRIDES if policy_overrides is None else policy_overrides
+        )
+        self.max_rows = max_rows
+        self.large_table_rows = large_table_rows
+        self.limit_rows = limit_rows
+        self._lock = threading.Lock()
+        self._stats = {
+            "checked": 0,
+            "flagged": 0,
+            "rejected": 0,
+            "limited": 0,
+            "warned": 0,
+            "explain_errors": 0
+        }
+
+    def _count(self, key: str) -> None:
+        # Reviews run on DB-executor worker threads
+        with self._lock:
+            self._stats[key] += 1
+
+    def policy_for(self, connection_id: int) -> str:
+        policy = self.policy_overrides.get(connection_id, self.default_policy)
+        if policy not in POLICIES:
+            logger.warning(f"Unknown cost policy '{policy}' for connection {connection_id}, using warn")
+            return "warn"
+        return policy
+
+    def estimate(self, conn, db_type: str, sql: str) -> Optional[CostEstimate]:
+        """EXPLAIN a statement on an open connection; None if it cannot be planned"""
+        explainer = _EXPLAINERS.get(db_type.lower())
+        if explainer is None:
+            return None
+        try:
+            return explainer(conn, strip_trailing_semicolon(sql))
+        except Exception as e:
+            # A failed EXPLAIN aborts the transaction on PostgreSQL; roll back
+            # so the real statement still runs and surfaces its own error
+            try:
+                conn.rollback()
+            except Exception:
+                pass
+            # Let execution surface the real error
+            self._count("explain_errors")
+            logger.warning(f"Could not EXPLAIN generated query: {str(e)}")
+            return None
+
+    def review(self, conn, db_type: str, connection_id: int, sql: str) -> Tuple[str, List[str]]:
+        """Return the statement to run and any warnings, or raise QueryCostError"""
+        policy = self.policy_for(connection_id)
+        if policy == "off":
+            return sql, []
+        self._count("checked")
+        estimate = self.estimate(conn, db_type, sql)
+        problems = estimate.problems(self.max_rows, self.large_table_rows) if estimate else []
+        if not problems:
+            return sql, []
+
+        self._count("flagged")
+        logger.info(f"Cost guard ({policy}) flagged query for connection {connection_id}: {'; '.join(problems)}")
+        if policy == "reject":
+            self._count("rejected")
+            raise QueryCostError(problems)
+        if policy == "limit":
+            self._count("limited")
+            # One row past the cap so callers can still tell the result was cut off
+            return apply_row_limit(sql, self.limit_rows + 1), problems
+        self._count("warned")
+        return sql, problems
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        return {
+            **stats,
+            "default_policy": self.default_policy,
+            "max_rows_examined": self.max_rows,
+            "large_table_rows": self.large_table_rows
+        }
+
+query_cost_guard = QueryCostGuard()
@@ -0,0 +1,158 @@
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Iterable, Set, Tuple
+from app.core.config import settings
+from app.services.sql_utils import normalize_sql, referenced_tables
+import json
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+class _CacheEntry:
+    def __init__(self, value: Dict[str, Any], size: int, tables: Set[str], ttl: int):
+        self.value = value
+        self.size = size
+        self.tables = tables
+        self.expires_at = time.monotonic() + ttl
+
+class ResultCache:
+    """Byte-bounded cache of executed SELECT results per connection.
+
+    Entries record the tables their statement reads from, so a schema
+    refresh or a manual invalidation of a table drops every dependent
+    result for that connection.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = settings.RESULT_CACHE_ENABLED,
+        max_bytes: int = settings.RESULT_CACHE_MAX_BYTES,
+        default_ttl: int = settings.RESULT_CACHE_TTL,
+        connection_ttls: Optional[Dict[int, int]] = None
+    ):
+        self.enabled = enabled
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.connection_ttls = dict(
+            settings.RESULT_CACHE_CONNECTION_TTLS if connection_ttls is None else connection_ttls
+        )
+        self._entries: "OrderedDict[Tuple[int, str, str], _CacheEntry]" = OrderedDict()
+        self._dependencies: Dict[Tuple[int, str], Set[Tuple[int, str, str]]] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "invalidations": 0,
+            "oversized": 0
+        }
+
+    def ttl_for(self, connection_id: int) -> int:
+        """Return the TTL for a connection; 0 disables caching for it"""
+        return self.connection_ttls.get(connection_id, self.default_ttl)
+
+    def set_connection_ttl(self, connection_id: int, ttl: Optional[int]) -> None:
+        """Override (or with None, reset) the TTL for one connection"""
+        if ttl is None:
+            self.connection_ttls.pop(connection_id, None)
+        else:
+            self.connection_ttls[connection_id] = ttl
+
+    def get(self, connection_id: int, sql: str, namespace: str = "default") -> Optional[Dict[str, Any]]:
+        """Return a cached result for the statement, if fresh.
+
+        ``namespace`` separates callers that cache differently shaped results.
+        """
+        if not self.enabled or self.ttl_for(connection_id) <= 0:
+            return None
+        key = (connection_id, namespace, normalize_sql(sql))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at < time.monotonic():
+                self._remove_locked(key)
+                self._stats["expirations"] += 1
+                entry = None
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return entry.value
+
+    def put(self, connection_id: int, sql: str, value: Dict[str, Any], namespace: str = "default") -> None:
+        """Store a result; values must be JSON serializable and are not copied"""
+        ttl = self.ttl_for(connection_id)
+        if not self.enabled or ttl <= 0:
+            return
+        normalized = normalize_sql(sql)
+        size = len(json.dumps(value, default=str))
+        if size > self.max_bytes:
+            self._stats["oversized"] += 1
+            return
+
+        key = (connection_id, namespace, normalized)
+        tables = referenced_tables(normalized)
+        with self._lock:
+            if key in self._entries:
+                self._remove_locked(key)
+            self._entries[key] = _CacheEntry(value, size, tables, ttl)
+            self._bytes += size
+            for table in tables:
+                self._dependencies.setdefault((connection_id, table), set()).add(key)
+            self._stats["stores"] += 1
+
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove_locked(oldest)
+                self._stats["evictions"] += 1
+
+    def invalidate_tables(self, connection_id: int, tables: Iterable[str]) -> int:
+        """Drop cached results that read from any of the given tables"""
+        with self._lock:
+            keys = set()
+            for table in tables:
+                keys |= self._dependencies.get((connection_id, table.lower()), set())
+            for key in keys:
+                self._remove_locked(key)
+            self._stats["invalidations"] += len(keys)
+        return len(keys)
+
+    def invalidate_connection(self, connection_id: int) -> int:
+        """Drop every cached result for a connection"""
+        with self._lock:
+            keys = [key for key in self._entries if key[0] == connection_id]
+            for key in keys:
+                self._remove_locked(key)
+            self._stats["invalidations"] += len(keys)
+        if keys:
+            logger.info(f"Invalidated {len(keys)} cached results for connection {connection_id}")
+        return len(keys)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and memory usage"""
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "enabled": self.enabled,
+                "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes
+            }
+
+    def _remove_locked(self, key: Tuple[int, str, str]) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+        for table in entry.tables:
+            dependents = self._dependencies.get((key[0], table))
+            if dependents is not None:
+                dependents.discard(key)
+                if not dependents:
+                    del self._dependencies[(key[0], table)]
+
+result_cache = ResultCache()
@@ -0,0 +1,22 @@
+from typing import Any, Dict, List, Sequence
+
+# records: list of dicts (the original layout, column names repeated per row)
+# rows:    column names once plus one array per row
+# columns: column names once plus one array per column
+RESULT_FORMATS = ("records", "rows", "columns")
+
+def check_result_format(result_format: str, allowed: Sequence[str] = RESULT_FORMATS) -> str:
+    """Validate a requested format; raises ValueError for unknown names"""
+    if result_format not in allowed:
+        raise ValueError(f"Unknown result format '{result_format}'; expected one of: {', '.join(allowed)}")
+    return result_format
+
+def to_records(columns: List[str], rows: Sequence[Sequence[Any]]) -> List[Dict[str, Any]]:
+    return [dict(zip(columns, row)) for row in rows]
+
+def to_columnar(columns: List[str], rows: Sequence[Sequence[Any]], result_format: str) -> Dict[str, Any]:
+    """Compact payload for the rows or columns format"""
+    if result_format == "columns":
+        data = [list(values) for values in zip(*rows)] if rows else [[] for _ in columns]
+        return {"format": "columns", "columns": columns, "data": data}
+    return {"format": "rows", "columns": columns, "rows": [list(row) for row in rows]}
@@ -0,0 +1,25 @@
+from html import escape
+from typing import Any, List, Sequence
+
+def render_results_table(columns: List[str], rows: Sequence[Sequence[Any]], truncated: bool = False) -> str:
+    """Render chat results as a summary line and an HTML table.
+
+    Every header and cell is HTML-escaped. The markup is collected in a
+    list and joined once, so cost stays linear in the number of cells.
+    """
+    total_rows = len(rows)
+    if total_rows == 0:
+        return "No matching records found."
+
+    parts = [
+        f"Found {total_rows} result{'s' if total_rows != 1 else ''}{' (truncated)' if truncated else ''}:<br>",
+        "<div class='result-table-wrapper'><table class='result-table'><thead><tr>"
+    ]
+    parts.extend(f"<th>{escape(str(col))}</th>" for col in columns)
+    parts.append("</tr></thead><tbody>")
+    for row in rows:
+        parts.append("<tr>")
+        parts.extend("<td></td>" if cell is None else f"<td>{escape(str(cell))}</td>" for cell in row)
+        parts.append("</tr>")
+    parts.append("</tbody></table></div>")
+    return "".join(parts)
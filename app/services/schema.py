@@ -2,6 +2,9 @@ from sqlalchemy.orm import Session
 from sqlalchemy import create_engine, text
 from app.models.connection import Connection
 from app.services.database import DatabaseService
+from app.services.nl_to_sql_cache import nl_to_sql_cache
+from app.services.result_cache import result_cache
+from app.services.schema_introspection import format_schema_for_prompt, load_stored_schema
 from typing import Dict, Any, List, Optional
 
 class SchemaService:
@@ -17,7 +20,7 @@ class SchemaService:
             raise ValueError("Connection not found")
 
         # Get schema from connection or fetch it
-        schema = connection.schema
+        schema = load_stored_schema(connection.schema)
         if not schema:
             schema = self.database_service.get_schema(connection)
             connection.schema = schema
@@ -45,10 +48,21 @@ class SchemaService:
             raise ValueError("Connection not found")
 
         # Fetch fresh schema
+        previous = connection.schema
         schema = self.database_service.get_schema(connection)
         connection.schema = schema
         self.db.commit()
 
+        # SQL generated and results cached against the old schema may no longer be valid
+        if previous:
+            stored = load_stored_schema(previous)
+            nl_to_sql_cache.invalidate_schema(format_schema_for_prompt(stored) if stored else previous)
+            if stored:
+                changed = [table for table in stored if stored[table] != schema.get(table)]
+                result_cache.invalidate_tables(connection.id, changed)
+            else:
+                result_cache.invalidate_connection(connection.id)
+
         return schema
 
     async def get_table_info(self, connection_id: int, table_name: str) -> Dict[str, Any]:
@@ -0,0 +1,198 @@
+from typing import Dict, List, Any, Optional
+from sqlalchemy import text
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Each dialect reads the whole schema with one set-based query for columns
+# (including primary keys) and one for foreign keys, instead of a query per table.
+_COLUMN_QUERIES = {
+    "mysql": """
+        SELECT
+            TABLE_NAME AS table_name,
+            COLUMN_NAME AS column_name,
+            DATA_TYPE AS data_type,
+            COLUMN_TYPE AS column_type,
+            IS_NULLABLE AS is_nullable,
+            COLUMN_KEY AS column_key,
+            COLUMN_DEFAULT AS column_default,
+            EXTRA AS extra,
+            COLUMN_COMMENT AS column_comment
+        FROM INFORMATION_SCHEMA.COLUMNS
+        WHERE TABLE_SCHEMA = :db_name
+        ORDER BY TABLE_NAME, ORDINAL_POSITION
+    """,
+    "postgresql": """
+        SELECT
+            c.table_name AS table_name,
+            c.column_name AS column_name,
+            c.data_type AS data_type,
+            c.data_type AS column_type,
+            c.is_nullable AS is_nullable,
+            CASE WHEN pk.column_name IS NOT NULL THEN 'PRI' ELSE '' END AS column_key,
+            c.column_default AS column_default,
+            '' AS extra,
+            col_description(format('%I.%I', c.table_schema, c.table_name)::regclass, c.ordinal_position) AS column_comment
+        FROM information_schema.columns c
+        LEFT JOIN (
+            SELECT kcu.table_name, kcu.column_name
+            FROM information_schema.table_constraints tc
+            JOIN information_schema.key_column_usage kcu
+                ON kcu.constraint_name = tc.constraint_name
+                AND kcu.table_schema = tc.table_schema
+            WHERE tc.constraint_type = 'PRIMARY KEY'
+                AND tc.table_schema = 'public'
+        ) pk ON pk.table_name = c.table_name AND pk.column_name = c.column_name
+        WHERE c.table_schema = 'public'
+        ORDER BY c.table_name, c.ordinal_position
+    """,
+    "sqlite": """
+        SELECT
+            m.name AS table_name,
+            p.name AS column_name,
+            p.type AS data_type,
+            p.type AS column_type,
+            CASE WHEN p."notnull" THEN 'NO' ELSE 'YES' END AS is_nullable,
+            CASE WHEN p.pk > 0 THEN 'PRI' ELSE '' END AS column_key,
+            p.dflt_value AS column_default,
+            '' AS extra,
+            NULL AS column_comment
+        FROM sqlite_master m
+        JOIN pragma_table_info(m.name) p
+        WHERE m.type = 'table' AND m.name NOT LIKE 'sqlite_%'
+        ORDER BY m.name, p.cid
+    """
+}
+
+_FOREIGN_KEY_QUERIES = {
+    "mysql": """
+        SELECT
+            TABLE_NAME AS child_table,
+            COLUMN_NAME AS child_column,
+            REFERENCED_TABLE_NAME AS parent_table,
+            REFERENCED_COLUMN_NAME AS parent_column
+        FROM INFORMATION_SCHEMA.KEY_COLUMN_USAGE
+        WHERE TABLE_SCHEMA = :db_name
+            AND REFERENCED_TABLE_NAME IS NOT NULL
+    """,
+    "postgresql": """
+        SELECT
+            kcu.table_name AS child_table,
+            kcu.column_name AS child_column,
+            ccu.table_name AS parent_table,
+            ccu.column_name AS parent_column
+        FROM information_schema.table_constraints tc
+        JOIN information_schema.key_column_usage kcu
+            ON kcu.constraint_name = tc.constraint_name
+            AND kcu.table_schema = tc.table_schema
+        JOIN information_schema.constraint_column_usage ccu
+            ON ccu.constraint_name = tc.constraint_name
+            AND ccu.table_schema = tc.table_schema
+        WHERE tc.constraint_type = 'FOREIGN KEY'
+            AND tc.table_schema = 'public'
+    """,
+    "sqlite": """
+        SELECT
+            m.name AS child_table,
+            f."from" AS child_column,
+            f."table" AS parent_table,
+            f."to" AS parent_column
+        FROM sqlite_master m
+        JOIN pragma_foreign_key_list(m.name) f
+        WHERE m.type = 'table'
+    """
+}
+
+def introspect_schema(conn, db_type: str, database_name: str) -> Dict[str, Dict[str, Any]]:
+    """Read all tables, columns, keys and foreign keys for a database.
+
+    ``conn`` is an open SQLAlchemy connection. The result maps each table
+    name to ``{"columns": [...], "foreign_keys": [...]}``, in the shape
+    shared by both SchemaService implementations.
+    """
+    db_type = db_type.lower()
+    if db_type not in _COLUMN_QUERIES:
+        raise ValueError(f"Database type {db_type} not supported yet")
+
+    params = {"db_name": database_name}
+    schema: Dict[str, Dict[str, Any]] = {}
+
+    for row in conn.execute(text(_COLUMN_QUERIES[db_type]), params).mappings():
+        table = schema.setdefault(row["table_name"], {"columns": [], "foreign_keys": []})
+        table["columns"].append({
+            "name": row["column_name"],
+            "type": row["column_type"],
+            "data_type": row["data_type"],
+            "null": row["is_nullable"] == "YES",
+            "key": row["column_key"] or "",
+            "default": row["column_default"],
+            "extra": row["extra"] or "",
+            "primary_key": row["column_key"] == "PRI",
+            "comment": row["column_comment"] or ""
+        })
+
+    for row in conn.execute(text(_FOREIGN_KEY_QUERIES[db_type]), params).mappings():
+        table = schema.get(row["child_table"])
+        if table is None:
+            continue
+        table["foreign_keys"].append({
+            "column": row["child_column"],
+            "references_table": row["parent_table"],
+            "references_column": row["parent_column"]
+        })
+        for column in table["columns"]:
+            if column["name"] == row["child_column"] and not column["key"]:
+                column["key"] = "MUL"
+
+    logger.info(f"Introspected {len(schema)} tables for {database_name}")
+    return schema
+
+def load_stored_schema(stored: Optional[str]) -> Optional[Dict[str, Dict[str, Any]]]:
+    """Decode a normalized schema stored on a connection, or None if it is not one"""
+    if not stored:
+        return None
+    try:
+        schema = json.loads(stored)
+    except (TypeError, ValueError):
+        # The chat path caches the prompt-formatted schema in the same column
+        return None
+    return schema if isinstance(schema, dict) else None
+
+def get_relationships(schema: Dict[str, Dict[str, Any]]) -> List[Dict[str, str]]:
+    """Flatten the foreign keys of a normalized schema into relationship rows"""
+    return [
+        {
+            "child_table": table_name,
+            "child_column": fk["column"],
+            "parent_table": fk["references_table"],
+            "parent_column": fk["references_column"]
+        }
+        for table_name, table in schema.items()
+        for fk in table.get("foreign_keys", [])
+    ]
+
+def format_schema_for_prompt(schema: Dict[str, Dict[str, Any]]) -> str:
+    """Format a normalized schema and its relationships for the LLM prompt"""
+    lines = ["Database Schema:", ""]
+    for table_name, table in schema.items():
+        lines.append(f"Table: {table_name}")
+        for col in table["columns"]:
+            line = f"  - {col['name']} ({col.get('data_type') or col['type']})"
+            if col.get("primary_key"):
+                line += " PRIMARY KEY"
+            if not col.get("null"):
+                line += " NOT NULL"
+            if col.get("comment"):
+                comment = " ".join(col["comment"].split()).replace("'", "''")
+                line += f" COMMENT '{comment}'"
+            lines.append(line)
+        lines.append("")
+
+    relationships = get_relationships(schema)
+    if relationships:
+        lines.append("Relationships:")
+        for rel in relationships:
+            lines.append(f"  - {rel['child_table']}.{rel['child_column']} -> {rel['parent_table']}.{rel['parent_column']}")
+
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,290 @@
+from collections import OrderedDict
+from typing import Dict, Any, Iterable, List, Optional, Set, Tuple
+from app.core.config import settings
+from app.services.intent_matcher import STOPWORDS, singular
+from app.services.nl_to_sql_cache import schema_hash
+from app.services.schema_introspection import get_relationships
+import math
+import re
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Relevance weight of a question word by where it appears in a table
+TABLE_NAME_WEIGHT = 3.0
+COLUMN_NAME_WEIGHT = 1.0
+COMMENT_WEIGHT = 0.5
+
+QUESTION_STOPWORDS = STOPWORDS | {
+    "which", "who", "whose", "with", "from", "by", "to", "on", "at", "their", "its", "and", "or", "than",
+    "where", "each", "per", "that", "this", "those", "these", "has", "had", "be", "been", "into"
+}
+
+_TABLE_HEADER = re.compile(r"^\s*Table:\s*[`\"]?(\w+)")
+_COLUMN_NAME = re.compile(r"^\s*-?\s*[`\"]?(\w+)")
+_RELATIONSHIP = re.compile(r"(\w+)\.(\w+)\s*->\s*(\w+)\.(\w+)")
+_INLINE_REFERENCE = re.compile(r"references\s+[`\"]?(\w+)[`\"]?\s*[.(]", re.IGNORECASE)
+_COMMENT = re.compile(r"COMMENT\s+'((?:[^']|'')*)'")
+
+def identifier_words(name: str) -> Set[str]:
+    """Words in an identifier: the whole name plus its snake_case and camelCase parts"""
+    parts = re.findall(r"[A-Z]?[a-z]+|[A-Z]+(?![a-z])|\d+", name)
+    return {singular(word.lower()) for word in parts + [name] if word}
+
+def question_words(question: str) -> Set[str]:
+    return {singular(word) for word in re.findall(r"[a-z0-9]+", question.lower()) if word not in QUESTION_STOPWORDS}
+
+class SchemaIndex:
+    """Inverted index from words to the tables whose name, columns or comments use them.
+
+    Tables are scored against a question with IDF-weighted word matches,
+    so a word shared by every table (``id``, ``created``) counts for little.
+    """
+
+    def __init__(self):
+        self.tables: List[str] = []
+        self.sizes: Dict[str, int] = {}  # characters each table takes up in a prompt
+        self.neighbours: Dict[str, Set[str]] = {}
+        self._postings: Dict[str, Dict[str, float]] = {}
+        self._idf: Dict[str, float] = {}
+
+    def add_table(self, table: str) -> None:
+        if table not in self.neighbours:
+            self.tables.append(table)
+            self.neighbours[table] = set()
+            self.sizes[table] = 0
+            self.add_words(table, identifier_words(table), TABLE_NAME_WEIGHT)
+
+    def add_words(self, table: str, words: Iterable[str], weight: float) -> None:
+        for word in words:
+            postings = self._postings.setdefault(word, {})
+            postings[table] = max(postings.get(table, 0.0), weight)
+
+    def add_link(self, child: str, parent: str) -> None:
+        if child in self.neighbours and parent in self.neighbours and child != parent:
+            self.neighbours[child].add(parent)
+            self.neighbours[parent].add(child)
+
+    def finish(self) -> "SchemaIndex":
+        count = len(self.tables)
+        self._idf = {word: math.log(1 + count / len(postings)) for word, postings in self._postings.items()}
+        return self
+
+    @classmethod
+    def from_normalized(cls, schema: Dict[str, Dict[str, Any]]) -> "SchemaIndex":
+        """Index a normalized schema as returned by introspect_schema"""
+        index = cls()
+        for table, info in schema.items():
+            index.add_table(table)
+            size = len(table) + 8
+            for column in info.get("columns", []):
+                index.add_words(table, identifier_words(column["name"]), COLUMN_NAME_WEIGHT)
+                if column.get("comment"):
+                    index.add_words(table, question_words(column["comment"]), COMMENT_WEIGHT)
+                size += len(column["name"]) + len(str(column.get("type") or "")) + len(column.get("comment") or "") + 16
+            index.sizes[table] = size
+        for relationship in get_relationships(schema):
+            index.add_link(relationship["child_table"], relationship["parent_table"])
+        return index.finish()
+
+    def score(self, question: str) -> Dict[str, float]:
+        scores: Dict[str, float] = {}
+        for word in question_words(question):
+            for table, weight in self._postings.get(word, {}).items():
+                scores[table] = scores.get(table, 0.0) + weight * self._idf[word]
+        return scores
+
+    def select(self, question: str, top_k: int, max_tables: int) -> Optional[List[str]]:
+        """Tables relevant to the question in schema order, or None to keep them all.
+
+        Takes the ``top_k`` best-scoring tables, then adds their foreign-key
+        neighbours (best scoring and best connected first) up to
+        ``max_tables`` so the joins between them stay possible.
+        """
+        scores = self.score(question)
+        if not scores:
+            return None
+        ranked = sorted(scores, key=lambda table: (-scores[table], table))
+        chosen = set(ranked[:top_k])
+
+        candidates = {neighbour for table in chosen for neighbour in self.neighbours[table]} - chosen
+        for neighbour in sorted(candidates, key=lambda table: (
+            -scores.get(table, 0.0), -len(self.neighbours[table] & chosen), table
+        )):
+            if len(chosen) >= max_tables:
+                break
+            chosen.add(neighbour)
+        return [table for table in self.tables if table in chosen]
+
+class PromptSchema:
+    """Schema text split into per-table blocks so a subset can be rendered back.
+
+    Understands the ``Table: name`` layouts used for prompts in this app:
+    indented column lines, an optional ``Relationships:`` section of
+    ``child.col -> parent.col`` lines and inline ``references table.col``.
+    Anything it does not recognise is kept verbatim.
+    """
+
+    def __init__(self, schema: str):
+        self.index = SchemaIndex()
+        # (kind, key, text): kind is text, table or relationship
+        self.segments: List[Tuple[str, Any, str]] = []
+        current: Optional[str] = None
+        for line in schema.split("\n"):
+            header = _TABLE_HEADER.match(line)
+            if header:
+                current = header.group(1)
+                self.index.add_table(current)
+                self.segments.append(("table", current, line))
+                self.index.sizes[current] += len(line) + 1
+                continue
+
+            stripped = line.strip()
+            if current is not None and stripped and not stripped.startswith("Relationships"):
+                self.segments.append(("table", current, line))
+                self.index.sizes[current] += len(line) + 1
+                column = _COLUMN_NAME.match(line)
+                if column and not stripped.endswith(":"):
+                    self.index.add_words(current, identifier_words(column.group(1)), COLUMN_NAME_WEIGHT)
+                comment = _COMMENT.search(line)
+                if comment:
+                    self.index.add_words(current, question_words(comment.group(1)), COMMENT_WEIGHT)
+                continue
+
+            if current is not None and not stripped:
+                # The blank line closing a table block goes with it
+                self.segments.append(("table", current, line))
+                current = None
+                continue
+
+            current = None
+            relationship = _RELATIONSHIP.search(line)
+            if relationship:
+                child, _, parent, _ = relationship.groups()
+                self.segments.append(("relationship", (child, parent), line))
+            else:
+                self.segments.append(("text", None, line))
+
+        # Links are added once every table is known
+        for kind, key, line in self.segments:
+            if kind == "relationship":
+                self.index.add_link(*key)
+            elif kind == "table":
+                for reference in _INLINE_REFERENCE.finditer(line):
+                    self.index.add_link(key, reference.group(1))
+        self.index.finish()
+
+    def render(self, tables: Iterable[str]) -> str:
+        keep = set(tables)
+        lines = []
+        for kind, key, line in self.segments:
+            if kind == "table" and key not in keep:
+                continue
+            if kind == "relationship" and not (key[0] in keep and key[1] in keep):
+                continue
+            lines.append(line)
+        return "\n".join(lines)
+
+class SchemaRetriever:
+    """Shrinks the schema in NL-to-SQL prompts to the tables a question needs.
+
+    Indexes are built once per schema and kept in an LRU keyed by the
+    connection (or the schema text's hash), so a connection's index is
+    rebuilt only when its schema changes. Schemas with fewer than
+    ``min_tables`` tables are sent whole.
+    """
+
+    def __init__(
+        self,
+        top_k: int = settings.SCHEMA_PRUNE_TOP_K,
+        max_tables: int = settings.SCHEMA_PRUNE_MAX_TABLES,
+        min_tables: int = settings.SCHEMA_PRUNE_MIN_TABLES,
+        max_indexes: int = settings.SCHEMA_INDEX_CACHE_SIZE
+    ):
+        self.top_k = top_k
+        self.max_tables = max_tables
+        self.min_tables = min_tables
+        self.max_indexes = max_indexes
+        self._indexes: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {
+            "prompts": 0,
+            "pruned": 0,
+            "index_builds": 0,
+            "tables_before": 0,
+            "tables_after": 0,
+            "chars_before": 0,
+            "chars_after": 0,
+            "prune_seconds": 0.0
+        }
+
+    def _cached(self, key: str, build):
+        with self._lock:
+            index = self._indexes.get(key)
+            if index is not None:
+                self._indexes.move_to_end(key)
+                return index
+        index = build()
+        with self._lock:
+            self._indexes[key] = index
+            self._stats["index_builds"] += 1
+            while len(self._indexes) > self.max_indexes:
+                self._indexes.popitem(last=False)
+        return index
+
+    def _select(self, index: SchemaIndex, question: str) -> Optional[List[str]]:
+        if len(index.tables) < self.min_tables:
+            return None
+        return index.select(question, self.top_k, self.max_tables)
+
+    def _record(self, index: SchemaIndex, selected: Optional[List[str]], started: float) -> None:
+        tables = selected if selected is not None else index.tables
+        with self._lock:
+            self._stats["prompts"] += 1
+            self._stats["pruned"] += int(selected is not None)
+            self._stats["tables_before"] += len(index.tables)
+            self._stats["tables_after"] += len(tables)
+            self._stats["chars_before"] += sum(index.sizes.values())
+            self._stats["chars_after"] += sum(index.sizes[table] for table in tables)
+            self._stats["prune_seconds"] += time.perf_counter() - started
+
+    def prune_prompt(self, question: str, schema: str) -> str:
+        """Return the prompt schema text reduced to the tables relevant to the question"""
+        started = time.perf_counter()
+        parsed = self._cached(f"text:{schema_hash(schema)}", lambda: PromptSchema(schema))
+        selected = self._select(parsed.index, question)
+        self._record(parsed.index, selected, started)
+        return schema if selected is None else parsed.render(selected)
+
+    def select_tables(self, question: str, schema: Dict[str, Dict[str, Any]], schema_key: str) -> List[str]:
+        """Names of the normalized schema's tables relevant to the question.
+
+        ``schema_key`` names this version of the schema (a connection id and
+        its stored schema hash), so the schema itself is never re-serialized.
+        """
+        started = time.perf_counter()
+        index = self._cached(f"connection:{schema_key}", lambda: SchemaIndex.from_normalized(schema))
+        selected = self._select(index, question)
+        self._record(index, selected, started)
+        return selected if selected is not None else list(schema)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            indexes = len(self._indexes)
+        prompts = stats["prompts"]
+        saved = stats["chars_before"] - stats["chars_after"]
+        return {
+            **{key: value for key, value in stats.items() if key != "prune_seconds"},
+            # About four characters per token for English text and identifiers
+            "estimated_tokens_saved": saved // 4,
+            "savings_ratio": round(saved / stats["chars_before"], 4) if stats["chars_before"] else 0.0,
+            "avg_prune_us": round(stats["prune_seconds"] / prompts * 1e6, 1) if prompts else 0.0,
+            "indexes": indexes,
+            "top_k": self.top_k,
+            "max_tables": self.max_tables
+        }
+
+schema_retriever = SchemaRetriever()
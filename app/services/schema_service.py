@@ -1,17 +1,19 @@
 from typing import Dict, List, Optional
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
 from app.core.config import settings
+from app.services.schema_introspection import introspect_schema, get_relationships, format_schema_for_prompt
 import logging
 
 logger = logging.getLogger(__name__)
 
 class SchemaService:
-    def __init__(self, connection_url: str, db_type: str, database_name: str):
+    def __init__(self, connection_url: Optional[str], db_type: str, database_name: str, engine: Optional[Engine] = None):
         """Initialize SchemaService with database connection details"""
         logger.info(f"Initializing SchemaService for {database_name}")
         
-        # Create engine with proper settings
-        self.engine = create_engine(
+        # Reuse a pooled engine when the caller already has one
+        self.engine = engine or create_engine(
             connection_url,
             pool_pre_ping=True,  # Enable connection health checks
             pool_recycle=3600,   # Recycle connections after 1 hour
@@ -20,121 +22,47 @@ class SchemaService:
         self.db_type = db_type.lower()
         self.database_name = database_name
 
-    def get_relationships(self) -> List[Dict]:
-        """Get foreign key relationships based on database type"""
-        if self.db_type == "mysql":
-            query = text("""
-                SELECT 
-                    TABLE_NAME AS child_table,
-                    COLUMN_NAME AS child_column,
-                    REFERENCED_TABLE_NAME AS parent_table,
-                    REFERENCED_COLUMN_NAME AS parent_column
-                FROM INFORMATION_SCHEMA.KEY_COLUMN_USAGE
-                WHERE TABLE_SCHEMA = :db_name
-                    AND REFERENCED_TABLE_NAME IS NOT NULL
-            """)
-        else:
-            raise ValueError(f"Database type {self.db_type} not supported yet")
-
+    def get_schema(self) -> Dict[str, Dict]:
+        """Get the normalized schema (columns, keys and foreign keys) in bulk"""
         try:
             with self.engine.connect() as conn:
-                result = conn.execute(query, {"db_name": self.database_name})
-                relationships = [
-                    {
-                        "child_table": row.child_table,
-                        "child_column": row.child_column,
-                        "parent_table": row.parent_table,
-                        "parent_column": row.parent_column
-                    }
-                    for row in result
-                ]
-                logger.info(f"Found {len(relationships)} relationships")
-                return relationships
+                return introspect_schema(conn, self.db_type, self.database_name)
+        except ValueError:
+            raise
         except Exception as e:
-            logger.error(f"Error getting relationships: {str(e)}")
-            raise ValueError(f"Failed to get relationships: {str(e)}")
+            logger.error(f"Error getting schema: {str(e)}")
+            raise ValueError(f"Failed to get schema: {str(e)}")
 
-    def get_schema_info(self) -> List[Dict]:
-        """Get detailed schema information based on database type"""
-        if self.db_type == "mysql":
-            query = text("""
-                SELECT 
-                    TABLE_NAME, 
-                    COLUMN_NAME, 
-                    DATA_TYPE, 
-                    COLUMN_TYPE, 
-                    IS_NULLABLE, 
-                    COLUMN_KEY, 
-                    EXTRA
-                FROM INFORMATION_SCHEMA.COLUMNS
-                WHERE TABLE_SCHEMA = :db_name
-            """)
-        else:
-            raise ValueError(f"Database type {self.db_type} not supported yet")
+    def get_relationships(self) -> List[Dict]:
+        """Get foreign key relationships"""
+        relationships = get_relationships(self.get_schema())
+        logger.info(f"Found {len(relationships)} relationships")
+        return relationships
 
-        try:
-            with self.engine.connect() as conn:
-                result = conn.execute(query, {"db_name": self.database_name})
-                schema_info = [
-                    {
-                        "TABLE_NAME": row.TABLE_NAME,
-                        "COLUMN_NAME": row.COLUMN_NAME,
-                        "DATA_TYPE": row.DATA_TYPE,
-                        "COLUMN_TYPE": row.COLUMN_TYPE,
-                        "IS_NULLABLE": row.IS_NULLABLE,
-                        "COLUMN_KEY": row.COLUMN_KEY,
-                        "EXTRA": row.EXTRA
-                    }
-                    for row in result
-                ]
-                logger.info(f"Found {len(schema_info)} columns across all tables")
-                return schema_info
-        except Exception as e:
-            logger.error(f"Error getting schema info: {str(e)}")
-            raise ValueError(f"Failed to get schema info: {str(e)}")
+    def get_schema_info(self) -> List[Dict]:
+        """Get detailed column information for every table"""
+        schema_info = [
+            {
+                "TABLE_NAME": table_name,
+                "COLUMN_NAME": col["name"],
+                "DATA_TYPE": col["data_type"],
+                "COLUMN_TYPE": col["type"],
+                "IS_NULLABLE": "YES" if col["null"] else "NO",
+                "COLUMN_KEY": col["key"],
+                "EXTRA": col["extra"]
+            }
+            for table_name, table in self.get_schema().items()
+            for col in table["columns"]
+        ]
+        logger.info(f"Found {len(schema_info)} columns across all tables")
+        return schema_info
 
     def format_schema_for_prompt(self) -> str:
         """Format schema and relationships for the LLM prompt"""
         try:
-            schema_info = self.get_schema_info()
-            relationships = self.get_relationships()
-
-            # Format table and column information
-            tables = {}
-            for col in schema_info:
-                table_name = col["TABLE_NAME"]
-                if table_name not in tables:
-                    tables[table_name] = []
-                tables[table_name].append({
-                    "name": col["COLUMN_NAME"],
-                    "type": col["DATA_TYPE"],
-                    "nullable": col["IS_NULLABLE"],
-                    "key": col["COLUMN_KEY"],
-                    "extra": col["EXTRA"]
-                })
-
-            logger.info(f"Formatting schema for {len(tables)} tables")
-
-            # Format the schema string
-            schema_str = "Database Schema:\n\n"
-            for table, columns in tables.items():
-                schema_str += f"Table: {table}\n"
-                for col in columns:
-                    schema_str += f"  - {col['name']} ({col['type']})"
-                    if col['key'] == 'PRI':
-                        schema_str += " PRIMARY KEY"
-                    if not col['nullable'] == 'YES':
-                        schema_str += " NOT NULL"
-                    schema_str += "\n"
-                schema_str += "\n"
-
-            # Add relationships
-            if relationships:
-                schema_str += "Relationships:\n"
-                for rel in relationships:
-                    schema_str += f"  - {rel['child_table']}.{rel['child_column']} -> {rel['parent_table']}.{rel['parent_column']}\n"
-
-            return schema_str
+            schema = self.get_schema()
+            logger.info(f"Formatting schema for {len(schema)} tables")
+            return format_schema_for_prompt(schema)
         except Exception as e:
             logger.error(f"Error formatting schema: {str(e)}")
-            raise 
\ No newline at end of file
+            raise
@@ -0,0 +1,132 @@
+from typing import Dict, Optional, Set
+import re
+import sqlparse
+from sqlparse import tokens as T
+from sqlparse.sql import Identifier, IdentifierList, Parenthesis
+import logging
+
+logger = logging.getLogger(__name__)
+
+def strip_trailing_semicolon(query: str) -> str:
+    """Remove whitespace and a trailing statement terminator"""
+    return query.strip().rstrip(";").rstrip()
+
+def _top_level_keyword(stmt, *names: str) -> Optional[int]:
+    """Return the index of the first top-level keyword token with one of the names, if any"""
+    for index, token in enumerate(stmt.tokens):
+        if token.ttype in T.Keyword and token.normalized in names:
+            return index
+    return None
+
+# What may follow LIMIT: a count (or ALL), "offset, count" or "count OFFSET offset",
+# then an optional locking clause
+_LIMIT_TAIL = re.compile(
+    r"^(\s*)(?:(?P<offset>\d+)\s*,\s*)?(?P<count>\d+|ALL)(?P<rest>\s+OFFSET\s+\d+)?(?P<lock>\s+(?:FOR|LOCK)\b.*)?\s*$",
+    re.IGNORECASE | re.DOTALL
+)
+# What may follow FETCH: FIRST|NEXT [count] ROW|ROWS ONLY|WITH TIES, then an optional locking clause
+_FETCH_TAIL = re.compile(
+    r"^(\s+(?:FIRST|NEXT)\s+)(?P<count>\d+\s+)?(?P<rest>ROWS?\s+(?:ONLY|WITH\s+TIES)(?:\s+(?:FOR|LOCK)\b.*)?)\s*$",
+    re.IGNORECASE | re.DOTALL
+)
+
+def apply_row_limit(query: str, max_rows: int) -> str:
+    """Bound a SELECT so the database never returns more than max_rows rows.
+
+    Appends a LIMIT when the statement has none, ahead of any FOR UPDATE
+    or LOCK IN SHARE MODE clause, and lowers the row count of ``LIMIT n``,
+    ``LIMIT offset, n``, ``LIMIT n OFFSET m``, ``LIMIT ALL`` and
+    ``FETCH FIRST n ROWS ONLY`` when it exceeds the cap. Comments are
+    stripped first so a trailing ``--`` cannot swallow the LIMIT.
+    Statements other than SELECT are returned unchanged; input holding
+    more than one statement raises ValueError.
+    """
+    query = strip_trailing_semicolon(query)
+    try:
+        stripped = strip_trailing_semicolon(sqlparse.format(query, strip_comments=True))
+        parsed = [stmt for stmt in sqlparse.parse(stripped) if str(stmt).strip()]
+        if len(parsed) > 1:
+            raise ValueError("Only a single SQL statement can be executed")
+        if not parsed or parsed[0].get_type() != "SELECT":
+            return query
+        stmt = parsed[0]
+        tokens = [str(token) for token in stmt.tokens]
+
+        fetch_index = _top_level_keyword(stmt, "FETCH")
+        if fetch_index is not None:
+            tail = _FETCH_TAIL.match("".join(tokens[fetch_index + 1:]))
+            if tail is None or int(tail.group("count") or 1) <= max_rows:
+                return stripped
+            return "".join(tokens[:fetch_index + 1]) + tail.group(1) + f"{max_rows} " + tail.group("rest")
+
+        limit_index = _top_level_keyword(stmt, "LIMIT")
+        if limit_index is None:
+            lock_index = _top_level_keyword(stmt, "FOR", "FOR UPDATE", "FOR SHARE", "LOCK")
+            if lock_index is None:
+                return f"{stripped} LIMIT {max_rows}"
+            head = "".join(tokens[:lock_index]).rstrip()
+            return f"{head} LIMIT {max_rows} {''.join(tokens[lock_index:]).lstrip()}"
+
+        tail = _LIMIT_TAIL.match("".join(tokens[limit_index + 1:]))
+        if tail is None or (tail.group("count").isdigit() and int(tail.group("count")) <= max_rows):
+            # Placeholders and expressions are left as written
+            return stripped
+        offset = f"{tail.group('offset')}, " if tail.group("offset") is not None else ""
+        return (
+            "".join(tokens[:limit_index + 1]) + tail.group(1) + offset + str(max_rows)
+            + (tail.group("rest") or "") + (tail.group("lock") or "")
+        )
+    except ValueError:
+        raise
+    except Exception as e:
+        logger.warning(f"Could not apply row limit: {str(e)}")
+        return query
+
+def normalize_sql(query: str) -> str:
+    """Canonical form of a statement for use as a cache key"""
+    formatted = sqlparse.format(
+        strip_trailing_semicolon(query),
+        keyword_case="upper",
+        strip_comments=True
+    )
+    return " ".join(formatted.split())
+
+def _collect_tables(token_list, tables: Set[str], aliases: Optional[Dict[str, str]] = None) -> None:
+    """Walk a parsed statement, collecting names that follow FROM/JOIN"""
+    expect_table = False
+    for token in token_list.tokens:
+        if token.is_whitespace or token.ttype in T.Comment:
+            continue
+
+        if token.ttype in T.Keyword and (token.normalized == "FROM" or token.normalized.endswith("JOIN")):
+            expect_table = True
+            continue
+
+        if expect_table:
+            identifiers = token.get_identifiers() if isinstance(token, IdentifierList) else [token]
+            for identifier in identifiers:
+                if isinstance(identifier, Identifier) and not isinstance(identifier.token_first(), Parenthesis):
+                    name = identifier.get_real_name().lower()
+                    tables.add(name)
+                    if aliases is not None:
+                        aliases[(identifier.get_alias() or name).lower()] = name
+                elif identifier.is_group:
+                    _collect_tables(identifier, tables, aliases)
+            expect_table = False
+        elif token.is_group:
+            # Subqueries in WHERE, SELECT lists and derived tables
+            _collect_tables(token, tables, aliases)
+
+def referenced_tables(query: str) -> Set[str]:
+    """Return the lower-cased names of tables a statement reads from"""
+    tables: Set[str] = set()
+    for stmt in sqlparse.parse(query):
+        _collect_tables(stmt, tables)
+    return tables
+
+def table_aliases(query: str) -> Dict[str, str]:
+    """Map each alias (or bare name) used in FROM/JOIN to its lower-cased table"""
+    aliases: Dict[str, str] = {}
+    for stmt in sqlparse.parse(query):
+        _collect_tables(stmt, set(), aliases)
+    return aliases
@@ -0,0 +1,114 @@
+"""Micro-benchmark: BaseHTTPMiddleware auth vs the pure ASGI AuthMiddleware.
+
+Requests are driven straight through the ASGI interface, so the numbers
+measure middleware overhead only (no sockets, no HTTP parsing).
+
+    python -m benchmarks.auth_middleware --requests 20000 --concurrency 50
+    python -m benchmarks.auth_middleware --token "<jwt>"   # include auth cookie
+"""
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+from app.core.middleware import AuthMiddleware, resolve_scope_user
+import argparse
+import asyncio
+import time
+
+class LegacyAuthMiddleware(BaseHTTPMiddleware):
+    """The previous implementation: resolves the user on every path"""
+
+    async def dispatch(self, request, call_next):
+        request.scope["user"] = resolve_scope_user(request.scope)
+        return await call_next(request)
+
+async def static_file(request):
+    return PlainTextResponse("body { margin: 0; }", media_type="text/css")
+
+async def api_ping(request):
+    return JSONResponse({"ok": True})
+
+async def stream(request):
+    async def chunks():
+        for i in range(10):
+            yield f'{{"type": "rows", "chunk": {i}}}\n'
+    return StreamingResponse(chunks(), media_type="application/x-ndjson")
+
+ROUTES = [
+    Route("/static/app.css", static_file),
+    Route("/api/ping", api_ping),
+    Route("/api/stream", stream)
+]
+
+def build_app(middleware_class) -> Starlette:
+    return Starlette(routes=ROUTES, middleware=[Middleware(middleware_class)])
+
+async def call(app, path: str, headers) -> None:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": headers,
+        "server": ("bench", 80),
+        "client": ("127.0.0.1", 50000)
+    }
+    request_sent = False
+    disconnect = asyncio.Event()
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await disconnect.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.body" and not message.get("more_body", False):
+            disconnect.set()
+
+    await app(scope, receive, send)
+
+async def measure(app, path: str, headers, total: int, concurrency: int) -> float:
+    """Return requests per second for one app and path"""
+    async def worker(count: int):
+        for _ in range(count):
+            await call(app, path, headers)
+
+    # Warm up routing and imports
+    await asyncio.gather(*(worker(10) for _ in range(concurrency)))
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(total // concurrency) for _ in range(concurrency)))
+    return (total // concurrency) * concurrency / (time.perf_counter() - started)
+
+async def main(args) -> None:
+    headers = []
+    if args.token:
+        headers.append((b"cookie", f'access_token="Bearer {args.token}"'.encode()))
+
+    apps = {
+        "BaseHTTPMiddleware": build_app(LegacyAuthMiddleware),
+        "pure ASGI": build_app(AuthMiddleware)
+    }
+    print(f"{'path':<18}{'middleware':<22}{'req/s':>10}")
+    for path in ("/static/app.css", "/api/ping", "/api/stream"):
+        results = {}
+        for name, app in apps.items():
+            results[name] = await measure(app, path, headers, args.requests, args.concurrency)
+            print(f"{path:<18}{name:<22}{results[name]:>10.0f}")
+        speedup = results["pure ASGI"] / results["BaseHTTPMiddleware"]
+        print(f"{'':<18}{'speedup':<22}{speedup:>9.2f}x")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--token", help="JWT to send as the access_token cookie")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,393 @@
+"""Offline NL-to-SQL benchmark: per-stage latency and exact-result accuracy.
+
+Builds the mock university schema from mock_data_setup.py into a local
+SQLite file with seeded data. Every question in questions.txt then goes
+through the same stages NLToSQLService.generate_sql uses (intent match,
+then prompt build, model, clean and validate when the matcher declines),
+and the resulting SQL is executed. A question is
+counted correct when its result matches the reference query in
+nl_to_sql_gold.json. Column names are ignored, and row order only
+matters when the reference has an ORDER BY.
+
+    python -m benchmarks.nl_to_sql                          # deterministic stub model
+    python -m benchmarks.nl_to_sql --repeat 20 --output run.json
+    python -m benchmarks.nl_to_sql --backend router         # the service's backend routing
+    python -m benchmarks.nl_to_sql --backend remote         # one backend: local or remote
+    python -m benchmarks.nl_to_sql --no-intent              # every question goes to the model
+    python -m benchmarks.nl_to_sql --backend mypkg.bench:make_backend
+"""
+from collections import Counter
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+from sqlalchemy import create_engine, text
+from app.core.http_client import model_client
+from app.services.nl_to_sql_service import NLToSQLService
+from app.services.model_backends import ModelRouter, create_backend
+from app.services.intent_matcher import intent_matcher
+from app.services.schema_introspection import format_schema_for_prompt, introspect_schema
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import random
+import re
+import sqlite3
+import tempfile
+import time
+
+ROOT = Path(__file__).resolve().parent.parent
+QUESTIONS_FILE = ROOT / "questions.txt"
+GOLD_FILE = Path(__file__).resolve().parent / "nl_to_sql_gold.json"
+STAGES = ("intent", "prompt", "model", "clean", "validate", "execute")
+
+# SQLite versions of the tables created by mock_data_setup.py
+SCHEMA = [
+    """CREATE TABLE departments (
+        dept_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        dept_name VARCHAR(50) NOT NULL UNIQUE,
+        hod_name VARCHAR(100),
+        budget DECIMAL(10, 2) CHECK (budget > 0),
+        established_date DATE,
+        contact_email VARCHAR(100)
+    )""",
+    """CREATE TABLE courses (
+        course_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        dept_id INT REFERENCES departments(dept_id),
+        course_name VARCHAR(100) NOT NULL,
+        credits INT NOT NULL CHECK (credits BETWEEN 1 AND 6),
+        max_capacity INT CHECK (max_capacity > 0),
+        course_fee DECIMAL(8, 2),
+        is_active BOOLEAN DEFAULT 1
+    )""",
+    """CREATE TABLE students (
+        student_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        dept_id INT REFERENCES departments(dept_id),
+        first_name VARCHAR(50) NOT NULL,
+        last_name VARCHAR(50) NOT NULL,
+        email VARCHAR(100) UNIQUE,
+        enrollment_date DATE,
+        gpa DECIMAL(3, 2) CHECK (gpa BETWEEN 0 AND 4.0),
+        semester INT CHECK (semester BETWEEN 1 AND 8),
+        is_active BOOLEAN DEFAULT 1
+    )""",
+    """CREATE TABLE enrollments (
+        enrollment_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        student_id INT REFERENCES students(student_id),
+        course_id INT REFERENCES courses(course_id),
+        enrollment_date DATE,
+        grade DECIMAL(3, 2) CHECK (grade BETWEEN 0 AND 4.0)
+    )"""
+]
+
+DEPARTMENTS = [
+    ("Computer Science", 500000),
+    ("Electrical Engineering", 450000),
+    ("Mechanical Engineering", 475000),
+    ("Civil Engineering", 400000),
+    ("Chemical Engineering", 425000),
+    ("Physics", 350000),
+    ("Mathematics", 300000),
+    ("Biology", 375000)
+]
+FIRST_NAMES = ["Ava", "Ben", "Chloe", "Dev", "Elena", "Farid", "Grace", "Hiro", "Ines", "Jonah", "Kara", "Luis"]
+LAST_NAMES = ["Adams", "Baker", "Chen", "Diaz", "Evans", "Fischer", "Gupta", "Hughes", "Ito", "Jones", "Khan", "Lopez"]
+COURSE_TOPICS = ["Foundations", "Systems", "Methods", "Analysis", "Design", "Theory", "Laboratory", "Seminar"]
+
+def build_database(path: str, seed: int, students: int) -> None:
+    """Create the university schema with seeded data; same shape as mock_data_setup.py"""
+    if os.path.exists(path):
+        os.remove(path)
+    rng = random.Random(seed)
+    today = date(2024, 6, 1)
+    conn = sqlite3.connect(path)
+    try:
+        for statement in SCHEMA:
+            conn.execute(statement)
+        for dept_name, budget in DEPARTMENTS:
+            conn.execute(
+                "INSERT INTO departments (dept_name, hod_name, budget, established_date, contact_email) VALUES (?, ?, ?, ?, ?)",
+                (
+                    dept_name,
+                    f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                    budget,
+                    (today - timedelta(days=rng.randint(365, 20 * 365))).isoformat(),
+                    f"{dept_name.lower().replace(' ', '.')}@college.edu"
+                )
+            )
+        dept_ids = [row[0] for row in conn.execute("SELECT dept_id FROM departments")]
+        for dept_id, (dept_name, _) in zip(dept_ids, DEPARTMENTS):
+            for number, topic in enumerate(rng.sample(COURSE_TOPICS, rng.randint(5, 8)), start=1):
+                conn.execute(
+                    "INSERT INTO courses (dept_id, course_name, credits, max_capacity, course_fee, is_active) VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        dept_id,
+                        f"{dept_name} {topic} {number}",
+                        rng.randint(1, 6),
+                        rng.randint(30, 100),
+                        round(rng.uniform(500, 2000), 2),
+                        rng.choice([1, 1, 1, 0])
+                    )
+                )
+        for i in range(students):
+            conn.execute(
+                "INSERT INTO students (dept_id, first_name, last_name, email, enrollment_date, gpa, semester, is_active) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    rng.choice(dept_ids),
+                    rng.choice(FIRST_NAMES),
+                    rng.choice(LAST_NAMES),
+                    f"student{i}@college.edu",
+                    (today - timedelta(days=rng.randint(0, 4 * 365))).isoformat(),
+                    round(rng.uniform(2.0, 4.0), 2),
+                    rng.randint(1, 8),
+                    rng.choice([1, 1, 1, 0])
+                )
+            )
+        student_ids = [row[0] for row in conn.execute("SELECT student_id FROM students")]
+        course_ids = [row[0] for row in conn.execute("SELECT course_id FROM courses")]
+        for student_id in student_ids:
+            for course_id in rng.sample(course_ids, rng.randint(3, 6)):
+                conn.execute(
+                    "INSERT INTO enrollments (student_id, course_id, enrollment_date, grade) VALUES (?, ?, ?, ?)",
+                    (
+                        student_id,
+                        course_id,
+                        (today - timedelta(days=rng.randint(0, 2 * 365))).isoformat(),
+                        round(rng.uniform(2.0, 4.0), 2)
+                    )
+                )
+        conn.commit()
+    finally:
+        conn.close()
+
+def load_questions(path: Path = QUESTIONS_FILE) -> List[Dict[str, Any]]:
+    """Numbered questions from questions.txt, with the section each belongs to"""
+    questions, section = [], ""
+    for line in path.read_text().splitlines():
+        line = line.strip()
+        if line.startswith("--"):
+            section = line.strip("- ").replace(" Questions", "").lower()
+            continue
+        match = re.match(r"^(\d+)\.\s+(.+)$", line)
+        if match:
+            questions.append({"number": int(match.group(1)), "section": section, "question": match.group(2)})
+    return questions
+
+def load_gold(path: Path = GOLD_FILE) -> Dict[int, str]:
+    return {int(key): sql for key, sql in json.loads(path.read_text()).items() if not key.startswith("_")}
+
+class StubBackend:
+    """Deterministic local model: answers with the reference SQL, formatted like a model reply.
+
+    Measures the pipeline around the model without network noise. Questions
+    without a reference get a trivial query. ``latency_ms`` adds a fixed
+    simulated model delay.
+    """
+
+    name = "stub"
+
+    def __init__(self, gold: Dict[int, str], latency_ms: float = 0):
+        self.gold = gold
+        self.latency_ms = latency_ms
+
+    async def generate(self, prompt: str, item: Dict[str, Any]) -> str:
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000)
+        sql = self.gold.get(item["number"], "SELECT COUNT(*) AS total FROM departments")
+        return f"```sql\n{sql}\n```"
+
+class AppBackend:
+    """The application's own model routing, or one backend from it, e.g. the remote model"""
+
+    def __init__(self, router: ModelRouter, name: str):
+        self.router = router
+        self.name = name
+        self.answered_by: Dict[str, int] = Counter()
+
+    async def generate(self, prompt: str, item: Dict[str, Any]) -> str:
+        generated_text, backend = await self.router.generate(item["question"], item["schema"], lambda: prompt)
+        self.answered_by[backend] += 1
+        return generated_text
+
+def make_backend(spec: str, service: NLToSQLService, gold: Dict[int, str], stub_latency_ms: float):
+    """Resolve --backend: stub, router, one of MODEL_BACKENDS, or "module:factory" called as factory(service, gold)"""
+    if spec == "stub":
+        return StubBackend(gold, stub_latency_ms)
+    if spec == "router":
+        return AppBackend(service.router, spec)
+    if ":" not in spec:
+        backend = create_backend(spec)
+        if backend is None:
+            raise SystemExit(f"Unknown backend '{spec}'")
+        return AppBackend(ModelRouter([backend]), spec)
+    module_name, _, factory_name = spec.partition(":")
+    factory: Callable = getattr(importlib.import_module(module_name), factory_name or "make_backend")
+    return factory(service, gold)
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, (float, Decimal)):
+        return round(float(value), 4)
+    return value
+
+def results_match(actual: List[tuple], expected: List[tuple], ordered: bool) -> bool:
+    actual = [tuple(_normalize(v) for v in row) for row in actual]
+    expected = [tuple(_normalize(v) for v in row) for row in expected]
+    return actual == expected if ordered else Counter(actual) == Counter(expected)
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+
+    def rank(p: float) -> float:
+        # Nearest-rank percentile
+        return ordered[max(0, min(len(ordered) - 1, int(round(p / 100 * len(ordered) + 0.5)) - 1))]
+
+    return {
+        "count": len(ordered),
+        "p50_ms": round(rank(50), 3),
+        "p95_ms": round(rank(95), 3),
+        "p99_ms": round(rank(99), 3),
+        "max_ms": round(ordered[-1], 3)
+    }
+
+async def run_question(service: NLToSQLService, backend, conn, schema: str, item: Dict[str, Any]) -> Dict[str, Any]:
+    """Run one question through every stage, timing each; stops at the first failing stage"""
+    timings: Dict[str, float] = {}
+    record: Dict[str, Any] = {"number": item["number"], "section": item["section"], "question": item["question"]}
+
+    def timed(stage: str, started: float) -> None:
+        timings[stage] = (time.perf_counter() - started) * 1000
+
+    try:
+        match = None
+        if service.matcher is not None:
+            started = time.perf_counter()
+            match = service.matcher.match(item["question"], schema)
+            timed("intent", started)
+
+        if match is not None:
+            record["source"] = "intent"
+            record["sql"] = sql = match.sql
+        else:
+            record["source"] = "model"
+            started = time.perf_counter()
+            prompt = service.create_prompt(item["question"], schema)
+            timed("prompt", started)
+
+            started = time.perf_counter()
+            raw = await backend.generate(prompt, item)
+            timed("model", started)
+
+            started = time.perf_counter()
+            sql = service._clean_sql_query(raw)
+            timed("clean", started)
+            record["sql"] = sql
+
+            started = time.perf_counter()
+            valid = await service.validate_sql(sql)
+            timed("validate", started)
+            if not valid:
+                record["error"] = "failed validation"
+                return {**record, "timings_ms": timings, "rows": None}
+
+        started = time.perf_counter()
+        rows = [tuple(row) for row in conn.execute(text(sql))]
+        timed("execute", started)
+        return {**record, "timings_ms": timings, "rows": rows}
+    except Exception as e:
+        conn.rollback()
+        record["error"] = str(e).splitlines()[0]
+        return {**record, "timings_ms": timings, "rows": None}
+
+async def main(args) -> Dict[str, Any]:
+    db_path = args.db or os.path.join(tempfile.gettempdir(), "nl_to_sql_benchmark.db")
+    build_database(db_path, args.seed, args.students)
+    engine = create_engine(f"sqlite:///{db_path}")
+    questions = load_questions()
+    gold = load_gold()
+    service = NLToSQLService(cache=None, matcher=None if args.no_intent else intent_matcher)
+    backend = make_backend(args.backend, service, gold, args.stub_latency_ms)
+
+    samples: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+    records: List[Dict[str, Any]] = []
+    with engine.connect() as conn:
+        schema = format_schema_for_prompt(introspect_schema(conn, "sqlite", db_path))
+        for item in questions:
+            item["schema"] = schema
+        expected = {number: [tuple(row) for row in conn.execute(text(sql))] for number, sql in gold.items()}
+
+        for repetition in range(args.repeat):
+            for item in questions:
+                result = await run_question(service, backend, conn, schema, item)
+                for stage, ms in result["timings_ms"].items():
+                    samples[stage].append(ms)
+                if repetition == 0:
+                    records.append(result)
+
+    scored = correct = 0
+    for record in records:
+        reference = gold.get(record["number"])
+        rows = record.pop("rows")
+        if reference is None:
+            record["correct"] = None
+            continue
+        scored += 1
+        record["correct"] = rows is not None and results_match(
+            rows, expected[record["number"]], ordered=" order by " in reference.lower()
+        )
+        correct += int(record["correct"])
+
+    await model_client.close()
+    return {
+        "backend": getattr(backend, "name", args.backend),
+        "answered_by": dict(getattr(backend, "answered_by", {})),
+        "intent_matcher": service.matcher.stats() if service.matcher is not None else None,
+        "questions": len(questions),
+        "repeat": args.repeat,
+        "seed": args.seed,
+        "students": args.students,
+        "stages": {stage: percentiles(values) for stage, values in samples.items()},
+        "accuracy": {
+            "scored": scored,
+            "correct": correct,
+            "exact_result_rate": round(correct / scored, 4) if scored else None,
+            "errors": sum(1 for record in records if record.get("error"))
+        },
+        "results": records
+    }
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(f"backend={report['backend']} questions={report['questions']} repeat={report['repeat']}")
+    if report["intent_matcher"]:
+        matcher = report["intent_matcher"]
+        print(f"intent matcher: {matcher['hits']}/{matcher['questions']} hits ({matcher['hit_rate']:.0%}), {matcher['avg_match_us']} us avg")
+    if report["answered_by"]:
+        print("answered by: " + ", ".join(f"{name}={count}" for name, count in report["answered_by"].items()))
+    print(f"{'stage':<10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for stage, stats in report["stages"].items():
+        if stats["count"]:
+            print(f"{stage:<10}{stats['p50_ms']:>10.3f}{stats['p95_ms']:>10.3f}{stats['p99_ms']:>10.3f}{stats['max_ms']:>10.3f}")
+    accuracy = report["accuracy"]
+    print(f"exact-result accuracy: {accuracy['correct']}/{accuracy['scored']} scored questions, {accuracy['errors']} errors")
+    for record in report["results"]:
+        if record["correct"] is False or record.get("error"):
+            print(f"  #{record['number']}: {record.get('error') or 'wrong result'} -- {record.get('sql', '')}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", default="stub", help='stub, router, local, remote, or "module:factory"')
+    parser.add_argument("--no-intent", action="store_true", help="skip the intent matcher")
+    parser.add_argument("--repeat", type=int, default=1, help="passes over the questions (latency samples)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--students", type=int, default=50)
+    parser.add_argument("--stub-latency-ms", type=float, default=0)
+    parser.add_argument("--db", help="SQLite file to (re)build; defaults to the temp directory")
+    parser.add_argument("--output", help="write the full report as JSON")
+    args = parser.parse_args()
+    report = asyncio.run(main(args))
+    print_report(report)
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2, default=str))
@@ -0,0 +1,69 @@
+"""Micro-benchmark: result payload layouts and JSON encoders.
+
+Compares the original per-row dicts rendered the way FastAPI does by
+default (jsonable_encoder + json.dumps) with the compact rows/columns
+layouts rendered by app.core.responses.dumps.
+
+    python -m benchmarks.result_format --rows 10000
+"""
+from datetime import datetime, timedelta
+from decimal import Decimal
+from fastapi.encoders import jsonable_encoder
+from app.core import responses
+from app.services.result_format import to_columnar, to_records
+import argparse
+import json
+import random
+import time
+
+COLUMNS = ["id", "student_name", "email_address", "enrollment_date", "department_name", "gpa", "credits_completed", "tuition_balance"]
+
+def make_rows(count: int):
+    started = datetime(2020, 1, 1)
+    return [
+        (
+            i,
+            f"Student {i}",
+            f"student{i}@example.edu",
+            started + timedelta(days=i % 1500),
+            random.choice(["Physics", "History", "Computer Science", "Biology"]),
+            round(random.uniform(2.0, 4.0), 2),
+            random.randint(0, 140),
+            Decimal(f"{random.randint(0, 20000)}.{random.randint(0, 99):02d}")
+        )
+        for i in range(count)
+    ]
+
+def fastapi_default(payload) -> bytes:
+    return json.dumps(jsonable_encoder(payload), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def measure(build, render, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = render(build())
+        best = min(best, time.perf_counter() - started)
+    return len(body), best * 1000
+
+def main(args) -> None:
+    rows = make_rows(args.rows)
+    cases = [
+        ("records, jsonable_encoder + json", lambda: {"results": to_records(COLUMNS, rows)}, fastapi_default),
+        ("records, fast dumps", lambda: {"results": to_records(COLUMNS, rows)}, responses.dumps),
+        ("rows, fast dumps", lambda: {"results": to_columnar(COLUMNS, rows, "rows")}, responses.dumps),
+        ("columns, fast dumps", lambda: {"results": to_columnar(COLUMNS, rows, "columns")}, responses.dumps)
+    ]
+    encoder = "orjson" if responses.orjson is not None else "json (orjson not installed)"
+    print(f"{args.rows} rows x {len(COLUMNS)} columns, fast encoder: {encoder}")
+    print(f"{'layout':<36}{'bytes':>12}{'ms':>10}")
+    baseline = None
+    for name, build, render in cases:
+        size, ms = measure(build, render, args.repeat)
+        baseline = baseline or (size, ms)
+        print(f"{name:<36}{size:>12}{ms:>10.1f}   ({size / baseline[0]:.0%} size, {ms / baseline[1]:.0%} time)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    main(parser.parse_args())
@@ -0,0 +1,102 @@
+"""Schema pruning benchmark: prompt size and table recall on a wide schema.
+
+Introspects the university database used by benchmarks.nl_to_sql, then
+hides it among generated warehouse-style tables linked by foreign keys.
+For every question with a reference query, the schema is pruned the way
+NLToSQLService.create_prompt does and checked for recall: every table
+the reference query uses must survive.
+
+    python -m benchmarks.schema_pruning --tables 300
+    python -m benchmarks.schema_pruning --tables 1000 --top-k 3 --max-tables 10
+"""
+from typing import Any, Dict, List
+from sqlalchemy import create_engine
+from app.services.schema_introspection import format_schema_for_prompt, introspect_schema
+from app.services.schema_retrieval import SchemaRetriever
+from benchmarks.nl_to_sql import build_database, load_gold, load_questions, percentiles
+import argparse
+import os
+import random
+import re
+import tempfile
+import time
+
+DOMAINS = [
+    "invoice", "payment", "shipment", "warehouse", "supplier", "product", "order", "customer", "employee",
+    "payroll", "campaign", "ticket", "asset", "vendor", "contract", "audit", "ledger", "session", "device",
+    "region", "promotion", "refund", "subscription", "inventory", "carrier", "store", "forecast", "review"
+]
+SUFFIXES = ["", "_items", "_events", "_history", "_archive", "_snapshots", "_lines", "_notes", "_metrics", "_daily"]
+COLUMNS = [
+    ("amount", "decimal(12,2)"), ("status", "varchar(20)"), ("created_at", "datetime"), ("updated_at", "datetime"),
+    ("region_code", "varchar(8)"), ("notes", "text"), ("quantity", "int"), ("price", "decimal(10,2)"),
+    ("description", "varchar(255)"), ("external_ref", "varchar(64)"), ("priority", "int"), ("is_deleted", "tinyint")
+]
+
+def distractor_tables(count: int, seed: int) -> Dict[str, Dict[str, Any]]:
+    """Generated tables in the normalized schema shape, each linked to an earlier one"""
+    rng = random.Random(seed)
+    names = [domain + suffix for suffix in SUFFIXES for domain in DOMAINS]
+    names += [f"{name}_{n}" for n in range(2, 100) for name in names[:len(DOMAINS) * len(SUFFIXES)]]
+    schema: Dict[str, Dict[str, Any]] = {}
+    for name in names[:count]:
+        columns = [{"name": "id", "type": "int", "data_type": "int", "null": False, "key": "PRI", "primary_key": True}]
+        for column, data_type in rng.sample(COLUMNS, rng.randint(3, 8)):
+            columns.append({"name": column, "type": data_type, "data_type": data_type, "null": True, "key": "", "primary_key": False})
+        foreign_keys = []
+        if schema:
+            parent = rng.choice(list(schema))
+            columns.append({"name": f"{parent}_id", "type": "int", "data_type": "int", "null": True, "key": "MUL", "primary_key": False})
+            foreign_keys.append({"column": f"{parent}_id", "references_table": parent, "references_column": "id"})
+        schema[name] = {"columns": columns, "foreign_keys": foreign_keys}
+    return schema
+
+def tables_in(sql: str, tables: List[str]) -> List[str]:
+    return [table for table in tables if re.search(rf"\b{table}\b", sql, re.IGNORECASE)]
+
+def main(args) -> None:
+    db_path = os.path.join(tempfile.gettempdir(), "schema_pruning_benchmark.db")
+    build_database(db_path, seed=42, students=10)
+    with create_engine(f"sqlite:///{db_path}").connect() as conn:
+        university = introspect_schema(conn, "sqlite", db_path)
+    schema = {**distractor_tables(args.tables, args.seed), **university}
+    text = format_schema_for_prompt(schema)
+
+    retriever = SchemaRetriever(top_k=args.top_k, max_tables=args.max_tables, min_tables=0)
+    gold = load_gold()
+    questions = [item for item in load_questions() if item["number"] in gold]
+
+    samples: List[float] = []
+    recalled = kept = 0
+    misses = []
+    for item in questions:
+        started = time.perf_counter()
+        pruned = retriever.prune_prompt(item["question"], text)
+        samples.append((time.perf_counter() - started) * 1000)
+        needed = tables_in(gold[item["number"]], list(university))
+        present = tables_in(pruned, [f"Table: {table}" for table in needed])
+        kept += pruned.count("Table: ")
+        if len(present) == len(needed):
+            recalled += 1
+        else:
+            misses.append((item["number"], needed))
+
+    stats = retriever.stats()
+    print(f"schema: {len(schema)} tables, {len(text)} chars (~{len(text) // 4} tokens)")
+    print(f"questions: {len(questions)}  top_k={args.top_k}  max_tables={args.max_tables}")
+    print(f"tables per prompt: {kept / len(questions):.1f}")
+    print(f"prompt schema chars: {stats['chars_before']} -> {stats['chars_after']} "
+          f"({stats['savings_ratio']:.1%} saved, ~{stats['estimated_tokens_saved']} tokens)")
+    print(f"gold-table recall: {recalled}/{len(questions)}")
+    for number, needed in misses:
+        print(f"  #{number}: needs {', '.join(needed)}")
+    timing = percentiles(samples[1:])  # the first call builds the index
+    print(f"index build: {samples[0]:.2f} ms, prune p50={timing['p50_ms']:.3f} ms p99={timing['p99_ms']:.3f} ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tables", type=int, default=300, help="generated tables added around the university schema")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--max-tables", type=int, default=15)
+    parser.add_argument("--seed", type=int, default=7)
+    main(parser.parse_args())